@@ -3,7 +3,7 @@ from crewai import Agent
 from dotenv import load_dotenv
 
 from agents.llm import get_llm
-from agents.portfolio_integration import get_portfolio_knowledge_prompt
+from agents.portfolio_integration import get_portfolio_guidelines_prompt
 
 # Load environment variables
 load_dotenv()
@@ -36,7 +36,7 @@ interface_agent = Agent(
 knowledge_agent = Agent(
     role="Portfolio Knowledge Expert",
     goal="Provide comprehensive information about Santiago's skills, experience, and background",
-    backstory=get_portfolio_knowledge_prompt(),  # Using our formatted portfolio data
+    backstory=get_portfolio_guidelines_prompt(),  # Portfolio sections come with each task
     verbose=True,
     allow_delegation=False,
     # Pass LLM configuration as keyword arguments
@@ -54,7 +54,7 @@ project_agent = Agent(
     solutions implemented, and outcomes for each project. You can explain the technical aspects
     as well as the business impact of his work.
     
-    {get_portfolio_knowledge_prompt()}
+    {get_portfolio_guidelines_prompt()}
     
     When discussing Santiago's projects, emphasize:
     - His problem-solving approach (business needs first, technology second)
@@ -0,0 +1,163 @@
+# agents/analytics/event_store.py
+import glob
+import json
+import mmap
+import os
+import re
+import threading
+from typing import Dict, Iterator, List, Optional
+
+SEGMENT_PATTERN = re.compile(r"^queries_(\d{4}-\d{2}-\d{2})\.jsonl$")
+
+
+def encoded_sizes(events: List[Dict]) -> Dict[str, int]:
+    """Bytes that appending events adds to each daily segment, keyed by date"""
+    sizes: Dict[str, int] = {}
+    for event in events:
+        # One ASCII JSON line per event, as written by EventStore.append
+        sizes[event["date"]] = sizes.get(event["date"], 0) + len(json.dumps(event)) + 1
+    return sizes
+
+
+class EventStore:
+    """
+    Append-only analytics event store made of one JSONL segment per day.
+
+    The segment file names act as a time index: reading a window only opens
+    the segments of the days it covers, and segments are read through mmap
+    so only the touched pages are loaded.
+    """
+    def __init__(self, storage_path: str = "./data/analytics"):
+        self.storage_path = storage_path
+        self._lock = threading.Lock()
+
+        os.makedirs(storage_path, exist_ok=True)
+        self._migrate_legacy_file()
+
+    def segment_path(self, date: str) -> str:
+        """Path of the segment holding the events of a day (YYYY-MM-DD)"""
+        return os.path.join(self.storage_path, f"queries_{date}.jsonl")
+
+    def list_dates(self) -> List[str]:
+        """Dates that have a segment, oldest first"""
+        dates = []
+        for path in glob.glob(os.path.join(self.storage_path, "queries_*.jsonl")):
+            match = SEGMENT_PATTERN.match(os.path.basename(path))
+            if match:
+                dates.append(match.group(1))
+        return sorted(dates)
+
+    def get_segment_sizes(self) -> Dict[str, int]:
+        """Size in bytes of every segment, keyed by date"""
+        return {date: os.path.getsize(self.segment_path(date)) for date in self.list_dates()}
+
+    def _migrate_legacy_file(self) -> None:
+        """Split the legacy queries.json into daily segments, once"""
+        legacy_file = os.path.join(self.storage_path, "queries.json")
+        if not os.path.exists(legacy_file):
+            return
+        try:
+            with open(legacy_file, 'r') as f:
+                self.append(json.load(f))
+            os.replace(legacy_file, f"{legacy_file}.migrated")
+        except Exception as e:
+            print(f"Error migrating legacy analytics file: {str(e)}")
+
+    def append(self, events: List[Dict]) -> None:
+        """
+        Append events to their daily segments
+
+        Args:
+            events: Event records with a "date" field (YYYY-MM-DD)
+        """
+        # Group by day so each segment is opened once
+        by_date: Dict[str, List[str]] = {}
+        for event in events:
+            by_date.setdefault(event["date"], []).append(json.dumps(event))
+
+        with self._lock:
+            for date, lines in by_date.items():
+                with open(self.segment_path(date), 'a') as f:
+                    f.write("\n".join(lines) + "\n")
+
+    def _iter_segment(self, date: str, reverse: bool = False) -> Iterator[Dict]:
+        """Yield the events of one segment, optionally newest first"""
+        path = self.segment_path(date)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return
+
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if reverse:
+                end = len(mm)
+                while end > 0:
+                    start = mm.rfind(b"\n", 0, end - 1) + 1
+                    line = mm[start:end].strip()
+                    end = start
+                    if line:
+                        try:
+                            yield json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+            else:
+                for line in iter(mm.readline, b""):
+                    if line.strip():
+                        try:
+                            yield json.loads(line)
+                        except json.JSONDecodeError:
+                            # Torn line from an interrupted write
+                            continue
+
+    def iter_events(self, start: Optional[str] = None, end: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Yield events in a time window, oldest day first
+
+        Args:
+            start: Inclusive ISO date or datetime lower bound (None for no bound)
+            end: Exclusive ISO date or datetime upper bound (None for no bound)
+        """
+        for date in self.list_dates():
+            # Skip whole days outside the window without opening them
+            if start and date < start[:10]:
+                continue
+            if end and date > end[:10]:
+                break
+            for event in self._iter_segment(date):
+                timestamp = event.get("timestamp", date)
+                if start and timestamp < start:
+                    continue
+                if end and timestamp >= end:
+                    continue
+                yield event
+
+    def read_window(self, start: Optional[str] = None, end: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Read the events in a time window, sorted by timestamp
+
+        Args:
+            start: Inclusive ISO date or datetime lower bound
+            end: Exclusive ISO date or datetime upper bound
+            limit: Maximum number of (most recent) events to return
+
+        Returns:
+            List of event records
+        """
+        events = sorted(self.iter_events(start, end), key=lambda e: e.get("timestamp", ""))
+        return events[-limit:] if limit else events
+
+    def read_recent(self, limit: int = 10) -> List[Dict]:
+        """
+        Read the most recent events, scanning segments backwards from the end
+
+        Args:
+            limit: Maximum number of events to return
+
+        Returns:
+            List of event records, oldest first
+        """
+        events = []
+        for date in reversed(self.list_dates()):
+            for event in self._iter_segment(date, reverse=True):
+                events.append(event)
+                if len(events) >= limit:
+                    return sorted(events, key=lambda e: e.get("timestamp", ""))
+        return sorted(events, key=lambda e: e.get("timestamp", ""))
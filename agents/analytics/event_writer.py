@@ -0,0 +1,108 @@
+# agents/analytics/event_writer.py
+import threading
+from typing import Callable, Dict, List, Optional
+
+from agents.analytics.event_store import EventStore
+
+
+class BufferedEventWriter:
+    """
+    Buffers analytics events in memory and appends them to an EventStore
+    from a background thread.
+
+    The buffer is flushed when it reaches ``max_batch`` events or every
+    ``flush_interval`` seconds, whichever comes first, and once more on close.
+    """
+    def __init__(
+        self,
+        event_store: EventStore,
+        max_batch: int = 100,
+        flush_interval: float = 5.0,
+        on_flush: Optional[Callable[[List[Dict]], None]] = None
+    ):
+        self.event_store = event_store
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.on_flush = on_flush
+
+        self._buffer: List[Dict] = []
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self._stats = {"events_written": 0, "flushes": 0, "errors": 0}
+
+        self._thread = threading.Thread(target=self._run, name="analytics-flusher", daemon=True)
+        self._thread.start()
+
+    def add(self, event: Dict) -> None:
+        """
+        Queue an event for writing
+
+        Args:
+            event: Event record; its "date" field selects the daily segment
+        """
+        with self._condition:
+            self._buffer.append(event)
+            if len(self._buffer) >= self.max_batch:
+                self._condition.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if not self._closed and len(self._buffer) < self.max_batch:
+                    self._condition.wait(self.flush_interval)
+                closed = self._closed
+            self.flush()
+            if closed:
+                return
+
+    def flush(self) -> int:
+        """
+        Write all buffered events to disk
+
+        Returns:
+            Number of events written
+        """
+        with self._flush_lock:
+            with self._condition:
+                events, self._buffer = self._buffer, []
+            if not events:
+                return 0
+
+            try:
+                self.event_store.append(events)
+            except Exception as e:
+                self._stats["errors"] += 1
+                print(f"Error writing analytics events: {str(e)}")
+                # Put the events back so the next flush retries them
+                with self._condition:
+                    self._buffer = events + self._buffer
+                return 0
+
+            self._stats["events_written"] += len(events)
+            self._stats["flushes"] += 1
+
+            if self.on_flush:
+                try:
+                    self.on_flush(events)
+                except Exception as e:
+                    print(f"Error in analytics flush callback: {str(e)}")
+            return len(events)
+
+    def close(self) -> None:
+        """Stop the background thread after a final flush"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+    def get_stats(self) -> Dict:
+        """
+        Get writer statistics
+
+        Returns:
+            Dictionary with buffered events and write counters
+        """
+        with self._condition:
+            buffered = len(self._buffer)
+        return {"buffered": buffered, **self._stats}
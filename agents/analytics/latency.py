@@ -0,0 +1,261 @@
+# agents/analytics/latency.py
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Log-spaced bucket edges from 1 ms to 1 hour: ~6% relative error per bucket
+MIN_LATENCY = 0.001
+MAX_LATENCY = 3600.0
+BUCKETS_PER_DECADE = 40
+BUCKET_EDGES = np.logspace(
+    np.log10(MIN_LATENCY),
+    np.log10(MAX_LATENCY),
+    int(round(np.log10(MAX_LATENCY / MIN_LATENCY) * BUCKETS_PER_DECADE)) + 1
+)
+# Value reported for each bucket (geometric midpoint); first/last buckets catch under/overflow
+BUCKET_VALUES = np.concatenate((
+    [MIN_LATENCY],
+    np.sqrt(BUCKET_EDGES[:-1] * BUCKET_EDGES[1:]),
+    [MAX_LATENCY]
+))
+
+PERCENTILES = (50, 90, 99)
+
+# Hourly rows older than this are rolled up into daily rows
+HOURLY_RETENTION_DAYS = int(os.getenv("LATENCY_HOURLY_DAYS", 7))
+
+# Daily rows older than this are dropped
+DAILY_RETENTION_DAYS = int(os.getenv("LATENCY_DAILY_DAYS", 365))
+
+# Hard cap on histogram rows; the oldest rows are dropped beyond it
+MAX_ROWS = int(os.getenv("LATENCY_MAX_ROWS", 20000))
+
+# The matrix grows by at most this many rows at a time
+GROWTH_ROWS = 1024
+
+
+class LatencyHistograms:
+    """
+    Columnar store of response-time histograms with log-spaced (HDR-style) buckets.
+
+    There is one histogram row per (hour, agent, crew) key, held in a single
+    int64 matrix. Reads select and sum rows with NumPy and compute percentiles
+    from cumulative counts, so they never touch individual events.
+
+    Memory is bounded: whenever a new day starts, hourly rows older than
+    ``hourly_days`` are rolled up into one row per (day, agent, crew), daily
+    rows older than ``daily_days`` are dropped, and the oldest rows beyond
+    ``max_rows`` go too. Rolled-up periods are reported per day at either
+    granularity.
+    """
+    def __init__(
+        self,
+        initial_rows: int = 64,
+        hourly_days: int = HOURLY_RETENTION_DAYS,
+        daily_days: int = DAILY_RETENTION_DAYS,
+        max_rows: int = MAX_ROWS
+    ):
+        self.hourly_days = hourly_days
+        self.daily_days = daily_days
+        self.max_rows = max_rows
+        self._counts = np.zeros((initial_rows, len(BUCKET_VALUES)), dtype=np.int64)
+        self._hours: List[str] = []
+        self._agents: List[str] = []
+        self._crews: List[str] = []
+        self._rows: Dict[tuple, int] = {}
+        self._latest_hour = ""
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._hours)
+
+    def _row(self, hour: str, agent: str, crew: str) -> int:
+        key = (hour, agent, crew)
+        row = self._rows.get(key)
+        if row is None:
+            row = len(self._hours)
+            if row == self._counts.shape[0]:
+                grow = min(max(row, 1), GROWTH_ROWS)
+                self._counts = np.vstack((self._counts, np.zeros((grow, self._counts.shape[1]), dtype=np.int64)))
+            self._hours.append(hour)
+            self._agents.append(agent)
+            self._crews.append(crew)
+            self._rows[key] = row
+        return row
+
+    def record(self, timestamp: str, latency: float, agent: Optional[str] = None, crew: Optional[str] = None) -> None:
+        """
+        Record one response time
+
+        Args:
+            timestamp: ISO timestamp of the query
+            latency: Response time in seconds
+            agent: Agent that answered (e.g. "Portfolio Specialist")
+            crew: Crew kind ("portfolio", "project" or "cache")
+        """
+        bucket = int(np.searchsorted(BUCKET_EDGES, latency, side="right"))
+        hour = timestamp[:13]
+        with self._lock:
+            if hour > self._latest_hour:
+                new_day = hour[:10] > self._latest_hour[:10]
+                self._latest_hour = hour
+                if new_day:
+                    self._roll_up()
+            row = self._row(hour, agent or "unknown", crew or "unknown")
+            self._counts[row, bucket] += 1
+
+    def _roll_up(self) -> None:
+        """Apply the retention policy relative to the latest hour recorded (caller holds the lock)"""
+        n = len(self._hours)
+        if n == 0:
+            return
+        try:
+            latest = datetime.strptime(self._latest_hour, "%Y-%m-%dT%H")
+        except ValueError:
+            return
+        hourly_cutoff = (latest - timedelta(days=self.hourly_days)).strftime("%Y-%m-%dT%H")
+        daily_cutoff = (latest - timedelta(days=self.daily_days)).strftime("%Y-%m-%d")
+
+        # Hour keys are "YYYY-MM-DDTHH", day keys "YYYY-MM-DD"; None drops the row
+        keys, changed = [], False
+        for period, agent, crew in zip(self._hours, self._agents, self._crews):
+            if len(period) > 10 and period < hourly_cutoff:
+                period = period[:10]
+                changed = True
+            if len(period) == 10 and period < daily_cutoff:
+                keys.append(None)
+                changed = True
+            else:
+                keys.append((period, agent, crew))
+        if not changed and n <= self.max_rows:
+            return
+
+        # Keep the newest rows within the cap
+        kept = sorted({key for key in keys if key is not None}, reverse=True)[:self.max_rows]
+        index = {key: row for row, key in enumerate(sorted(kept))}
+        targets = np.array([index.get(key, -1) for key in keys])
+        mask = targets >= 0
+
+        # Sum the old rows of each kept key, leaving room to grow
+        counts = np.zeros((len(index) + min(max(len(index), 64), GROWTH_ROWS), self._counts.shape[1]), dtype=np.int64)
+        if mask.any():
+            order = np.argsort(targets[mask], kind="stable")
+            sorted_targets = targets[mask][order]
+            starts = np.flatnonzero(np.r_[True, sorted_targets[1:] != sorted_targets[:-1]])
+            counts[sorted_targets[starts]] = np.add.reduceat(self._counts[:n][mask][order], starts, axis=0)
+        self._counts = counts
+        self._hours = [key[0] for key in index]
+        self._agents = [key[1] for key in index]
+        self._crews = [key[2] for key in index]
+        self._rows = index
+
+    def merge(self, other: "LatencyHistograms") -> None:
+        """Add the counts of another store (e.g. another worker's) into this one"""
+        with other._lock:
+            keys = list(zip(other._hours, other._agents, other._crews))
+            counts = other._counts[:len(keys)].copy()
+        with self._lock:
+            for i, key in enumerate(keys):
+                self._counts[self._row(*key)] += counts[i]
+            latest = max((key[0] for key in keys if len(key[0]) > 10), default="")
+            if latest > self._latest_hour:
+                self._latest_hour = latest
+            self._roll_up()
+
+    def get_percentiles(
+        self,
+        granularity: str = "hour",
+        group_by: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        percentiles: Sequence[float] = PERCENTILES
+    ) -> List[Dict]:
+        """
+        Latency percentiles per time period and group
+
+        Args:
+            granularity: "hour" or "day"
+            group_by: "agent", "crew" or None for all queries together
+            start: Inclusive ISO date or datetime lower bound
+            end: Exclusive ISO date or datetime upper bound
+            percentiles: Percentiles to compute (0-100)
+
+        Returns:
+            List of dictionaries with period, group, count and one "pXX" key
+            per percentile (in seconds), sorted by period and group
+        """
+        if granularity not in ("hour", "day"):
+            raise ValueError(f"Unknown granularity: {granularity}")
+        if group_by not in (None, "agent", "crew"):
+            raise ValueError(f"Unknown group_by: {group_by}")
+
+        with self._lock:
+            n = len(self._hours)
+            if n == 0:
+                return []
+            hours = np.array(self._hours)
+            groups = np.array(
+                self._agents if group_by == "agent" else self._crews if group_by == "crew" else ["all"] * n
+            )
+            counts = self._counts[:n].copy()
+
+        # Hour keys sort like timestamps, so the window is a vectorized comparison
+        mask = np.ones(n, dtype=bool)
+        if start:
+            mask &= hours >= start[:13]
+        if end:
+            mask &= hours < end[:13]
+        if not mask.any():
+            return []
+
+        periods = hours[mask] if granularity == "hour" else np.array([hour[:10] for hour in hours[mask]])
+        labels = np.char.add(np.char.add(periods, "|"), groups[mask])
+        unique_labels, inverse = np.unique(labels, return_inverse=True)
+
+        # Sum the histograms of each (period, group)
+        totals = np.zeros((len(unique_labels), counts.shape[1]), dtype=np.int64)
+        np.add.at(totals, inverse, counts[mask])
+
+        cumulative = np.cumsum(totals, axis=1)
+        count = cumulative[:, -1]
+
+        results = [
+            {"period": label.split("|", 1)[0], "group": label.split("|", 1)[1], "count": int(count[i])}
+            for i, label in enumerate(unique_labels)
+        ]
+        for p in percentiles:
+            # First bucket whose cumulative count reaches the rank, for every row at once
+            ranks = np.ceil(count * p / 100.0).clip(min=1)
+            buckets = (cumulative < ranks[:, None]).sum(axis=1)
+            values = BUCKET_VALUES[buckets]
+            for i, result in enumerate(results):
+                result[f"p{p:g}"] = round(float(values[i]), 4)
+        return results
+
+    def to_dict(self) -> Dict:
+        """Compact sparse representation for persistence"""
+        with self._lock:
+            n = len(self._hours)
+            rows, buckets = np.nonzero(self._counts[:n])
+            return {
+                "keys": [list(key) for key in zip(self._hours, self._agents, self._crews)],
+                "rows": rows.tolist(),
+                "buckets": buckets.tolist(),
+                "counts": self._counts[rows, buckets].tolist(),
+                "bucket_count": len(BUCKET_VALUES)
+            }
+
+    @classmethod
+    def from_dict(cls, data: Dict, **kwargs) -> "LatencyHistograms":
+        """Rebuild a store saved with to_dict (kwargs as for the constructor)"""
+        if data.get("bucket_count") != len(BUCKET_VALUES):
+            raise ValueError("Latency histogram bucket layout changed")
+        histograms = cls(initial_rows=max(64, len(data["keys"])), **kwargs)
+        for key in data["keys"]:
+            histograms._row(*key)
+        histograms._counts[data["rows"], data["buckets"]] = data["counts"]
+        histograms._latest_hour = max((key[0] for key in data["keys"] if len(key[0]) > 10), default="")
+        return histograms
@@ -0,0 +1,148 @@
+# agents/analytics/sketches.py
+import base64
+import hashlib
+import heapq
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+def _hash64(value: str) -> int:
+    """Stable 64-bit hash (Python's hash() is salted per process)"""
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    """
+    Cardinality estimator with fixed memory: 2**precision one-byte registers.
+
+    The default precision of 12 uses 4 KB and has a standard error of ~1.6%.
+    Small cardinalities fall back to linear counting and are near-exact.
+    Sketches with the same precision merge by taking the register maximum.
+    """
+    def __init__(self, precision: int = 12):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, value: str) -> None:
+        """Add a value to the set"""
+        h = _hash64(value)
+        index = h >> (64 - self.precision)
+        remainder = (h << self.precision) & ((1 << 64) - 1)
+        # Position of the first set bit in the remaining bits
+        rank = 64 - self.precision + 1 if remainder == 0 else 64 - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self) -> int:
+        """Estimated number of distinct values added"""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """Fold another sketch (another worker or day) into this one"""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def to_dict(self) -> Dict:
+        """Compact representation for persistence"""
+        return {
+            "precision": self.precision,
+            "registers": base64.b64encode(self.registers.tobytes()).decode("ascii")
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "HyperLogLog":
+        """Rebuild a sketch saved with to_dict"""
+        sketch = cls(data["precision"])
+        sketch.registers = np.frombuffer(base64.b64decode(data["registers"]), dtype=np.uint8).copy()
+        return sketch
+
+
+class SpaceSaving:
+    """
+    Heavy-hitter (top-k) counter with fixed memory (Metwally et al.).
+
+    Tracks at most ``capacity`` items. When a new item arrives and the table
+    is full, it replaces the item with the smallest count and inherits that
+    count as its error bound, so counts are overestimates by at most
+    ``error``. Any item more frequent than total / capacity is guaranteed to
+    be tracked.
+
+    The smallest counter is found through a min-heap with one entry per
+    tracked item. Counts only grow, so an entry's count is a lower bound:
+    increments leave the heap alone, and an eviction re-pushes stale
+    entries until the top one is current, which keeps eviction at an
+    amortized O(log capacity).
+    """
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self.counters: Dict[str, List[int]] = {}  # item -> [count, error]
+        self._heap: List[Tuple[int, str]] = []  # (count when pushed, item)
+
+    def add(self, item: str, count: int = 1) -> None:
+        """Count an occurrence of an item"""
+        counter = self.counters.get(item)
+        if counter is not None:
+            counter[0] += count
+        elif len(self.counters) < self.capacity:
+            self.counters[item] = [count, 0]
+            heapq.heappush(self._heap, (count, item))
+        else:
+            floor, victim = heapq.heappop(self._heap)
+            while self.counters[victim][0] != floor:
+                floor, victim = heapq.heappushpop(self._heap, (self.counters[victim][0], victim))
+            del self.counters[victim]
+            self.counters[item] = [floor + count, floor]
+            heapq.heappush(self._heap, (floor + count, item))
+
+    def _rebuild_heap(self) -> None:
+        self._heap = [(counter[0], item) for item, counter in self.counters.items()]
+        heapq.heapify(self._heap)
+
+    def top(self, limit: int = 10) -> List[Tuple[str, int]]:
+        """
+        Most frequent items
+
+        Args:
+            limit: Maximum number of items to return
+
+        Returns:
+            List of (item, estimated count), most frequent first
+        """
+        ranked = sorted(self.counters.items(), key=lambda entry: entry[1][0], reverse=True)
+        return [(item, counter[0]) for item, counter in ranked[:limit]]
+
+    def merge(self, other: "SpaceSaving") -> None:
+        """Fold another summary into this one, keeping the top ``capacity`` items"""
+        merged: Dict[str, List[int]] = {}
+        for counters in (self.counters, other.counters):
+            for item, (count, error) in counters.items():
+                entry = merged.setdefault(item, [0, 0])
+                entry[0] += count
+                entry[1] += error
+        ranked = sorted(merged.items(), key=lambda entry: entry[1][0], reverse=True)
+        self.counters = dict(ranked[:self.capacity])
+        self._rebuild_heap()
+
+    def to_dict(self) -> Dict:
+        """Compact representation for persistence"""
+        return {
+            "capacity": self.capacity,
+            "items": [[item, count, error] for item, (count, error) in self.counters.items()]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SpaceSaving":
+        """Rebuild a summary saved with to_dict"""
+        sketch = cls(data["capacity"])
+        sketch.counters = {item: [count, error] for item, count, error in data["items"]}
+        sketch._rebuild_heap()
+        return sketch
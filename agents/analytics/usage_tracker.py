@@ -1,43 +1,370 @@
 # agents/analytics/usage_tracker.py
+import glob
 import json
 import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single worker is assumed
+    fcntl = None
+
+from agents.analytics.event_store import EventStore, encoded_sizes
+from agents.analytics.event_writer import BufferedEventWriter
+from agents.analytics.latency import LatencyHistograms
+from agents.analytics.sketches import HyperLogLog, SpaceSaving
+
+# Number of most recent queries kept in memory
+RECENT_QUERIES = 100
+
+# Number of distinct queries tracked by the heavy-hitter sketch
+POPULAR_QUERIES_CAPACITY = 1000
+
+# HyperLogLog precision for the global and per-day unique counts (4 KB / 1 KB)
+UNIQUE_PRECISION = 12
+DAILY_UNIQUE_PRECISION = 10
+
+# Seconds between saves of the latency histograms (they are also saved on close)
+LATENCY_SAVE_INTERVAL = float(os.getenv("ANALYTICS_LATENCY_SAVE_INTERVAL", 300))
+
+
+def _process_alive(pid: int) -> bool:
+    """Whether a process with this ID is running"""
+    if pid == os.getpid():
+        return True
+    if os.name == "nt":
+        # os.kill would terminate the process on Windows
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+def _add_sizes(total: Dict[str, int], sizes: Dict[str, int]) -> None:
+    for date, size in sizes.items():
+        total[date] = total.get(date, 0) + size
 
 
 class AnalyticsTracker:
     """
     Simple analytics tracker for monitoring queries to the portfolio assistant
+    
+    Queries are buffered in memory and appended to daily JSONL segments
+    (``queries_YYYY-MM-DD.jsonl``) by a background flusher. The full history
+    is never loaded: summaries come from running aggregates, and raw queries
+    are read from the EventStore one time window at a time.
+    
+    Each worker process saves the aggregates of the events it tracked to its
+    own snapshot (``summary.<pid>.json``, plus ``latency.<pid>.json``), which
+    records how many bytes of each segment it covers. On start, a worker takes
+    over the snapshots of workers that are gone, merging their sketches into
+    its own; reads merge in the snapshots of the workers still running. The
+    history is only replayed when the snapshots do not add up to the
+    segments (e.g. after a crash); a worker that replays while others are
+    running counts their events twice until the next restart.
     """
-    def __init__(self, storage_path: str = "./data/analytics"):
+    def __init__(
+        self,
+        storage_path: str = "./data/analytics",
+        flush_batch: int = 100,
+        flush_interval: float = 5.0,
+        latency_save_interval: float = LATENCY_SAVE_INTERVAL,
+        worker_id: Optional[int] = None
+    ):
         self.storage_path = storage_path
+        self._lock = threading.Lock()
+        
+        # Daily segments; migrates the legacy queries.json on first use
+        self.event_store = EventStore(storage_path)
         
-        # Create storage directory if it doesn't exist
-        os.makedirs(storage_path, exist_ok=True)
+        # Running aggregates, persisted as a small snapshot after every flush;
+        # the larger latency histograms are saved separately and less often
+        self.worker_id = worker_id if worker_id is not None else os.getpid()
+        self.summary_file = os.path.join(storage_path, f"summary.{self.worker_id}.json")
+        self.latency_file = os.path.join(storage_path, f"latency.{self.worker_id}.json")
+        self.lock_file = os.path.join(storage_path, "snapshots.lock")
+        self.latency_save_interval = latency_save_interval
+        self._latency_saved_at = time.monotonic()
+        # Bytes of each segment covered by this worker's aggregates
+        self._covered: Dict[str, int] = {}
+        self.latency = LatencyHistograms()
+        self.aggregates = self._load_aggregates()
         
-        # Create or load queries file
-        self.queries_file = os.path.join(storage_path, "queries.json")
-        self.queries = self._load_queries()
+        # Only the tail of the history is kept in memory
+        self.recent_queries = deque(self.event_store.read_recent(RECENT_QUERIES), maxlen=RECENT_QUERIES)
+        
+        # Events are written in batches; the snapshot is refreshed after each batch
+        self.writer = BufferedEventWriter(
+            self.event_store,
+            max_batch=flush_batch,
+            flush_interval=flush_interval,
+            on_flush=self._on_flush
+        )
+    
+    @staticmethod
+    def _empty_aggregates() -> Dict:
+        return {
+            "total_queries": 0,
+            "response_time_sum": 0.0,
+            "response_time_count": 0,
+            "popular_queries": SpaceSaving(POPULAR_QUERIES_CAPACITY),
+            "unique_queries": HyperLogLog(UNIQUE_PRECISION),
+            "unique_users": HyperLogLog(UNIQUE_PRECISION),
+            "days": {}
+        }
+    
+    @staticmethod
+    def _serialize_aggregates(aggregates: Dict) -> Dict:
+        """Turn the sketches into their compact JSON form"""
+        return {
+            **aggregates,
+            "popular_queries": aggregates["popular_queries"].to_dict(),
+            "unique_queries": aggregates["unique_queries"].to_dict(),
+            "unique_users": aggregates["unique_users"].to_dict(),
+            "days": {
+                date: {**day, "unique_users": day["unique_users"].to_dict()}
+                for date, day in aggregates["days"].items()
+            }
+        }
+    
+    @staticmethod
+    def _deserialize_aggregates(data: Dict) -> Dict:
+        """Rebuild the sketches of a saved snapshot"""
+        return {
+            **data,
+            "popular_queries": SpaceSaving.from_dict(data["popular_queries"]),
+            "unique_queries": HyperLogLog.from_dict(data["unique_queries"]),
+            "unique_users": HyperLogLog.from_dict(data["unique_users"]),
+            "days": {
+                date: {**day, "unique_users": HyperLogLog.from_dict(day["unique_users"])}
+                for date, day in data["days"].items()
+            }
+        }
     
-    def _load_queries(self) -> List[Dict]:
-        """Load existing queries from file"""
-        if os.path.exists(self.queries_file):
+    def _update_aggregates(self, query_record: Dict) -> None:
+        """Fold a single query record into the running aggregates"""
+        aggregates = self.aggregates
+        aggregates["total_queries"] += 1
+        query = query_record["query"].lower()
+        aggregates["popular_queries"].add(query)
+        aggregates["unique_queries"].add(query)
+        aggregates["unique_users"].add(query_record["user_id"])
+        
+        day = aggregates["days"].get(query_record["date"])
+        if day is None:
+            day = aggregates["days"][query_record["date"]] = {
+                "total_queries": 0,
+                "response_time_sum": 0.0,
+                "response_time_count": 0,
+                "unique_users": HyperLogLog(DAILY_UNIQUE_PRECISION)
+            }
+        day["total_queries"] += 1
+        day["unique_users"].add(query_record["user_id"])
+        
+        response_time = query_record.get("response_time")
+        if response_time is not None:
+            aggregates["response_time_sum"] += response_time
+            aggregates["response_time_count"] += 1
+            day["response_time_sum"] += response_time
+            day["response_time_count"] += 1
+            self.latency.record(
+                query_record["timestamp"],
+                response_time,
+                agent=query_record.get("agent_used"),
+                crew=query_record.get("crew")
+            )
+    
+    def _merge_aggregates(self, aggregates: Dict, other: Dict) -> None:
+        """Fold the aggregates of another worker into these"""
+        for key in ("total_queries", "response_time_sum", "response_time_count"):
+            aggregates[key] += other[key]
+        for key in ("popular_queries", "unique_queries", "unique_users"):
+            aggregates[key].merge(other[key])
+        for date, other_day in other["days"].items():
+            day = aggregates["days"].get(date)
+            if day is None:
+                aggregates["days"][date] = {**other_day, "unique_users": HyperLogLog.from_dict(other_day["unique_users"].to_dict())}
+                continue
+            for key in ("total_queries", "response_time_sum", "response_time_count"):
+                day[key] += other_day[key]
+            day["unique_users"].merge(other_day["unique_users"])
+    
+    @contextmanager
+    def _snapshots_locked(self, exclusive: bool = True):
+        """Serialize snapshot takeovers between worker processes"""
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_file, 'a') as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+    
+    def _list_snapshots(self) -> List[Tuple[Optional[int], str, str]]:
+        """(worker id, summary file, latency file) of every saved snapshot, own included"""
+        snapshots = []
+        for summary_file in glob.glob(os.path.join(self.storage_path, "summary.*.json")):
+            worker = os.path.basename(summary_file)[len("summary."):-len(".json")]
+            if worker.isdigit():
+                snapshots.append((int(worker), summary_file, os.path.join(self.storage_path, f"latency.{worker}.json")))
+        # Single-file snapshot written before snapshots were per worker
+        legacy = os.path.join(self.storage_path, "summary.json")
+        if os.path.exists(legacy):
+            snapshots.append((None, legacy, os.path.join(self.storage_path, "latency.json")))
+        return snapshots
+    
+    @staticmethod
+    def _read_snapshot(summary_file: str, latency_file: str) -> Optional[Tuple[Dict, Dict]]:
+        """Summary and latency snapshot of one worker, or None if missing or unreadable"""
+        try:
+            with open(summary_file, 'r') as f:
+                summary = json.load(f)
+            with open(latency_file, 'r') as f:
+                latency = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error loading analytics summary: {str(e)}")
+            return None
+        return summary, latency
+    
+    def _load_aggregates(self) -> Dict:
+        """
+        Take over the snapshots of finished workers, rebuilding from the
+        segments when the snapshots do not cover them exactly
+        """
+        with self._snapshots_locked():
+            claimed, covered, consistent = [], {}, True
+            for worker, summary_file, latency_file in self._list_snapshots():
+                snapshot = self._read_snapshot(summary_file, latency_file)
+                if snapshot is None:
+                    consistent = False
+                    continue
+                summary, latency = snapshot
+                summary_covered = summary.get("covered", summary.get("segments"))
+                _add_sizes(covered, summary_covered or {})
+                if worker is not None and worker != self.worker_id and _process_alive(worker):
+                    continue
+                # A finished worker's two files must describe the same events
+                if latency.get("covered", latency.get("segments")) != summary_covered:
+                    consistent = False
+                claimed.append((summary_file, latency_file, summary, latency))
+            
+            segments = {date: size for date, size in self.event_store.get_segment_sizes().items() if size}
+            consistent = consistent and {date: size for date, size in covered.items() if size} == segments
+            
+            self.latency = LatencyHistograms()
+            self.aggregates = self._empty_aggregates()
+            self._covered = {}
             try:
-                with open(self.queries_file, 'r') as f:
-                    return json.load(f)
+                if consistent:
+                    for _, _, summary, latency in claimed:
+                        self._merge_aggregates(self.aggregates, self._deserialize_aggregates(summary))
+                        self.latency.merge(LatencyHistograms.from_dict(latency["histograms"]))
+                        _add_sizes(self._covered, summary.get("covered", summary.get("segments")))
             except Exception as e:
-                print(f"Error loading queries: {str(e)}")
+                print(f"Error loading analytics summary: {str(e)}")
+                consistent = False
+            
+            if not consistent:
+                # Rebuild by streaming the segments once
+                self.latency = LatencyHistograms()
+                self.aggregates = self._empty_aggregates()
+                for query_record in self.event_store.iter_events():
+                    self._update_aggregates(query_record)
+                self._covered = dict(segments)
+            
+            # Save the merged snapshot before removing the ones it replaces
+            if self._save_aggregates(with_latency=True):
+                for summary_file, latency_file, _, _ in claimed:
+                    for path in (summary_file, latency_file):
+                        if path not in (self.summary_file, self.latency_file) and os.path.exists(path):
+                            os.remove(path)
+        return self.aggregates
+    
+    def _combined(self, with_latency: bool = False) -> Tuple[Dict, Optional[LatencyHistograms]]:
+        """
+        This worker's aggregates merged with the snapshots of the other workers
         
-        return []
+        Returns:
+            (aggregates, latency histograms or None); this worker's own
+            objects when it is the only one
+        """
+        with self._snapshots_locked(exclusive=False):
+            others = [
+                self._read_snapshot(summary_file, latency_file)
+                for worker, summary_file, latency_file in self._list_snapshots()
+                if worker != self.worker_id
+            ]
+        others = [snapshot for snapshot in others if snapshot is not None]
+        if not others:
+            return self.aggregates, self.latency if with_latency else None
+        
+        with self._lock:
+            aggregates = self._deserialize_aggregates(self._serialize_aggregates(self.aggregates))
+        latency = None
+        if with_latency:
+            latency = LatencyHistograms()
+            latency.merge(self.latency)
+        for summary, other_latency in others:
+            self._merge_aggregates(aggregates, self._deserialize_aggregates(summary))
+            if latency is not None:
+                latency.merge(LatencyHistograms.from_dict(other_latency["histograms"]))
+        return aggregates, latency
+    
+    def _on_flush(self, events: List[Dict]) -> None:
+        """Account for written events, then refresh the snapshot"""
+        with self._lock:
+            _add_sizes(self._covered, encoded_sizes(events))
+        self._save_aggregates(
+            with_latency=time.monotonic() - self._latency_saved_at >= self.latency_save_interval
+        )
+    
+    @staticmethod
+    def _write_json(path: str, data: Dict) -> None:
+        tmp_file = f"{path}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_file, path)
     
-    def _save_queries(self) -> bool:
-        """Save queries to file"""
+    def _save_aggregates(self, with_latency: bool = False) -> bool:
+        """
+        Save the aggregate snapshot atomically
+        
+        Args:
+            with_latency: Also save the latency histograms
+        
+        Returns:
+            bool: True if successful
+        """
+        # The serialized sketches and day dicts are fresh objects, so the
+        # tracker lock is only held while they are built
+        with self._lock:
+            snapshot = self._serialize_aggregates(self.aggregates)
+            snapshot["covered"] = dict(self._covered)
+        if with_latency:
+            latency = {"histograms": self.latency.to_dict(), "covered": snapshot["covered"]}
+        
         try:
-            with open(self.queries_file, 'w') as f:
-                json.dump(self.queries, f, indent=2)
+            if with_latency:
+                self._write_json(self.latency_file, latency)
+                self._latency_saved_at = time.monotonic()
+            self._write_json(self.summary_file, snapshot)
             return True
         except Exception as e:
-            print(f"Error saving queries: {str(e)}")
+            print(f"Error saving analytics summary: {str(e)}")
             return False
     
     def track_query(
@@ -45,7 +372,9 @@ class AnalyticsTracker:
         query: str, 
         user_id: Optional[str] = None,
         conversation_id: Optional[str] = None,
-        response_time: Optional[float] = None
+        response_time: Optional[float] = None,
+        agent_used: Optional[str] = None,
+        crew: Optional[str] = None
     ) -> bool:
         """
         Track a query for analytics
@@ -55,6 +384,8 @@ class AnalyticsTracker:
             user_id: Optional user identifier
             conversation_id: Optional conversation identifier
             response_time: Optional time taken to process the query
+            agent_used: Optional name of the agent that answered
+            crew: Optional crew kind ("portfolio", "project" or "cache")
             
         Returns:
             bool: True if successful
@@ -67,36 +398,34 @@ class AnalyticsTracker:
             "timestamp": datetime.now().isoformat(),
             "date": datetime.now().strftime("%Y-%m-%d"),
             "time": datetime.now().strftime("%H:%M:%S"),
-            "response_time": response_time
+            "response_time": response_time,
+            "agent_used": agent_used,
+            "crew": crew
         }
         
-        # Add to queries list
-        self.queries.append(query_record)
-        
-        # Save to file
-        self._save_queries()
-        
-        # Also save to daily file for better organization
-        daily_file = os.path.join(
-            self.storage_path, 
-            f"queries_{datetime.now().strftime('%Y-%m-%d')}.json"
-        )
+        with self._lock:
+            self.recent_queries.append(query_record)
+            self._update_aggregates(query_record)
         
-        try:
-            daily_queries = []
-            if os.path.exists(daily_file):
-                with open(daily_file, 'r') as f:
-                    daily_queries = json.load(f)
-            
-            daily_queries.append(query_record)
-            
-            with open(daily_file, 'w') as f:
-                json.dump(daily_queries, f, indent=2)
-        except Exception as e:
-            print(f"Error saving to daily file: {str(e)}")
+        # Buffer for the background writer (daily JSONL segment)
+        self.writer.add(query_record)
         
         return True
     
+    def flush(self) -> int:
+        """
+        Write buffered queries to disk now
+        
+        Returns:
+            Number of queries written
+        """
+        return self.writer.flush()
+    
+    def close(self) -> None:
+        """Flush buffered queries, stop the background writer and save the snapshots"""
+        self.writer.close()
+        self._save_aggregates(with_latency=True)
+    
     def get_recent_queries(self, limit: int = 10) -> List[Dict]:
         """
         Get recent queries
@@ -107,11 +436,39 @@ class AnalyticsTracker:
         Returns:
             List of query dictionaries
         """
-        return self.queries[-limit:] if self.queries else []
+        if limit <= len(self.recent_queries):
+            return list(self.recent_queries)[-limit:]
+        
+        # Older than the in-memory tail: read backwards from the segments
+        self.flush()
+        return self.event_store.read_recent(limit)
+    
+    def get_queries(
+        self,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Get the queries of a time window, reading only the segments it covers
+        
+        Args:
+            start: Inclusive ISO date or datetime (None for no lower bound)
+            end: Exclusive ISO date or datetime (None for no upper bound)
+            limit: Maximum number of (most recent) queries to return
+            
+        Returns:
+            List of query dictionaries, oldest first
+        """
+        self.flush()
+        return self.event_store.read_window(start, end, limit)
     
     def get_popular_queries(self, limit: int = 10) -> List[Dict]:
         """
-        Get most popular queries (naive implementation)
+        Get most popular queries
+        
+        Counts come from a fixed-size heavy-hitter sketch and may overestimate
+        rare queries; the most frequent ones are always reported.
         
         Args:
             limit: Maximum number of results to return
@@ -119,25 +476,13 @@ class AnalyticsTracker:
         Returns:
             List of dictionaries with query and count
         """
-        query_counts = {}
-        for query_record in self.queries:
-            query = query_record["query"].lower()
-            if query in query_counts:
-                query_counts[query] += 1
-            else:
-                query_counts[query] = 1
-        
-        # Sort by count
-        sorted_queries = sorted(
-            query_counts.items(), 
-            key=lambda x: x[1], 
-            reverse=True
-        )
+        aggregates, _ = self._combined()
+        with self._lock:
+            top_queries = aggregates["popular_queries"].top(limit)
         
-        # Format results
         return [
             {"query": query, "count": count} 
-            for query, count in sorted_queries[:limit]
+            for query, count in top_queries
         ]
     
     def get_analytics_summary(self) -> Dict:
@@ -147,39 +492,65 @@ class AnalyticsTracker:
         Returns:
             Dictionary with analytics summary
         """
-        if not self.queries:
-            return {
-                "total_queries": 0,
-                "unique_queries": 0,
-                "unique_users": 0,
-                "avg_response_time": 0,
-                "recent_queries": []
-            }
-        
-        # Calculate stats
-        total_queries = len(self.queries)
-        unique_queries = len(set(q["query"].lower() for q in self.queries))
-        unique_users = len(set(q["user_id"] for q in self.queries))
+        aggregates, _ = self._combined()
         
         # Calculate average response time
-        response_times = [
-            q["response_time"] 
-            for q in self.queries 
-            if q.get("response_time") is not None
-        ]
-        
         avg_response_time = (
-            sum(response_times) / len(response_times) 
-            if response_times else 0
+            aggregates["response_time_sum"] / aggregates["response_time_count"]
+            if aggregates["response_time_count"] else 0
         )
         
-        # Get recent queries
-        recent_queries = self.get_recent_queries(5)
-        
         return {
-            "total_queries": total_queries,
-            "unique_queries": unique_queries,
-            "unique_users": unique_users,
+            "total_queries": aggregates["total_queries"],
+            "unique_queries": aggregates["unique_queries"].count(),
+            "unique_users": aggregates["unique_users"].count(),
             "avg_response_time": avg_response_time,
-            "recent_queries": recent_queries
-        }
\ No newline at end of file
+            "recent_queries": self.get_recent_queries(5)
+        }
+    
+    def get_daily_summary(self, days: int = 7) -> List[Dict]:
+        """
+        Get per-day query counts, unique users and average response times
+        
+        Args:
+            days: Number of most recent days to return
+            
+        Returns:
+            List of dictionaries, most recent day first
+        """
+        aggregates, _ = self._combined()
+        daily = []
+        for date in sorted(aggregates["days"], reverse=True)[:days]:
+            day = aggregates["days"][date]
+            daily.append({
+                "date": date,
+                "total_queries": day["total_queries"],
+                "unique_users": day["unique_users"].count(),
+                "avg_response_time": (
+                    day["response_time_sum"] / day["response_time_count"]
+                    if day["response_time_count"] else 0
+                )
+            })
+        return daily
+    
+    def get_latency_percentiles(
+        self,
+        granularity: str = "hour",
+        group_by: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Get p50/p90/p99 response times per hour or day
+        
+        Args:
+            granularity: "hour" or "day"
+            group_by: "agent", "crew" or None
+            start: Inclusive ISO date or datetime
+            end: Exclusive ISO date or datetime
+            
+        Returns:
+            List of dictionaries with period, group, count, p50, p90 and p99
+        """
+        _, latency = self._combined(with_latency=True)
+        return latency.get_percentiles(granularity, group_by, start, end)
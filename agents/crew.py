@@ -1,14 +1,23 @@
 # agents/crew.py
+import os
+import queue
+import re
+import threading
+from contextlib import contextmanager
+
 from crewai import Crew, Process
 from dotenv import load_dotenv
 
 from agents.agents_list import interface_agent, knowledge_agent, project_agent
 from agents.llm import get_llm
+from agents.retrieval import retrieve_portfolio_context
+from agents.router import get_router
 from agents.tasks import (
     create_portfolio_inquiry_task,
     create_project_inquiry_task,
     create_routing_task,
 )
+from memory.context_builder import build_history_context
 
 # Load environment variables
 load_dotenv()
@@ -16,66 +25,270 @@ load_dotenv()
 # Get LLM configuration for the crew manager
 manager_llm_config = get_llm("openai")  # Use OpenAI for manager (more reliable)
 
-def get_portfolio_crew(question, conversation_history=None):
-    """Create and configure a crew to handle portfolio inquiries"""
+# Crew logging is costly on the hot path; enable it for debugging
+CREW_VERBOSE = os.getenv("CREW_VERBOSE", "false").lower() in ("1", "true", "yes")
+
+# Prebuilt crews kept per template
+CREW_POOL_SIZE = int(os.getenv("CREW_POOL_SIZE", 4))
+
+# CrewAI's {placeholder} syntax (see crewai.utilities.string_utils)
+PLACEHOLDER_PATTERN = re.compile(r"\{([A-Za-z_][A-Za-z0-9_\-]*)}")
+
+def bind_inputs(template, inputs):
+    """
+    Fill the {placeholders} of a task template in a single pass
     
-    # Add conversation context if available
-    if conversation_history:
-        # Format the conversation history into a summary
-        history_summary = "\n\nPrevious conversation:\n"
-        for msg in conversation_history[-3:]:  # Last 3 messages
-            role = "User" if msg["role"] == "user" else "Assistant"
-            history_summary += f"{role}: {msg['content']}\n\n"
+    CrewAI substitutes inputs one after another, so a placeholder inside a
+    value (e.g. a question containing "{context}") would be expanded by a
+    later substitution. Here values are inserted verbatim.
+    
+    Args:
+        template: Task text with {placeholders}
+        inputs: Values by placeholder name
         
-        # Append to the question
-        question = f"{history_summary}\nCurrent question: {question}"
+    Returns:
+        The text with known placeholders replaced
+    """
+    return PLACEHOLDER_PATTERN.sub(
+        lambda match: str(inputs[match.group(1)]) if match.group(1) in inputs else match.group(0),
+        template
+    )
+
+def format_history(conversation_history, conversation_summary=None):
+    """Format the conversation summary plus the recent messages that fit in the history token budget ("" if none)"""
+    return build_history_context(
+        conversation_history or [],
+        header="\n\nPrevious conversation:\n",
+        summary=conversation_summary
+    )
+
+def build_portfolio_crew():
+    """Build the portfolio crew for questions the local router sent to the Knowledge Expert"""
+    # Agents keep per-run state, so each pooled crew gets its own copies
+    knowledge = knowledge_agent.copy()
+    
+    # Create a knowledge task
+    knowledge_task = create_portfolio_inquiry_task("{question}", knowledge, "{context}")
+    
+    return Crew(
+        agents=[knowledge],
+        tasks=[knowledge_task],
+        process=Process.sequential,
+        verbose=CREW_VERBOSE,
+    )
+
+def build_portfolio_projects_crew():
+    """Build the crew for general project questions the local router sent to the Project Specialist"""
+    project = project_agent.copy()
+    
+    projects_task = create_portfolio_inquiry_task("{question}", project, "{context}")
+    
+    return Crew(
+        agents=[project],
+        tasks=[projects_task],
+        process=Process.sequential,
+        verbose=CREW_VERBOSE,
+    )
+
+def build_routed_portfolio_crew():
+    """Build the portfolio crew with an LLM routing task, used when the local router is unsure"""
+    interface, knowledge, project = interface_agent.copy(), knowledge_agent.copy(), project_agent.copy()
     
     # Create a routing task
-    routing_task = create_routing_task(question, interface_agent)
+    routing_task = create_routing_task("{question}", interface)
     
     # Create a knowledge task
-    knowledge_task = create_portfolio_inquiry_task(question, knowledge_agent)
+    knowledge_task = create_portfolio_inquiry_task("{question}", knowledge, "{context}")
     
     # Create the crew
-    portfolio_crew = Crew(
-        agents=[interface_agent, knowledge_agent, project_agent],
+    return Crew(
+        agents=[interface, knowledge, project],
         tasks=[routing_task, knowledge_task],
         process=Process.sequential,
-        verbose=True,
+        verbose=CREW_VERBOSE,
     )
-    
-    return portfolio_crew
 
-def get_project_crew(project_name, question, conversation_history=None):
-    """Create and configure a crew to handle project-specific inquiries"""
-    
-    # Add conversation context if available
-    if conversation_history:
-        # Format the conversation history into a summary
-        history_summary = "\n\nPrevious conversation:\n"
-        for msg in conversation_history[-3:]:  # Last 3 messages
-            role = "User" if msg["role"] == "user" else "Assistant"
-            history_summary += f"{role}: {msg['content']}\n\n"
-        
-        # Append to the question
-        question = f"{history_summary}\nCurrent question about {project_name}: {question}"
+def build_project_crew():
+    """Build the project crew structure; per-request values are {placeholders}"""
+    # Agents keep per-run state, so each pooled crew gets its own copies
+    project, knowledge = project_agent.copy(), knowledge_agent.copy()
     
     # Create a project task
-    project_task = create_project_inquiry_task(project_name, question, project_agent)
+    project_task = create_project_inquiry_task("{project_name}", "{question}", project, "{context}")
     
     # Create the crew
-    project_crew = Crew(
-        agents=[project_agent, knowledge_agent],
+    return Crew(
+        agents=[project, knowledge],
         tasks=[project_task],
         process=Process.sequential,
-        verbose=True,
+        verbose=CREW_VERBOSE,
     )
+
+def get_portfolio_inputs(question, conversation_history=None, conversation_summary=None):
+    """Per-request inputs for the portfolio crew template"""
+    # Only the sections relevant to the question go into the prompt
+    context = retrieve_portfolio_context(question)
+    
+    # Add conversation context if available
+    history = format_history(conversation_history, conversation_summary)
+    if history:
+        question = f"{history}\nCurrent question: {question}"
+    
+    return {"question": question, "context": context}
+
+def get_project_inputs(project_name, question, conversation_history=None, conversation_summary=None):
+    """Per-request inputs for the project crew template"""
+    # Only the sections relevant to the question go into the prompt
+    context = retrieve_portfolio_context(question, project_name=project_name)
+    
+    # Add conversation context if available
+    history = format_history(conversation_history, conversation_summary)
+    if history:
+        question = f"{history}\nCurrent question about {project_name}: {question}"
+    
+    return {"project_name": project_name, "question": question, "context": context}
+
+class CrewTemplate:
+    """
+    A pool of identical, prebuilt crews whose tasks contain {placeholders}.
+    
+    Each request checks out a crew for its exclusive use, binds its inputs
+    into the original task text (see bind_inputs; user text never goes
+    through CrewAI's own interpolation), kicks it off and returns it. Crews
+    are only built when the pool is empty, so Task/Crew construction and
+    validation stay off the hot path.
+    """
+    def __init__(self, name, build, pool_size=CREW_POOL_SIZE):
+        self.name = name
+        self.build = build
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self._lock = threading.Lock()
+        self._stats = {"built": 0, "checkouts": 0}
+    
+    def warm(self):
+        """Fill the pool ahead of the first requests"""
+        while not self._pool.full():
+            try:
+                self._pool.put_nowait(self._build())
+            except queue.Full:
+                break
+    
+    def _build(self):
+        crew = self.build()
+        with self._lock:
+            self._stats["built"] += 1
+        return crew
+    
+    @contextmanager
+    def checkout(self):
+        """Borrow a crew for the duration of one request"""
+        try:
+            crew = self._pool.get_nowait()
+        except queue.Empty:
+            crew = self._build()
+        with self._lock:
+            self._stats["checkouts"] += 1
+        try:
+            yield crew
+        finally:
+            crew.step_callback = None
+            crew.task_callback = None
+            try:
+                self._pool.put_nowait(crew)
+            except queue.Full:
+                pass
     
-    return project_crew
+    @staticmethod
+    def _bind(crew, inputs):
+        """Rewrite the crew's task texts from their templates with this request's inputs"""
+        for task in crew.tasks:
+            if task._original_description is None:
+                task._original_description = task.description
+            if task._original_expected_output is None:
+                task._original_expected_output = task.expected_output
+            task.description = bind_inputs(task._original_description, inputs)
+            task.expected_output = bind_inputs(task._original_expected_output, inputs)
+    
+    def kickoff(self, inputs, step_callback=None, task_callback=None):
+        """Run a pooled crew with per-request inputs and optional callbacks"""
+        with self.checkout() as crew:
+            crew.step_callback = step_callback
+            crew.task_callback = task_callback
+            self._bind(crew, inputs)
+            # No inputs: CrewAI would re-interpolate placeholders found in the values
+            return crew.kickoff()
+    
+    def get_stats(self):
+        """Pool size and build/checkout counters"""
+        with self._lock:
+            return {"name": self.name, "pooled": self._pool.qsize(), **self._stats}
+
+# Crew template registry
+CREW_TEMPLATES = {
+    "portfolio": CrewTemplate("portfolio", build_portfolio_crew),
+    "portfolio_projects": CrewTemplate("portfolio_projects", build_portfolio_projects_crew),
+    "routed": CrewTemplate("routed", build_routed_portfolio_crew),
+    "project": CrewTemplate("project", build_project_crew),
+}
+
+def select_template(project_name=None, route=None):
+    """
+    Pick the crew template for a question
+    
+    Args:
+        project_name: Project the question is about, if known
+        route: Local router decision (see agents.router.QueryRouter.route)
+        
+    Returns:
+        Name of a template in CREW_TEMPLATES
+    """
+    if project_name:
+        return "project"
+    if route is None or not route["confident"]:
+        # Let the interface agent route it
+        return "routed"
+    return "portfolio_projects" if route["route"] == "project" else "portfolio"
+
+def warm_crew_templates():
+    """Prebuild the crews of every template (called at startup)"""
+    for template in CREW_TEMPLATES.values():
+        template.warm()
+
+def history_affects_prompt(conversation_history, conversation_summary=None):
+    """Whether the crews would include this conversation history in the prompt"""
+    return bool(format_history(conversation_history, conversation_summary))
+
+def get_response_text(response):
+    """Extract the answer text from a CrewOutput"""
+    if hasattr(response, 'raw'):
+        return response.raw  # Get the raw string from CrewOutput
+    elif hasattr(response, '__str__'):
+        return str(response)  # Fallback to string representation
+    return "Unable to process response format"
+
+def run_crew_query(question, conversation_history=None, project_name=None,
+                   step_callback=None, task_callback=None, route=None, conversation_summary=None):
+    """
+    Run the right crew template for a question and return the answer text.
+
+    This is a module-level function so it can be shipped to a worker
+    process by the crew executor. The optional callbacks are attached to
+    the crew to observe agent steps and finished tasks while it runs. The
+    route is the local router's decision; it is computed here if not given.
+    The conversation summary stands in for the history's older turns.
+    """
+    if project_name:
+        inputs = get_project_inputs(project_name, question, conversation_history, conversation_summary)
+    else:
+        route = route or get_router().route(question)
+        inputs = get_portfolio_inputs(question, conversation_history, conversation_summary)
+
+    template = CREW_TEMPLATES[select_template(project_name, route)]
+    response = template.kickoff(inputs, step_callback=step_callback, task_callback=task_callback)
+    return get_response_text(response)
 
 # Example usage
 if __name__ == "__main__":
     # Test with a simple question
-    crew = get_portfolio_crew("What skills do you have in AI development?")
-    response = crew.kickoff()
+    response = run_crew_query("What skills do you have in AI development?")
     print(response)
\ No newline at end of file
@@ -0,0 +1,197 @@
+# agents/direct_answers.py
+import os
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from knowledge.portfolio_data import PORTFOLIO_INFO
+from memory.bm25 import tokenize
+from memory.vector_store import STOP_WORDS
+
+# Agent label reported for answers served without a crew
+DIRECT_ANSWER_AGENT = "Direct Answer Engine"
+
+# Share of the question an intent must explain to be answered directly
+DIRECT_ANSWER_THRESHOLD = float(os.getenv("DIRECT_ANSWER_THRESHOLD", 0.8))
+
+# Words any intent may leave unexplained without lowering its confidence
+GENERIC_WORDS = {
+    "did", "list", "give", "share", "show", "get", "him", "she", "they", "all", "any",
+    "some", "main", "ospina", "kind", "kinds", "type", "types", "ve", "re", "been",
+}
+
+CONTACT_FIELDS = {
+    "email": {"email", "mail", "e"},
+    "phone": {"phone", "number", "call", "cell", "mobile", "telephone"},
+    "linkedin": {"linkedin"},
+    "website": {"website", "site", "web", "url", "portfolio"},
+}
+CONTACT_WORDS = {"contact", "reach", "details", "info", "information", "address", "get", "touch"}
+
+LOCATION_WORDS = {"live", "lives", "located", "based", "location", "city", "country"}
+
+SKILL_CATEGORIES = {
+    "databases": {"database", "databases", "db", "dbs"},
+    "programming_languages": {"programming", "languages", "language"},
+    "frameworks": {"framework", "frameworks"},
+    "cloud_services": {"cloud"},
+    "devops": {"devops"},
+    "ai_ml": {"ai", "ml", "machine", "learning"},
+    "ar_vr": {"ar", "vr", "augmented", "virtual", "reality"},
+    "automation": {"automation"},
+    "soft_skills": {"soft"},
+}
+SKILL_LABELS = {
+    "databases": "Databases",
+    "programming_languages": "Programming Languages",
+    "frameworks": "Frameworks",
+    "cloud_services": "Cloud Services",
+    "devops": "DevOps",
+    "ai_ml": "AI/ML",
+    "ar_vr": "AR/VR",
+    "automation": "Automation",
+    "soft_skills": "Soft Skills",
+}
+SKILL_WORDS = {
+    "skills", "skill", "tools", "tool", "technologies", "technology", "tech", "stack",
+    "experience", "experienced", "familiar", "proficient", "services", "platforms",
+}
+# Verbs that only make a question factual when it asks for a list ("which
+# databases do you know?"), not in "how do you use AI in your work?"
+SKILL_VERBS = {"know", "knows", "use", "uses", "used", "work", "works", "worked"}
+LIST_QUESTION_WORDS = {"what", "which", "whats"}
+
+WORK_WORDS = {"work", "worked", "working", "works", "job", "jobs", "employed", "company", "companies", "employer"}
+WORK_TIME_WORDS = {"year", "during", "currently", "current", "now", "present", "today"}
+YEAR_PATTERN = re.compile(r"^(19|20)\d{2}$")
+
+
+def _join(items: List[str]) -> str:
+    """Join items as readable prose: "a, b and c" """
+    if len(items) <= 1:
+        return "".join(items)
+    return f"{', '.join(items[:-1])} and {items[-1]}"
+
+def _duration_years(duration: str):
+    """First and last year of a "Jul 2023 - Present" style duration"""
+    years = [int(year) for year in re.findall(r"\d{4}", duration)]
+    if not years:
+        return None, None
+    end = datetime.now().year if "present" in duration.lower() else years[-1]
+    return years[0], end
+
+
+class DirectAnswerEngine:
+    """
+    Answer simple factual questions straight from PORTFOLIO_INFO.
+
+    Each intent has trigger words and a vocabulary. An intent matches when
+    the question contains a trigger, and its confidence is the share of
+    the question's content words the intent explains, so "what's your
+    email?" matches while "how would you email a client about a delay?"
+    goes to the crew.
+    """
+    def __init__(self, info: Optional[Dict] = None, threshold: float = DIRECT_ANSWER_THRESHOLD):
+        self.info = info or PORTFOLIO_INFO
+        self.threshold = threshold
+        self.name = self.info["personal"]["name"].split()[0]
+
+    def answer(self, question: str) -> Optional[Dict]:
+        """
+        Answer a question if an intent matches with high confidence
+
+        Args:
+            question: The user's question
+
+        Returns:
+            Dictionary with "intent", "answer" and "confidence", or None
+            when the question should go to the crew
+        """
+        tokens = [token for token in tokenize(question, STOP_WORDS) if token not in GENERIC_WORDS]
+        if not tokens:
+            return None
+        # Intents see every word, question words included
+        words = set(tokenize(question))
+
+        best = None
+        for intent, handler in (
+            ("contact", self._contact),
+            ("location", self._location),
+            ("skills", self._skills),
+            ("work_history", self._work_history),
+        ):
+            match = handler(words)
+            if not match:
+                continue
+            answer, vocabulary = match
+            explained = sum(1 for token in tokens if token in vocabulary or YEAR_PATTERN.match(token))
+            confidence = explained / len(tokens)
+            if best is None or confidence > best["confidence"]:
+                best = {"intent": intent, "answer": answer, "confidence": round(confidence, 3)}
+
+        if best and best["confidence"] >= self.threshold:
+            return best
+        return None
+
+    def _contact(self, words):
+        contact = self.info["personal"]["contact"]
+        fields = [field for field, triggers in CONTACT_FIELDS.items() if words & triggers]
+        if not fields and not words & CONTACT_WORDS:
+            return None
+        labels = {"email": "Email", "phone": "Phone", "linkedin": "LinkedIn", "website": "Website"}
+        lines = [f"{labels[field]}: {contact[field]}" for field in fields or labels]
+        vocabulary = CONTACT_WORDS.union(*CONTACT_FIELDS.values())
+        return f"You can reach {self.name} here:\n" + "\n".join(lines), vocabulary
+
+    def _location(self, words):
+        if not words & LOCATION_WORDS:
+            return None
+        return f"{self.name} is based in {self.info['personal']['location']}.", LOCATION_WORDS
+
+    def _skills(self, words):
+        categories = [category for category, triggers in SKILL_CATEGORIES.items() if words & triggers]
+        if not categories:
+            return None
+        skills = self.info["skills"]
+        lines = [
+            f"{SKILL_LABELS[category]}: {_join(skills[category])}"
+            for category in categories if skills.get(category)
+        ]
+        if not lines:
+            return None
+        vocabulary = SKILL_WORDS.union(*(SKILL_CATEGORIES[category] for category in categories))
+        if words & (LIST_QUESTION_WORDS | SKILL_WORDS):
+            vocabulary |= SKILL_VERBS
+        return f"{self.name} works with:\n" + "\n".join(lines), vocabulary
+
+    def _work_history(self, words):
+        if not words & WORK_WORDS:
+            return None
+        years = sorted(int(word) for word in words if YEAR_PATTERN.match(word))
+        current = bool(words & {"currently", "current", "now", "present", "today"})
+        if not years and not current:
+            return None
+        year = years[0] if years else datetime.now().year
+
+        jobs = []
+        for job in self.info["experience"]:
+            first, last = _duration_years(job["duration"])
+            if first is not None and first <= year <= last:
+                jobs.append(f"{job['role']} at {job['company']} ({job['location']}, {job['duration']})")
+
+        if current and not years:
+            when, verb = "Currently", "works"
+        else:
+            when, verb = f"In {year}", "worked"
+        if not jobs:
+            answer = f"{self.name}'s portfolio lists no job in {year}."
+        else:
+            answer = f"{when}, {self.name} {verb} as:\n" + "\n".join(f"- {job}" for job in jobs)
+        return answer, WORK_WORDS | WORK_TIME_WORDS
+
+
+@lru_cache(maxsize=1)
+def get_direct_answer_engine() -> DirectAnswerEngine:
+    """Process-wide direct answer engine over PORTFOLIO_INFO"""
+    return DirectAnswerEngine()
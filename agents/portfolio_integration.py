@@ -1,109 +1,102 @@
 # agents/portfolio_integration.py
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+from knowledge.chunking import chunk_portfolio
 from knowledge.portfolio_data import PORTFOLIO_INFO
+from knowledge.rendering import join_portfolio_records, render_portfolio_records
+from knowledge.versioning import get_portfolio_version
 
+# Directory holding compiled prompt artifacts, one file per portfolio version
+PROMPT_CACHE_PATH = os.getenv("PROMPT_CACHE_PATH", "./data/prompts")
 
-def format_portfolio_data():
-    """
-    Format the portfolio data into a format that's optimal for LLM context
+# Revision of the compiled artifact layout; artifacts with another revision are rebuilt
+ARTIFACT_FORMAT = 2
+
+def compile_portfolio(info: Dict, version: str) -> Dict:
     """
-    formatted_data = ""
-    
-    # Personal Information
-    personal = PORTFOLIO_INFO["personal"]
-    formatted_data += "# PERSONAL INFORMATION\n"
-    formatted_data += f"Name: {personal['name']}\n"
-    formatted_data += f"Title: {personal['title']}\n"
-    formatted_data += f"Location: {personal['location']}\n"
-    formatted_data += f"Contact: {personal['contact']['email']} | {personal['contact']['phone']}\n"
-    formatted_data += f"LinkedIn: {personal['contact']['linkedin']}\n"
-    formatted_data += f"Website: {personal['contact']['website']}\n\n"
-    formatted_data += f"Summary: {personal['summary']}\n\n"
-    
-    # Skills
-    skills = PORTFOLIO_INFO["skills"]
-    formatted_data += "# SKILLS\n"
-    for category, skill_list in skills.items():
-        formatted_category = category.replace('_', ' ').title()
-        formatted_data += f"## {formatted_category}\n"
-        formatted_data += f"{', '.join(skill_list)}\n\n"
-    
-    # Experience
-    formatted_data += "# WORK EXPERIENCE\n"
-    for job in PORTFOLIO_INFO["experience"]:
-        formatted_data += f"## {job['role']} at {job['company']} ({job['location']})\n"
-        formatted_data += f"Duration: {job['duration']}\n"
-        formatted_data += "Responsibilities:\n"
-        for responsibility in job['responsibilities']:
-            formatted_data += f"- {responsibility}\n"
-        formatted_data += f"Technologies: {', '.join(job['technologies'])}\n\n"
-    
-    # Education
-    formatted_data += "# EDUCATION\n"
-    for edu in PORTFOLIO_INFO["education"]:
-        formatted_data += f"## {edu['degree']} - {edu['institution']} ({edu['location']})\n"
-        formatted_data += f"Duration: {edu['duration']}\n"
-        if 'details' in edu and edu['details']:
-            formatted_data += f"{edu['details']}\n\n"
-        else:
-            formatted_data += "\n"
-    
-    # AI Journey
-    ai_journey = PORTFOLIO_INFO["ai_journey"]
-    formatted_data += "# AI EXPERTISE AND JOURNEY\n"
-    
-    formatted_data += "## Current Focus\n"
-    for focus in ai_journey["current_focus"]:
-        formatted_data += f"- {focus}\n"
-    
-    formatted_data += "\n## Learning Path\n"
-    for path in ai_journey["learning_path"]:
-        formatted_data += f"- {path}\n"
-    
-    formatted_data += "\n## AI Interests\n"
-    for interest in ai_journey["interests"]:
-        formatted_data += f"- {interest}\n"
+    Build the prompt artifact for a portfolio version
     
-    formatted_data += "\n## Next Steps in AI\n"
-    for step in ai_journey["next_steps"]:
-        formatted_data += f"- {step}\n\n"
-    
-    # Philosophy and Approach
-    philosophy = PORTFOLIO_INFO["philosophy"]
-    formatted_data += "# PROFESSIONAL PHILOSOPHY\n"
-    
-    formatted_data += "## Approach to Work\n"
-    for approach in philosophy["approach"]:
-        formatted_data += f"- {approach}\n"
-    
-    formatted_data += "\n## Professional Strengths\n"
-    for strength in philosophy["strengths"]:
-        formatted_data += f"- {strength}\n"
-    
-    formatted_data += "\n## Career Goals\n"
-    for goal in philosophy["career_goals"]:
-        formatted_data += f"- {goal}\n"
+    Args:
+        info: Portfolio data
+        version: Content hash of the data
+        
+    Returns:
+        Dictionary with version, full text and the rendered records it is
+        made of (which are also the retrieval chunks)
+    """
+    records = render_portfolio_records(info)
+    return {
+        "format": ARTIFACT_FORMAT,
+        "version": version,
+        "text": join_portfolio_records(records),
+        "records": records
+    }
+
+_compiled: Dict[str, Dict] = {}
+_compile_lock = threading.Lock()
+
+def get_compiled_portfolio(version: Optional[str] = None) -> Dict:
+    """
+    Get the compiled portfolio prompt, rendering it at most once per version
     
-    formatted_data += "\n## Personal Passions\n"
-    for passion in philosophy["passions"]:
-        formatted_data += f"- {passion}\n\n"
+    The artifact is memoized in memory and stored on disk under
+    PROMPT_CACHE_PATH, so later processes load it instead of rendering.
     
-    # Projects
-    formatted_data += "# PROJECTS\n"
-    for project in PORTFOLIO_INFO["projects"]:
-        formatted_data += f"## {project['name']}\n"
-        formatted_data += f"Description: {project['description']}\n"
-        formatted_data += f"Technologies: {', '.join(project['technologies'])}\n"
+    Args:
+        version: Portfolio version (defaults to the current PORTFOLIO_INFO hash)
         
-        formatted_data += "Features:\n"
-        for feature in project["features"]:
-            formatted_data += f"- {feature}\n"
+    Returns:
+        Dictionary with format, version, text and records
+    """
+    version = version or get_portfolio_version()
+    compiled = _compiled.get(version)
+    if compiled is not None:
+        return compiled
+    
+    with _compile_lock:
+        if version in _compiled:
+            return _compiled[version]
         
-        if 'github' in project:
-            formatted_data += f"GitHub: {project['github']}\n\n"
-        else:
-            formatted_data += "\n"
-    
-    return formatted_data
+        artifact_file = os.path.join(PROMPT_CACHE_PATH, f"portfolio_{version}.json")
+        compiled = None
+        if os.path.exists(artifact_file):
+            try:
+                with open(artifact_file, 'r') as f:
+                    compiled = json.load(f)
+                if compiled.get("format") != ARTIFACT_FORMAT:
+                    compiled = None
+            except Exception as e:
+                print(f"Error loading compiled portfolio: {str(e)}")
+        
+        if compiled is None:
+            compiled = compile_portfolio(PORTFOLIO_INFO, version)
+            try:
+                os.makedirs(PROMPT_CACHE_PATH, exist_ok=True)
+                tmp_file = f"{artifact_file}.tmp"
+                with open(tmp_file, 'w') as f:
+                    json.dump(compiled, f)
+                os.replace(tmp_file, artifact_file)
+            except Exception as e:
+                print(f"Error saving compiled portfolio: {str(e)}")
+        
+        _compiled[version] = compiled
+        return compiled
+
+def format_portfolio_data():
+    """
+    Format the portfolio data into a format that's optimal for LLM context
+    """
+    return get_compiled_portfolio()["text"]
+
+def get_portfolio_chunks() -> List[Dict]:
+    """
+    Returns the retrieval documents for the current portfolio, built from
+    the compiled records so chunks and prompt text share one formatter
+    """
+    return chunk_portfolio(PORTFOLIO_INFO, records=get_compiled_portfolio()["records"])
 
 def get_portfolio_context():
     """
@@ -151,4 +144,28 @@ def get_portfolio_knowledge_prompt():
         api_key=llm_config["api_key"],
         temperature=llm_config["temperature"]
     )
-    """
\ No newline at end of file
+    """
+
+def get_portfolio_guidelines_prompt():
+    """
+    Returns the answering guidelines for the agent's backstory, without the
+    portfolio data itself (relevant sections are added to each task instead)
+    """
+    return """
+      As Santiago Ospina's Portfolio AI Assistant, you answer questions about his background, 
+      skills, experience, projects, and professional philosophy.
+
+      Each task includes the portfolio sections relevant to the question. Use them to provide
+      accurate and detailed responses. If asked about specific projects or technical details not
+      covered there, you can respond based on his general technology stack and experience, but
+      make it clear that you're providing a general answer based on his background.
+
+      Always maintain Santiago's voice and philosophy in your responses:
+      - Focus on business value before technology
+      - Emphasize problem-solving and practical solutions
+      - Highlight the connection between technology and business impact
+      - Showcase his experience with AI, automation, and scalable systems
+
+      If asked about Santiago's availability for projects, interviews, or collaborations, suggest
+      contacting him directly through the provided contact information.
+      """
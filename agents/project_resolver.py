@@ -0,0 +1,162 @@
+# agents/project_resolver.py
+import os
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Set
+
+from knowledge.portfolio_data import PORTFOLIO_INFO
+
+# Minimum trigram similarity for a fuzzy project name match
+PROJECT_MATCH_THRESHOLD = float(os.getenv("PROJECT_MATCH_THRESHOLD", 0.7))
+
+# Score reported for a match on a technology only one project uses
+TECHNOLOGY_MATCH_SCORE = 0.6
+
+# A technology only points at a project when the question is about projects
+PROJECT_WORDS = {"project", "projects", "built", "build", "app", "application", "repo", "repository"}
+
+
+def _normalize(text: str) -> str:
+    """Lowercase words separated by single spaces"""
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+def _trigrams(text: str) -> Set[str]:
+    """Character trigrams of a normalized text, padded at the ends"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def project_aliases(project: Dict) -> Set[str]:
+    """
+    Normalized names a project can be referred to by
+
+    The full name, the name without a trailing "AI"/"App", the GitHub
+    repository name and the acronym of multi-word names.
+    """
+    name = _normalize(project["name"])
+    aliases = {name}
+    words = name.split()
+    if len(words) > 2 and words[-1] in ("ai", "app"):
+        aliases.add(" ".join(words[:-1]))
+    if len(words) > 2:
+        aliases.add("".join(word[0] for word in words))
+    github = project.get("github")
+    if github:
+        aliases.add(_normalize(github.rstrip("/").rsplit("/", 1)[-1]))
+    aliases.update(_normalize(alias) for alias in project.get("aliases", []))
+    return {alias for alias in aliases if alias}
+
+
+class ProjectResolver:
+    """
+    Find the project a free-text question is about.
+
+    Built once from the portfolio projects: exact aliases are matched as
+    whole words, misspelled names through a trigram index over the aliases.
+    When the portfolio has several projects, a technology that only one of
+    them uses (and that is not a general skill) also points at it if the
+    question asks about projects. Resolving a question takes microseconds.
+    """
+    def __init__(self, info: Optional[Dict] = None, threshold: float = PROJECT_MATCH_THRESHOLD):
+        info = info or PORTFOLIO_INFO
+        projects = info.get("projects", [])
+        self.threshold = threshold
+        self.names: List[str] = [project["name"] for project in projects]
+
+        # alias -> project row, and trigram -> aliases containing it
+        self.aliases: Dict[str, int] = {}
+        self.alias_trigrams: Dict[str, Set[str]] = {}
+        self.trigram_index: Dict[str, Set[str]] = {}
+        for row, project in enumerate(projects):
+            for alias in project_aliases(project):
+                self.aliases[alias] = row
+                grams = _trigrams(alias)
+                self.alias_trigrams[alias] = grams
+                for gram in grams:
+                    self.trigram_index.setdefault(gram, set()).add(alias)
+
+        # Technologies used by exactly one project. With a single project every
+        # technology would qualify, turning portfolio-wide questions ("what
+        # projects use Python?") into questions about that one project; the
+        # same goes for technologies that are general skills.
+        general = {_normalize(skill) for skills in info.get("skills", {}).values() for skill in skills}
+        general.update(
+            _normalize(technology) for job in info.get("experience", []) for technology in job.get("technologies", [])
+        )
+        users: Dict[str, Set[int]] = {}
+        if len(projects) > 1:
+            for row, project in enumerate(projects):
+                for technology in project.get("technologies", []):
+                    users.setdefault(_normalize(technology), set()).add(row)
+        self.technologies = {
+            technology: rows.pop() for technology, rows in users.items()
+            if len(rows) == 1 and technology not in general
+        }
+
+    def resolve(self, text: str) -> Optional[Dict]:
+        """
+        Resolve the project mentioned in a text
+
+        Args:
+            text: Question or other free text
+
+        Returns:
+            Dictionary with "project" (its name), "match" ("alias", "fuzzy"
+            or "technology") and "score", or None when no project is mentioned
+        """
+        normalized = f" {_normalize(text)} "
+        words = normalized.split()
+        if not words:
+            return None
+
+        # Whole-word alias, longest first so full names beat acronyms
+        for alias in sorted(self.aliases, key=len, reverse=True):
+            if f" {alias} " in normalized:
+                return self._result(self.aliases[alias], "alias", 1.0)
+
+        # Only aliases sharing a trigram with the text can match fuzzily
+        candidates = set()
+        for gram in _trigrams(" ".join(words)):
+            candidates.update(self.trigram_index.get(gram, ()))
+
+        best_alias, best_score = None, 0.0
+        windows: Dict[int, List[Set[str]]] = {}
+        for alias in candidates:
+            size = len(alias.split())
+            if size == 1 and len(alias) < 5:
+                # Short aliases (acronyms) only match exactly
+                continue
+            if size not in windows:
+                # Trigrams of every run of `size` words in the text
+                windows[size] = [
+                    _trigrams(" ".join(words[start:start + size]))
+                    for start in range(max(1, len(words) - size + 1))
+                ]
+            alias_grams = self.alias_trigrams[alias]
+            for window in windows[size]:
+                # Dice coefficient between the window and the alias
+                score = 2 * len(window & alias_grams) / (len(window) + len(alias_grams))
+                if score > best_score:
+                    best_alias, best_score = alias, score
+        if best_alias and best_score >= self.threshold:
+            return self._result(self.aliases[best_alias], "fuzzy", round(best_score, 3))
+
+        if PROJECT_WORDS.intersection(words):
+            for technology, row in self.technologies.items():
+                if f" {technology} " in normalized:
+                    return self._result(row, "technology", TECHNOLOGY_MATCH_SCORE)
+
+        return None
+
+    def _result(self, row: int, match: str, score: float) -> Dict:
+        return {"project": self.names[row], "match": match, "score": score}
+
+
+@lru_cache(maxsize=1)
+def get_project_resolver() -> ProjectResolver:
+    """Process-wide project resolver, built once from PORTFOLIO_INFO"""
+    return ProjectResolver()
+
+def resolve_project_name(text: str) -> Optional[str]:
+    """Name of the project a text refers to, or None"""
+    match = get_project_resolver().resolve(text)
+    return match["project"] if match else None
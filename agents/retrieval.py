@@ -0,0 +1,75 @@
+# agents/retrieval.py
+import os
+import threading
+from typing import List, Optional
+
+from agents.portfolio_integration import get_portfolio_context
+from memory.vector_store import get_vector_store, initialize_vector_store
+
+# Number of portfolio sections injected into each task
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", 4))
+
+_initialize_lock = threading.Lock()
+
+def _ensure_vector_store():
+    """Index the portfolio on first use if startup did not (e.g. in a worker process)"""
+    vector_store = get_vector_store()
+    if not vector_store.is_initialized():
+        with _initialize_lock:
+            if not vector_store.is_initialized():
+                initialize_vector_store()
+    return vector_store
+
+def retrieve_sections(question: str, k: int = RETRIEVAL_TOP_K, project_name: Optional[str] = None) -> List[str]:
+    """
+    Select the portfolio sections most relevant to a question, combining
+    vector and keyword (BM25) rankings
+    
+    Args:
+        question: The user's question
+        k: Number of sections to return
+        project_name: Project the question is about, if any
+        
+    Returns:
+        List of section texts, most relevant first
+    """
+    vector_store = _ensure_vector_store()
+    if not project_name:
+        results = vector_store.hybrid_search(question, k=k)
+        return [result["content"] for result in results]
+    
+    # Project questions only look at project documents, the named one first
+    query = f"{project_name}: {question}"
+    results = vector_store.hybrid_search(query, k=1, filter={"section": "projects", "project": project_name})
+    if len(results) < k:
+        seen = {result["content"] for result in results}
+        more = vector_store.hybrid_search(query, k=k, filter={"section": "projects"})
+        results.extend(result for result in more if result["content"] not in seen)
+    if not results:
+        results = vector_store.hybrid_search(query, k=k)
+    return [result["content"] for result in results[:k]]
+
+def retrieve_portfolio_context(question: str, k: int = RETRIEVAL_TOP_K, project_name: Optional[str] = None) -> str:
+    """
+    Build the portfolio context for a task from the top-k relevant sections
+    
+    Falls back to the full portfolio when retrieval is unavailable, so the
+    agents always have something to answer from.
+    
+    Args:
+        question: The user's question
+        k: Number of sections to include
+        project_name: Project the question is about, if any
+        
+    Returns:
+        Text to inject into the task description
+    """
+    try:
+        sections = retrieve_sections(question, k=k, project_name=project_name)
+    except Exception as e:
+        print(f"Error retrieving portfolio sections: {str(e)}")
+        sections = []
+    
+    if not sections:
+        return get_portfolio_context()
+    return "\n\n---\n\n".join(sections)
@@ -0,0 +1,99 @@
+# agents/router.py
+import os
+from functools import lru_cache
+from typing import Dict, Optional
+
+from agents.portfolio_integration import get_portfolio_chunks
+from knowledge.chunking import chunk_portfolio
+from memory.bm25 import BM25Index
+from memory.vector_store import STOP_WORDS
+
+# Below this confidence the crew falls back to the LLM routing task
+ROUTER_CONFIDENCE_THRESHOLD = float(os.getenv("ROUTER_CONFIDENCE_THRESHOLD", 0.6))
+
+# BM25 score at which the best route counts as clearly supported
+ROUTER_MIN_EVIDENCE = 2.0
+
+# Intent keywords weigh more than topical matches in the portfolio text
+KEYWORD_WEIGHT = 2.0
+
+# Words that signal a route regardless of the portfolio contents
+ROUTE_KEYWORDS = {
+    "knowledge": (
+        "skills skill background experience experiences work worked working job jobs career company "
+        "companies education degree university studied study bootcamp contact email phone linkedin "
+        "website location live based summary strengths goals philosophy passions hobbies languages "
+        "know knows years role roles team lead hire school graduate"
+    ),
+    "project": (
+        "project projects built build building implementation implemented implement architecture "
+        "github repository repo demo feature features app application technical challenges "
+        "solution solutions outcome outcomes"
+    ),
+}
+
+# Specialist agent for each route
+ROUTE_AGENTS = {
+    "knowledge": "Portfolio Knowledge Expert",
+    "project": "Project Specialist",
+}
+
+
+class QueryRouter:
+    """
+    Local classifier that picks the specialist for a question without an LLM.
+
+    Every portfolio document is labelled with a route (projects go to the
+    Project Specialist, everything else to the Knowledge Expert) and indexed
+    with BM25, together with a few keyword documents per route. A question's
+    BM25 mass per route gives the winning route and its confidence.
+    """
+    def __init__(self, info: Optional[Dict] = None, threshold: float = ROUTER_CONFIDENCE_THRESHOLD):
+        self.threshold = threshold
+
+        texts, self.labels, self.weights = [], [], []
+        for document in (chunk_portfolio(info) if info else get_portfolio_chunks()):
+            texts.append(document["text"])
+            self.labels.append("project" if document["metadata"]["section"] == "projects" else "knowledge")
+            self.weights.append(1.0)
+        for route, keywords in ROUTE_KEYWORDS.items():
+            texts.append(keywords)
+            self.labels.append(route)
+            self.weights.append(KEYWORD_WEIGHT)
+
+        self.index = BM25Index(texts, stop_words=STOP_WORDS)
+
+    def route(self, question: str) -> Dict:
+        """
+        Classify a question
+
+        Args:
+            question: The user's question
+
+        Returns:
+            Dictionary with "route" ("knowledge" or "project"), "agent",
+            "confidence" (0-1) and "confident" (at or above the threshold)
+        """
+        totals = {route: 0.0 for route in ROUTE_AGENTS}
+        for row, score in self.index.search(question, k=len(self.labels)):
+            totals[self.labels[row]] += score * self.weights[row]
+
+        route = max(totals, key=totals.get)
+        mass = sum(totals.values())
+        confidence = 0.0
+        if mass > 0:
+            # Share of the evidence, discounted when there is little of it
+            confidence = totals[route] / mass * min(1.0, totals[route] / ROUTER_MIN_EVIDENCE)
+
+        return {
+            "route": route,
+            "agent": ROUTE_AGENTS[route],
+            "confidence": round(confidence, 3),
+            "confident": confidence >= self.threshold
+        }
+
+
+@lru_cache(maxsize=1)
+def get_router() -> QueryRouter:
+    """Process-wide router, built once from PORTFOLIO_INFO"""
+    return QueryRouter()
@@ -3,7 +3,7 @@ from crewai import Task
 
 
 # Define portfolio inquiry tasks
-def create_portfolio_inquiry_task(question, agent):
+def create_portfolio_inquiry_task(question, agent, context=""):
     """Create a task for handling portfolio inquiries"""
     return Task(
         description=f"""
@@ -11,6 +11,9 @@ def create_portfolio_inquiry_task(question, agent):
         
         Question: {question}
         
+        Relevant portfolio information:
+        {context}
+        
         Provide a detailed, informative answer based on your knowledge.
         If the question is outside your expertise, explain why and what 
         information would be needed to answer it properly.
@@ -20,7 +23,7 @@ def create_portfolio_inquiry_task(question, agent):
     )
 
 # Define project inquiry tasks
-def create_project_inquiry_task(project_name, question, agent):
+def create_project_inquiry_task(project_name, question, agent, context=""):
     """Create a task for handling project-specific inquiries"""
     return Task(
         description=f"""
@@ -28,6 +31,9 @@ def create_project_inquiry_task(project_name, question, agent):
         
         Question: {question}
         
+        Relevant portfolio information:
+        {context}
+        
         Provide technical details, challenges faced, solutions implemented,
         and outcomes achieved. Include technologies used and your role in the project.
         """,
@@ -1,16 +1,45 @@
 # api/dependencies.py
 import os
+import threading
 from typing import Optional
 
 from dotenv import load_dotenv
 from fastapi import Header, HTTPException
 
 from agents.analytics.usage_tracker import AnalyticsTracker
+from memory.conversation_backends import create_conversation_backend
 from memory.conversation_store import ConversationMemory
+from memory.response_cache import ResponseCache
+from memory.semantic_cache import SemanticCache
+from memory.vector_store import EMBEDDINGS_MODEL, get_cached_embeddings
+
+from .executor import CrewExecutor, create_crew_executor
 
 # Load environment variables
 load_dotenv()
 
+# Guards lazy creation of the process-wide instances below
+# (sync dependencies run in FastAPI's threadpool)
+_instances_lock = threading.Lock()
+
+# Process-wide conversation store (created on first use)
+_memory_store: Optional[ConversationMemory] = None
+
+# Process-wide analytics tracker (created on first use)
+_analytics_tracker: Optional[AnalyticsTracker] = None
+
+# Process-wide crew executor (created on first use)
+_crew_executor: Optional[CrewExecutor] = None
+
+# Process-wide response cache
+_response_cache = ResponseCache(
+    max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", 512)),
+    ttl=float(os.getenv("RESPONSE_CACHE_TTL", 3600))
+)
+
+# Process-wide semantic cache (created on first use)
+_semantic_cache: Optional[SemanticCache] = None
+
 # API key validation
 def verify_api_key(x_api_key: Optional[str] = Header(None)):
     """Verify the API key if required"""
@@ -24,11 +53,99 @@ def verify_api_key(x_api_key: Optional[str] = Header(None)):
     return x_api_key
 
 # Memory store dependency
-def get_memory_store():
-    """Provides a ConversationMemory instance"""
-    return ConversationMemory()
+def get_memory_store() -> ConversationMemory:
+    """Provides the process-wide ConversationMemory"""
+    global _memory_store
+    if _memory_store is None:
+        with _instances_lock:
+            if _memory_store is None:
+                storage_path = os.getenv("CONVERSATIONS_PATH", "./data/conversations")
+                backend = create_conversation_backend(
+                    os.getenv("CONVERSATION_BACKEND", "jsonl").lower(),
+                    storage_path=storage_path,
+                    db_path=os.getenv("CONVERSATION_DB_PATH"),
+                    max_open_files=int(os.getenv("CONVERSATION_OPEN_LOGS", 64))
+                )
+                _memory_store = ConversationMemory(
+                    storage_path=storage_path,
+                    backend=backend,
+                    max_cached_messages=int(os.getenv("CONVERSATION_CACHE_MESSAGES", 10000)),
+                    max_cached_bytes=int(os.getenv("CONVERSATION_CACHE_BYTES", 64 * 1024 * 1024)),
+                    summary_every=int(os.getenv("CONVERSATION_SUMMARY_EVERY", 10)),
+                    recent_messages=int(os.getenv("CONVERSATION_RECENT_MESSAGES", 6))
+                )
+    return _memory_store
+
+def shutdown_memory_store():
+    """Fsync and close the conversation logs of the memory store"""
+    global _memory_store
+    if _memory_store is not None:
+        _memory_store.close()
+        _memory_store = None
 
 # Analytics tracker dependency
-def get_analytics_tracker():
-    """Provides an AnalyticsTracker instance"""
-    return AnalyticsTracker()
\ No newline at end of file
+def get_analytics_tracker() -> AnalyticsTracker:
+    """Provides the process-wide AnalyticsTracker"""
+    global _analytics_tracker
+    if _analytics_tracker is None:
+        with _instances_lock:
+            if _analytics_tracker is None:
+                _analytics_tracker = AnalyticsTracker(
+                    flush_batch=int(os.getenv("ANALYTICS_FLUSH_BATCH", 100)),
+                    flush_interval=float(os.getenv("ANALYTICS_FLUSH_INTERVAL", 5))
+                )
+    return _analytics_tracker
+
+def shutdown_analytics_tracker():
+    """Flush buffered analytics and stop the background writer"""
+    global _analytics_tracker
+    if _analytics_tracker is not None:
+        _analytics_tracker.close()
+        _analytics_tracker = None
+
+# Response cache dependency
+def get_response_cache() -> ResponseCache:
+    """Provides the process-wide ResponseCache"""
+    return _response_cache
+
+# Semantic cache dependency
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """Provides the process-wide SemanticCache, or None if it is disabled"""
+    global _semantic_cache
+    if os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    
+    if _semantic_cache is None:
+        with _instances_lock:
+            if _semantic_cache is None:
+                model = os.getenv("SEMANTIC_CACHE_EMBEDDINGS", EMBEDDINGS_MODEL)
+                try:
+                    embeddings = get_cached_embeddings(model)
+                except Exception as e:
+                    print(f"Falling back to hashing embeddings for the semantic cache: {str(e)}")
+                    embeddings = get_cached_embeddings("hashing")
+                
+                _semantic_cache = SemanticCache(
+                    embeddings,
+                    threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.9)),
+                    max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", 512)),
+                    ttl=float(os.getenv("RESPONSE_CACHE_TTL", 3600))
+                )
+    return _semantic_cache
+
+# Crew executor dependency
+def get_crew_executor() -> CrewExecutor:
+    """Provides the process-wide CrewExecutor"""
+    global _crew_executor
+    if _crew_executor is None:
+        with _instances_lock:
+            if _crew_executor is None:
+                _crew_executor = create_crew_executor()
+    return _crew_executor
+
+def shutdown_crew_executor():
+    """Shut down the crew executor if it was started"""
+    global _crew_executor
+    if _crew_executor is not None:
+        _crew_executor.shutdown(wait=False)
+        _crew_executor = None
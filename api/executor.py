@@ -0,0 +1,237 @@
+# api/executor.py
+import asyncio
+import functools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+class ExecutorBusyError(Exception):
+    """Raised when the wait queue is full and a request cannot be accepted"""
+
+
+class RequestCancelledError(Exception):
+    """Raised when a request was cancelled through CrewExecutor.cancel"""
+
+
+class DuplicateRequestError(Exception):
+    """Raised when a request ID is already queued or running"""
+
+
+class CrewExecutor:
+    """
+    Runs blocking crew work off the event loop in a bounded worker pool.
+
+    At most ``max_workers`` jobs are in flight at once; up to ``max_queue``
+    further requests wait for a slot and anything beyond that is rejected
+    with ExecutorBusyError. Request IDs must be unique among the requests
+    in progress (DuplicateRequestError otherwise).
+    """
+    def __init__(self, max_workers: int = 4, max_queue: int = 32, mode: str = "thread"):
+        if mode not in ["thread", "process"]:
+            raise ValueError("Mode must be either 'thread' or 'process'")
+
+        self.mode = mode
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+
+        if mode == "process":
+            # Work submitted in process mode must be picklable (module-level functions)
+            self._pool = ProcessPoolExecutor(max_workers=max_workers)
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crew")
+
+        # Created lazily so it binds to the running event loop
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._cancel_requested = set()
+
+        # Metrics (_queue_depth counts admitted requests not yet holding a worker slot)
+        self._queue_depth = 0
+        self._in_flight = 0
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "rejected": 0,
+            "started": 0,
+            "max_queue_depth": 0,
+            "total_queue_wait": 0.0,
+        }
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        return self._slots
+
+    def _waiting(self) -> int:
+        """Admitted requests that will have to wait, i.e. beyond the free workers"""
+        return max(0, self._queue_depth - (self.max_workers - self._in_flight))
+
+    def _leave_queue(self, reservation: Dict) -> None:
+        """Give back a reserved place in the wait queue (once)"""
+        if reservation["queued"]:
+            reservation["queued"] = False
+            self._queue_depth -= 1
+
+    def _release_slot(self, future) -> None:
+        """Free a worker slot once the pool has actually finished the job"""
+        self._in_flight -= 1
+        self._slots.release()
+
+    async def run(self, request_id: str, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run ``fn(*args, **kwargs)`` in the worker pool
+
+        Args:
+            request_id: Identifier used to cancel the request
+            fn: Blocking callable to run
+            *args, **kwargs: Arguments passed to ``fn``
+
+        Returns:
+            The return value of ``fn``
+
+        Raises:
+            DuplicateRequestError: If the request ID is already in use
+            ExecutorBusyError: If the wait queue is full
+            RequestCancelledError: If the request was cancelled
+        """
+        if request_id in self._tasks:
+            raise DuplicateRequestError(f"Request {request_id} is already queued or running")
+
+        if self._waiting() >= self.max_queue:
+            self._stats["rejected"] += 1
+            raise ExecutorBusyError(
+                f"Too many pending requests (queue depth {self._waiting()})"
+            )
+
+        # Reserve the place now, so a burst of requests arriving before any
+        # task has started cannot all pass the check above
+        reservation = {"queued": True}
+        self._queue_depth += 1
+        self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self._waiting())
+
+        self._stats["submitted"] += 1
+        task = asyncio.ensure_future(self._run(reservation, fn, *args, **kwargs))
+        self._tasks[request_id] = task
+
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if request_id in self._cancel_requested:
+                raise RequestCancelledError(f"Request {request_id} was cancelled")
+            # The caller itself was cancelled (e.g. client disconnected)
+            task.cancel()
+            raise
+        finally:
+            # A task cancelled before it started never reached _run's cleanup
+            self._leave_queue(reservation)
+            self._tasks.pop(request_id, None)
+            self._cancel_requested.discard(request_id)
+
+    async def _run(self, reservation: Dict, fn: Callable, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        slots = self._get_slots()
+
+        # Wait for a free worker slot
+        enqueued_at = time.monotonic()
+        try:
+            await slots.acquire()
+        except asyncio.CancelledError:
+            self._stats["cancelled"] += 1
+            raise
+        finally:
+            self._leave_queue(reservation)
+        self._stats["started"] += 1
+        self._stats["total_queue_wait"] += time.monotonic() - enqueued_at
+
+        self._in_flight += 1
+        try:
+            pool_future = self._pool.submit(functools.partial(fn, *args, **kwargs))
+        except Exception:
+            self._in_flight -= 1
+            slots.release()
+            raise
+        # Keep the slot until the worker is really done, even if the caller gives up
+        pool_future.add_done_callback(
+            lambda f: loop.call_soon_threadsafe(self._release_slot, f)
+        )
+
+        try:
+            result = await asyncio.wrap_future(pool_future)
+        except asyncio.CancelledError:
+            # Only jobs that have not started yet can be stopped
+            pool_future.cancel()
+            self._stats["cancelled"] += 1
+            raise
+        except Exception:
+            self._stats["failed"] += 1
+            raise
+
+        self._stats["completed"] += 1
+        return result
+
+    def cancel(self, request_id: str) -> bool:
+        """
+        Cancel a queued or running request
+
+        Args:
+            request_id: Identifier passed to ``run``
+
+        Returns:
+            bool: True if the request was found
+        """
+        task = self._tasks.get(request_id)
+        if task is None or task.done():
+            return False
+
+        self._cancel_requested.add(request_id)
+        task.cancel()
+        return True
+
+    def get_stats(self) -> Dict:
+        """
+        Get executor metrics
+
+        Returns:
+            Dictionary with pool configuration, queue depth and counters
+        """
+        started = self._stats["started"]
+        return {
+            "mode": self.mode,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "queue_depth": self._waiting(),
+            "max_queue_depth": self._stats["max_queue_depth"],
+            "submitted": self._stats["submitted"],
+            "completed": self._stats["completed"],
+            "failed": self._stats["failed"],
+            "cancelled": self._stats["cancelled"],
+            "rejected": self._stats["rejected"],
+            "avg_queue_wait": (
+                self._stats["total_queue_wait"] / started if started > 0 else 0
+            ),
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting work and release the worker pool"""
+        for task in list(self._tasks.values()):
+            task.cancel()
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+def create_crew_executor() -> CrewExecutor:
+    """Create a CrewExecutor configured from environment variables"""
+    return CrewExecutor(
+        max_workers=int(os.getenv("CREW_MAX_WORKERS", 4)),
+        max_queue=int(os.getenv("CREW_MAX_QUEUE", 32)),
+        mode=os.getenv("CREW_EXECUTOR_MODE", "thread").lower(),
+    )
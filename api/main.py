@@ -6,8 +6,14 @@ from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from agents.crew import warm_crew_templates
 from memory.vector_store import initialize_vector_store
 
+from .dependencies import (
+    shutdown_analytics_tracker,
+    shutdown_crew_executor,
+    shutdown_memory_store,
+)
 from .routes import admin, query
 
 # Load environment variables
@@ -70,11 +76,27 @@ async def startup_event():
         logger.info("Vector store initialized successfully")
     except Exception as e:
         logger.error(f"Error initializing vector store: {str(e)}")
+    
+    # Prebuild the pooled crews so requests only bind their inputs
+    try:
+        warm_crew_templates()
+        logger.info("Crew templates ready")
+    except Exception as e:
+        logger.error(f"Error building crew templates: {str(e)}")
 
 # Shutdown event
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down portfolio AI API")
+    
+    # Stop the crew worker pool
+    shutdown_crew_executor()
+    
+    # Flush conversation logs
+    shutdown_memory_store()
+    
+    # Write any buffered analytics events
+    shutdown_analytics_tracker()
 
 # For direct execution
 if __name__ == "__main__":
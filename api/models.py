@@ -12,6 +12,7 @@ class QueryRequest(BaseModel):
     user_id: Optional[str] = Field(None, description="User identifier for analytics")
     project_specific: bool = Field(False, description="Whether the query is about a specific project")
     project_name: Optional[str] = Field(None, description="The name of the project if project_specific=True")
+    request_id: Optional[str] = Field(None, description="Client-chosen request ID, used to cancel the request")
 
 class Message(BaseModel):
     """Model for a conversation message"""
@@ -1,7 +1,18 @@
 # api/routes/admin.py
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
 
-from ..dependencies import get_analytics_tracker, get_memory_store, verify_api_key
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from agents.crew import CREW_TEMPLATES
+
+from ..dependencies import (
+    get_analytics_tracker,
+    get_crew_executor,
+    get_memory_store,
+    get_response_cache,
+    get_semantic_cache,
+    verify_api_key,
+)
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
@@ -16,11 +27,132 @@ async def get_analytics(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving analytics: {str(e)}")
 
+@router.get("/analytics/daily")
+async def get_daily_analytics(
+    days: int = Query(7, ge=1, le=366),
+    api_key: str = Depends(verify_api_key),
+    analytics = Depends(get_analytics_tracker)
+):
+    """Get per-day query counts and average response times"""
+    try:
+        return analytics.get_daily_summary(days)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving analytics: {str(e)}")
+
+@router.get("/analytics/latency")
+async def get_latency_analytics(
+    granularity: str = Query("hour", pattern="^(hour|day)$"),
+    group_by: Optional[str] = Query(None, pattern="^(agent|crew)$"),
+    start: Optional[str] = Query(None, description="Inclusive ISO date or datetime"),
+    end: Optional[str] = Query(None, description="Exclusive ISO date or datetime"),
+    api_key: str = Depends(verify_api_key),
+    analytics = Depends(get_analytics_tracker)
+):
+    """Get p50/p90/p99 response times per hour or day, optionally by agent or crew"""
+    try:
+        return analytics.get_latency_percentiles(granularity, group_by, start, end)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving analytics: {str(e)}")
+
+@router.get("/analytics/queries")
+async def get_analytics_queries(
+    start: Optional[str] = Query(None, description="Inclusive ISO date or datetime"),
+    end: Optional[str] = Query(None, description="Exclusive ISO date or datetime"),
+    limit: int = Query(100, ge=1, le=10000),
+    api_key: str = Depends(verify_api_key),
+    analytics = Depends(get_analytics_tracker)
+):
+    """Get the raw queries of a time window"""
+    try:
+        return analytics.get_queries(start, end, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving analytics: {str(e)}")
+
+@router.get("/executor")
+async def get_executor_stats(
+    api_key: str = Depends(verify_api_key),
+    executor = Depends(get_crew_executor)
+):
+    """Get worker pool and queue metrics for crew execution"""
+    return executor.get_stats()
+
+@router.get("/crews")
+async def get_crew_stats(
+    api_key: str = Depends(verify_api_key)
+):
+    """Get pool statistics of the crew templates"""
+    return [template.get_stats() for template in CREW_TEMPLATES.values()]
+
+@router.get("/cache")
+async def get_cache_stats(
+    api_key: str = Depends(verify_api_key),
+    cache = Depends(get_response_cache),
+    semantic_cache = Depends(get_semantic_cache)
+):
+    """Get response cache statistics"""
+    return {
+        "exact": cache.get_stats(),
+        "semantic": semantic_cache.get_stats() if semantic_cache else None
+    }
+
+@router.delete("/cache")
+async def clear_cache(
+    api_key: str = Depends(verify_api_key),
+    cache = Depends(get_response_cache),
+    semantic_cache = Depends(get_semantic_cache)
+):
+    """Clear the response caches"""
+    cache.clear()
+    if semantic_cache:
+        semantic_cache.clear()
+    return {"cleared": True}
+
+@router.get("/memory")
+async def get_memory_stats(
+    api_key: str = Depends(verify_api_key),
+    memory_store = Depends(get_memory_store)
+):
+    """Get conversation hot cache statistics"""
+    return memory_store.get_cache_stats()
+
 @router.get("/conversations")
 async def list_conversations(
+    limit: int = Query(50, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    api_key: str = Depends(verify_api_key),
+    memory_store = Depends(get_memory_store)
+):
+    """List conversations, most recently updated first (cursor-paginated)"""
+    try:
+        return memory_store.list_conversations(limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/conversations/{conversation_id}/messages")
+async def get_conversation_messages(
+    conversation_id: str,
+    start: int = Query(0, ge=0),
+    end: Optional[int] = Query(None, ge=0),
     api_key: str = Depends(verify_api_key),
     memory_store = Depends(get_memory_store)
 ):
-    """List all conversations (not implemented yet)"""
-    # This would need storage_path scanning functionality added to ConversationMemory
-    return {"message": "Not implemented yet, but would list all conversations"}
\ No newline at end of file
+    """Get a range of messages from a conversation"""
+    return {
+        "conversation_id": conversation_id,
+        "start": start,
+        "messages": memory_store.get_messages(conversation_id, start, end)
+    }
+
+@router.post("/conversations/import")
+async def import_conversations(
+    api_key: str = Depends(verify_api_key),
+    memory_store = Depends(get_memory_store)
+):
+    """Bulk import JSON/JSONL conversation files into the SQLite backend"""
+    if not hasattr(memory_store.backend, "import_json_files"):
+        raise HTTPException(status_code=400, detail="The configured conversation backend does not support imports")
+    try:
+        imported = memory_store.backend.import_json_files(memory_store.storage_path)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error importing conversations: {str(e)}")
+    return {"imported": imported}
\ No newline at end of file
@@ -1,23 +1,106 @@
 # api/routes/query.py
+import asyncio
 import time
 import uuid
 from typing import Optional
 
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 
-from agents.crew import get_portfolio_crew, get_project_crew
+from agents.crew import history_affects_prompt, run_crew_query
+from agents.direct_answers import DIRECT_ANSWER_AGENT, get_direct_answer_engine
+from agents.project_resolver import resolve_project_name
+from agents.router import get_router
+from knowledge.versioning import get_portfolio_version
 
-from ..dependencies import get_analytics_tracker, get_memory_store, verify_api_key
+from ..dependencies import (
+    get_analytics_tracker,
+    get_crew_executor,
+    get_memory_store,
+    get_response_cache,
+    get_semantic_cache,
+    verify_api_key,
+)
+from ..executor import DuplicateRequestError, ExecutorBusyError, RequestCancelledError
 from ..models import QueryRequest, QueryResponse
+from ..utils import describe_step, format_sse_event, iter_text_chunks
 
 router = APIRouter(prefix="/api", tags=["queries"])
 
+def select_crew(request: QueryRequest):
+    """
+    Return the project name (None for the portfolio crew), agent label and
+    local routing decision (None for project requests) for a request
+    """
+    if request.project_specific and request.project_name:
+        return request.project_name, "Project Specialist", None
+    # Questions naming a project go straight to the narrower project crew
+    project_name = resolve_project_name(request.query)
+    if project_name:
+        return project_name, "Project Specialist", None
+    route = get_router().route(request.query)
+    if not route["confident"]:
+        # The LLM routing task decides; the Knowledge Expert answers
+        return None, "Portfolio Knowledge Expert", route
+    return None, route["agent"], route
+
+def match_direct_answer(request: QueryRequest):
+    """Answer factual questions from the portfolio data (not for explicit project requests)"""
+    if request.project_specific and request.project_name:
+        return None
+    return get_direct_answer_engine().answer(request.query)
+
+def crew_kind(project_name: Optional[str], cached, direct=None) -> str:
+    """Label used to group latency analytics: which crew ran, the cache or the direct answers"""
+    if direct:
+        return "direct"
+    if cached:
+        return "cache"
+    return "project" if project_name else "portfolio"
+
+async def lookup_cached_answer(cache, semantic_cache, request: QueryRequest,
+                               project_name: Optional[str], conversation_history, conversation_summary=None):
+    """
+    Look up a cached answer, first by exact key and then by similar questions.
+
+    Returns the cache key (None when the history changes the prompt, so the
+    answer must not be cached) and the cached entry, if any.
+    """
+    if history_affects_prompt(conversation_history, conversation_summary):
+        return None, None
+    
+    version = get_portfolio_version()
+    cache_key = cache.make_key(request.query, project_name, version)
+    cached = cache.get(cache_key)
+    if cached:
+        return cache_key, {**cached, "match": "exact"}
+    
+    if semantic_cache:
+        scope = f"{project_name or ''}|{version}"
+        match = await run_in_threadpool(semantic_cache.lookup, request.query, scope)
+        if match:
+            return cache_key, {**match["value"], "match": "semantic", "similarity": match["similarity"]}
+    
+    return cache_key, None
+
+async def store_cached_answer(cache, semantic_cache, cache_key: str, request: QueryRequest,
+                              project_name: Optional[str], value):
+    """Store an answer in the exact and semantic caches"""
+    cache.set(cache_key, value)
+    if semantic_cache:
+        scope = f"{project_name or ''}|{get_portfolio_version()}"
+        await run_in_threadpool(semantic_cache.add, request.query, scope, value)
+
 @router.post("/query", response_model=QueryResponse)
 async def process_query(
     request: QueryRequest, 
     background_tasks: BackgroundTasks,
     memory_store = Depends(get_memory_store),
     analytics = Depends(get_analytics_tracker),
+    executor = Depends(get_crew_executor),
+    cache = Depends(get_response_cache),
+    semantic_cache = Depends(get_semantic_cache),
     api_key: Optional[str] = Depends(verify_api_key)
 ):
     """Process a query to Santiago's portfolio assistant"""
@@ -25,32 +108,52 @@ async def process_query(
     
     # Generate or use existing conversation ID
     conversation_id = request.conversation_id or str(uuid.uuid4())
+    request_id = request.request_id or str(uuid.uuid4())
     
     try:
         # Get conversation history
         conversation_history = memory_store.get_conversation(conversation_id)
+        conversation_summary = memory_store.get_summary(conversation_id)
         
         # Add user message to history
         memory_store.add_message(conversation_id, "user", request.query)
         
+        # Answer simple factual questions without running a crew
+        direct = match_direct_answer(request)
+        
         # Determine which crew to use
-        if request.project_specific and request.project_name:
-            crew = get_project_crew(request.project_name, request.query, conversation_history)
-            agent_used = "Project Specialist"
-        else:
-            crew = get_portfolio_crew(request.query, conversation_history)
-            agent_used = "Portfolio Knowledge Expert"
+        project_name, agent_used, route = select_crew(request)
         
-        # Process the query
-        response = crew.kickoff()
-
-        # Convert CrewOutput to string if necessary
-        if hasattr(response, 'raw'):
-            response_text = response.raw  # Get the raw string from CrewOutput
-        elif hasattr(response, '__str__'):
-            response_text = str(response)  # Fallback to string representation
+        # Serve repeated (or near-duplicate) questions from the cache
+        cache_key, cached = None, None
+        if not direct:
+            cache_key, cached = await lookup_cached_answer(
+                cache, semantic_cache, request, project_name, conversation_history, conversation_summary
+            )
+        
+        if direct:
+            response_text = direct["answer"]
+            agent_used = DIRECT_ANSWER_AGENT
+        elif cached:
+            response_text = cached["response"]
+            agent_used = cached["agent_used"]
         else:
-            response_text = "Unable to process response format"
+            # Process the query in the worker pool so the event loop stays free
+            response_text = await executor.run(
+                request_id,
+                run_crew_query,
+                request.query,
+                conversation_history,
+                project_name,
+                route=route,
+                conversation_summary=conversation_summary
+            )
+            
+            if cache_key:
+                await store_cached_answer(
+                    cache, semantic_cache, cache_key, request, project_name,
+                    {"response": response_text, "agent_used": agent_used}
+                )
 
         # Record response in history
         memory_store.add_message(conversation_id, "assistant", response_text)
@@ -61,7 +164,9 @@ async def process_query(
             query=request.query,
             user_id=request.user_id,
             conversation_id=conversation_id,
-            response_time=time.time() - start_time
+            response_time=time.time() - start_time,
+            agent_used=agent_used,
+            crew=crew_kind(project_name, cached, direct)
         )
         
         # Return the response
@@ -69,14 +174,206 @@ async def process_query(
             conversation_id=conversation_id,
             response=response_text,  # Use the extracted text
             agent_used=agent_used,
-            confidence=0.95,
+            confidence=direct["confidence"] if direct else 0.95,
             processing_time=time.time() - start_time,
             metadata={
-                "conversation_length": len(conversation_history) + 2
+                "conversation_length": len(conversation_history) + 2,
+                "request_id": request_id,
+                "cached": cached is not None,
+                "cache_match": cached["match"] if cached else None,
+                "route_confidence": route["confidence"] if route else None,
+                "direct_intent": direct["intent"] if direct else None
             }
         )
     
+    except ExecutorBusyError:
+        raise HTTPException(status_code=503, detail="Server is busy, please retry shortly")
+    except RequestCancelledError:
+        raise HTTPException(status_code=409, detail="Request was cancelled")
+    except DuplicateRequestError:
+        raise HTTPException(status_code=409, detail="A request with this ID is already in progress")
     except Exception as e:
         # Log the error (implementation depends on your logging setup)
         print(f"Error processing query: {str(e)}")
-        raise HTTPException(status_code=500, detail="Error processing your request")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Error processing your request")
+
+@router.post("/query/stream")
+async def stream_query(
+    request: QueryRequest,
+    background_tasks: BackgroundTasks,
+    memory_store = Depends(get_memory_store),
+    analytics = Depends(get_analytics_tracker),
+    executor = Depends(get_crew_executor),
+    cache = Depends(get_response_cache),
+    semantic_cache = Depends(get_semantic_cache),
+    api_key: Optional[str] = Depends(verify_api_key)
+):
+    """
+    Process a query and stream progress as Server-Sent Events.
+
+    Events: ``start`` (IDs), ``step`` (agent steps), ``task`` (finished
+    tasks), ``token`` (chunks of the final answer), then ``done`` or ``error``.
+    
+    The crew does not stream tokens: ``token`` events are the finished answer
+    split into chunks. ``step`` and ``task`` events need the thread executor
+    (callbacks cannot cross a process boundary), so only thread mode gets an
+    earlier first byte than /api/query.
+    """
+    start_time = time.time()
+    
+    conversation_id = request.conversation_id or str(uuid.uuid4())
+    request_id = request.request_id or str(uuid.uuid4())
+    
+    async def event_stream():
+        # Failures before the crew runs are reported like any other error event
+        try:
+            conversation_history = memory_store.get_conversation(conversation_id)
+            conversation_summary = memory_store.get_summary(conversation_id)
+            memory_store.add_message(conversation_id, "user", request.query)
+            
+            direct = match_direct_answer(request)
+            project_name, agent_used, route = select_crew(request)
+            
+            cache_key, cached = None, None
+            if direct:
+                agent_used = DIRECT_ANSWER_AGENT
+            else:
+                cache_key, cached = await lookup_cached_answer(
+                    cache, semantic_cache, request, project_name, conversation_history, conversation_summary
+                )
+                if cached:
+                    agent_used = cached["agent_used"]
+        except Exception as e:
+            print(f"Error processing query: {str(e)}")
+            yield format_sse_event("error", {"status_code": 500, "detail": "Error processing your request"})
+            return
+        
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+        
+        def on_step(step):
+            loop.call_soon_threadsafe(events.put_nowait, ("step", describe_step(step)))
+        
+        def on_task(output):
+            loop.call_soon_threadsafe(events.put_nowait, ("task", {
+                "agent": getattr(output, "agent", None),
+                "summary": getattr(output, "summary", None)
+            }))
+        
+        # Callbacks cannot cross a process boundary, so process pools only stream the answer
+        callbacks = (on_step, on_task) if executor.mode == "thread" else (None, None)
+        
+        yield format_sse_event("start", {
+            "conversation_id": conversation_id,
+            "request_id": request_id,
+            "agent_used": agent_used
+        })
+        
+        if direct or cached:
+            job = loop.create_future()
+            job.set_result(direct["answer"] if direct else cached["response"])
+        else:
+            job = asyncio.ensure_future(executor.run(
+                request_id,
+                run_crew_query,
+                request.query,
+                conversation_history,
+                project_name,
+                *callbacks,
+                route=route,
+                conversation_summary=conversation_summary
+            ))
+        
+        try:
+            # Relay agent progress until the crew has finished
+            while not job.done():
+                next_event = asyncio.ensure_future(events.get())
+                await asyncio.wait({next_event, job}, return_when=asyncio.FIRST_COMPLETED)
+                if next_event.done():
+                    event, data = next_event.result()
+                    yield format_sse_event(event, data)
+                else:
+                    next_event.cancel()
+            
+            while not events.empty():
+                event, data = events.get_nowait()
+                yield format_sse_event(event, data)
+            
+            try:
+                response_text = job.result()
+            except ExecutorBusyError:
+                yield format_sse_event("error", {"status_code": 503, "detail": "Server is busy, please retry shortly"})
+                return
+            except RequestCancelledError:
+                yield format_sse_event("error", {"status_code": 409, "detail": "Request was cancelled"})
+                return
+            except DuplicateRequestError:
+                yield format_sse_event("error", {"status_code": 409, "detail": "A request with this ID is already in progress"})
+                return
+            except Exception as e:
+                print(f"Error processing query: {str(e)}")
+                yield format_sse_event("error", {"status_code": 500, "detail": "Error processing your request"})
+                return
+            
+            if cache_key and not cached:
+                await store_cached_answer(
+                    cache, semantic_cache, cache_key, request, project_name,
+                    {"response": response_text, "agent_used": agent_used}
+                )
+            
+            for chunk in iter_text_chunks(response_text):
+                yield format_sse_event("token", {"text": chunk})
+            
+            # Persist the final answer once the whole stream has been produced
+            try:
+                memory_store.add_message(conversation_id, "assistant", response_text)
+            except Exception as e:
+                print(f"Error processing query: {str(e)}")
+                yield format_sse_event("error", {"status_code": 500, "detail": "Error processing your request"})
+                return
+            
+            background_tasks.add_task(
+                analytics.track_query,
+                query=request.query,
+                user_id=request.user_id,
+                conversation_id=conversation_id,
+                response_time=time.time() - start_time,
+                agent_used=agent_used,
+                crew=crew_kind(project_name, cached, direct)
+            )
+            
+            yield format_sse_event("done", {
+                "conversation_id": conversation_id,
+                "agent_used": agent_used,
+                "processing_time": time.time() - start_time,
+                "metadata": {
+                    "conversation_length": len(conversation_history) + 2,
+                    "request_id": request_id,
+                    "cached": cached is not None,
+                    "cache_match": cached["match"] if cached else None,
+                    "route_confidence": route["confidence"] if route else None,
+                    "direct_intent": direct["intent"] if direct else None
+                }
+            })
+        finally:
+            # Client went away before the crew finished
+            if not job.done():
+                executor.cancel(request_id)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=background_tasks
+    )
+
+@router.delete("/query/{request_id}")
+async def cancel_query(
+    request_id: str,
+    executor = Depends(get_crew_executor),
+    api_key: Optional[str] = Depends(verify_api_key)
+):
+    """Cancel a pending or running query"""
+    if not executor.cancel(request_id):
+        raise HTTPException(status_code=404, detail="Request not found or already finished")
+    return {"request_id": request_id, "cancelled": True}
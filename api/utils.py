@@ -0,0 +1,47 @@
+# api/utils.py
+import json
+import re
+from typing import Any, Dict, Iterator
+
+
+def format_sse_event(event: str, data: Any) -> str:
+    """
+    Format a Server-Sent Event
+
+    Args:
+        event: Event name
+        data: JSON-serializable payload
+
+    Returns:
+        The event encoded for a text/event-stream response
+    """
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def describe_step(step: Any) -> Dict:
+    """
+    Turn a CrewAI step object (AgentAction, AgentFinish, ToolResult...) into
+    a small JSON-friendly dict for streaming
+    """
+    description = {"type": type(step).__name__}
+    for field in ["thought", "tool", "tool_input", "result", "output", "text"]:
+        value = getattr(step, field, None)
+        if value:
+            description[field] = str(value)
+    return description
+
+
+def iter_text_chunks(text: str, words_per_chunk: int = 8) -> Iterator[str]:
+    """
+    Split text into small chunks of whole words, keeping the original spacing
+
+    Args:
+        text: Text to split
+        words_per_chunk: Number of words per chunk
+
+    Yields:
+        Consecutive pieces of the text
+    """
+    tokens = re.findall(r"\s*\S+\s*", text)
+    for i in range(0, len(tokens), words_per_chunk):
+        yield "".join(tokens[i:i + words_per_chunk])
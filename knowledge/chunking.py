@@ -0,0 +1,76 @@
+# knowledge/chunking.py
+from typing import Dict, List, Optional
+
+from knowledge.portfolio_data import PORTFOLIO_INFO
+from knowledge.rendering import SECTION_TITLES, render_portfolio_records
+
+
+def _document(text: str, section: str, **metadata) -> Dict:
+    """A chunk with its typed metadata (scalar values only, as vector stores expect)"""
+    return {"text": text.strip(), "metadata": {"section": section, **metadata}}
+
+def chunk_portfolio(info: Optional[Dict] = None, records: Optional[Dict[str, List[str]]] = None) -> List[Dict]:
+    """
+    Split the portfolio into one document per record
+
+    Emits a document for the personal profile, each skill category, job,
+    education entry, AI journey, philosophy and project. Each document has
+    "text" (the record as it appears in the portfolio prompt, under its
+    section heading) and "metadata" with the section plus fields such as
+    company, project and technologies.
+
+    Args:
+        info: Portfolio data (defaults to PORTFOLIO_INFO)
+        records: Records already rendered from info (see
+            agents.portfolio_integration.get_compiled_portfolio); rendered here if omitted
+
+    Returns:
+        List of documents
+    """
+    info = info or PORTFOLIO_INFO
+    records = records or render_portfolio_records(info)
+
+    def text(section: str, index: int = 0) -> str:
+        return SECTION_TITLES[section] + records[section][index]
+
+    documents = [_document(text("personal"), "personal", name=info["personal"]["name"])]
+
+    for index, (category, skill_list) in enumerate(info["skills"].items()):
+        documents.append(_document(
+            text("skills", index),
+            "skills",
+            category=category,
+            technologies=", ".join(skill_list)
+        ))
+
+    for index, job in enumerate(info["experience"]):
+        documents.append(_document(
+            text("experience", index),
+            "experience",
+            company=job["company"],
+            role=job["role"],
+            duration=job["duration"],
+            technologies=", ".join(job["technologies"])
+        ))
+
+    for index, edu in enumerate(info["education"]):
+        documents.append(_document(
+            text("education", index),
+            "education",
+            institution=edu["institution"],
+            degree=edu["degree"],
+            duration=edu["duration"]
+        ))
+
+    for key in ["ai_journey", "philosophy"]:
+        documents.append(_document(text(key), key))
+
+    for index, project in enumerate(info["projects"]):
+        documents.append(_document(
+            text("projects", index),
+            "projects",
+            project=project["name"],
+            technologies=", ".join(project["technologies"])
+        ))
+
+    return documents
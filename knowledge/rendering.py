@@ -0,0 +1,101 @@
+# knowledge/rendering.py
+from typing import Dict, List
+
+# Section names and headings, in the order they appear in the formatted portfolio
+SECTION_TITLES = {
+    "personal": "# PERSONAL INFORMATION\n",
+    "skills": "# SKILLS\n",
+    "experience": "# WORK EXPERIENCE\n",
+    "education": "# EDUCATION\n",
+    "ai_journey": "# AI EXPERTISE AND JOURNEY\n",
+    "philosophy": "# PROFESSIONAL PHILOSOPHY\n",
+    "projects": "# PROJECTS\n",
+}
+SECTIONS = list(SECTION_TITLES)
+
+
+def _bullets(items: List[str], end: str = "\n") -> List[str]:
+    return [f"- {item}{end}" for item in items]
+
+def render_portfolio_records(info: Dict) -> Dict[str, List[str]]:
+    """
+    Render the portfolio as markdown, one block per record
+
+    This is the single portfolio formatter: the prompt text is every
+    section's title followed by its records (see join_portfolio_records),
+    and the retrieval chunks are one record each under its section title.
+
+    Args:
+        info: Portfolio data
+
+    Returns:
+        Dictionary of section name to its records: one per skill category,
+        job, education entry and project, and a single one for the personal
+        profile, AI journey and philosophy
+    """
+    personal = info["personal"]
+    contact = personal["contact"]
+    records = {
+        "personal": ["".join([
+            f"Name: {personal['name']}\n",
+            f"Title: {personal['title']}\n",
+            f"Location: {personal['location']}\n",
+            f"Contact: {contact['email']} | {contact['phone']}\n",
+            f"LinkedIn: {contact['linkedin']}\n",
+            f"Website: {contact['website']}\n\n",
+            f"Summary: {personal['summary']}\n\n",
+        ])],
+        "skills": [
+            f"## {category.replace('_', ' ').title()}\n{', '.join(skill_list)}\n\n"
+            for category, skill_list in info["skills"].items()
+        ],
+        "experience": [
+            "".join([
+                f"## {job['role']} at {job['company']} ({job['location']})\n",
+                f"Duration: {job['duration']}\nResponsibilities:\n",
+                *_bullets(job["responsibilities"]),
+                f"Technologies: {', '.join(job['technologies'])}\n\n",
+            ])
+            for job in info["experience"]
+        ],
+        "education": [
+            "".join([
+                f"## {edu['degree']} - {edu['institution']} ({edu['location']})\n",
+                f"Duration: {edu['duration']}\n",
+                f"{edu['details']}\n\n" if edu.get("details") else "\n",
+            ])
+            for edu in info["education"]
+        ],
+        "projects": [
+            "".join([
+                f"## {project['name']}\n",
+                f"Description: {project['description']}\n",
+                f"Technologies: {', '.join(project['technologies'])}\nFeatures:\n",
+                *_bullets(project["features"]),
+                f"GitHub: {project['github']}\n\n" if "github" in project else "\n",
+            ])
+            for project in info["projects"]
+        ],
+    }
+
+    ai_journey = info["ai_journey"]
+    records["ai_journey"] = ["".join([
+        "## Current Focus\n", *_bullets(ai_journey["current_focus"]),
+        "\n## Learning Path\n", *_bullets(ai_journey["learning_path"]),
+        "\n## AI Interests\n", *_bullets(ai_journey["interests"]),
+        "\n## Next Steps in AI\n", *_bullets(ai_journey["next_steps"], end="\n\n"),
+    ])]
+
+    philosophy = info["philosophy"]
+    records["philosophy"] = ["".join([
+        "## Approach to Work\n", *_bullets(philosophy["approach"]),
+        "\n## Professional Strengths\n", *_bullets(philosophy["strengths"]),
+        "\n## Career Goals\n", *_bullets(philosophy["career_goals"]),
+        "\n## Personal Passions\n", *_bullets(philosophy["passions"], end="\n\n"),
+    ])]
+
+    return records
+
+def join_portfolio_records(records: Dict[str, List[str]]) -> str:
+    """Full portfolio text from rendered records"""
+    return "".join(SECTION_TITLES[name] + "".join(records[name]) for name in SECTIONS)
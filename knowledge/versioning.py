@@ -0,0 +1,26 @@
+# knowledge/versioning.py
+import hashlib
+import json
+from functools import lru_cache
+
+from knowledge.portfolio_data import PORTFOLIO_INFO
+
+
+def compute_version(data) -> str:
+    """
+    Compute a short, stable content hash for JSON-serializable data
+
+    Args:
+        data: Data to hash
+
+    Returns:
+        Hex digest identifying this exact content
+    """
+    serialized = json.dumps(data, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()[:16]
+
+
+@lru_cache(maxsize=1)
+def get_portfolio_version() -> str:
+    """Version hash of PORTFOLIO_INFO, computed once per process"""
+    return compute_version(PORTFOLIO_INFO)
@@ -1,7 +1,8 @@
 # main.py
 from dotenv import load_dotenv
 
-from agents.crew import get_portfolio_crew, get_project_crew
+from agents.crew import run_crew_query
+from agents.project_resolver import resolve_project_name
 
 # Load environment variables
 load_dotenv()
@@ -21,19 +22,13 @@ def main():
             print("Goodbye!")
             break
         
-        # Determine if this is a project-specific question
-        if "project" in user_input.lower():
-            # Extract project name (this is a simplistic approach)
-            project_name = "Default Project"  # In a real app, you'd parse this
-            crew = get_project_crew(project_name, user_input)
-        else:
-            # General portfolio question
-            crew = get_portfolio_crew(user_input)
+        # Determine if this is a project-specific question (None for general portfolio questions)
+        project_name = resolve_project_name(user_input)
         
         # Process the question
         try:
             print("\nProcessing your question...\n")
-            response = crew.kickoff()
+            response = run_crew_query(user_input, project_name=project_name)
             print(f"\nResponse: {response}\n")
         except Exception as e:
             print(f"\nError: {str(e)}\n")
@@ -0,0 +1,70 @@
+# memory/bm25.py
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+def tokenize(text: str, stop_words: Optional[Set[str]] = None) -> List[str]:
+    """Lowercase word tokens, minus stop words"""
+    tokens = re.findall(r"\w+", text.lower())
+    if stop_words:
+        tokens = [token for token in tokens if token not in stop_words]
+    return tokens
+
+
+class BM25Index:
+    """
+    In-memory inverted index with Okapi BM25 scoring.
+
+    Exact terms such as technology names ("Supabase", "n8n") match directly,
+    which embeddings can miss. Scoring only visits the postings of the query
+    terms, so lookups stay well under a millisecond for the portfolio.
+    """
+    def __init__(self, texts: Iterable[str], k1: float = 1.5, b: float = 0.75, stop_words: Optional[Set[str]] = None):
+        self.k1 = k1
+        self.b = b
+        self.stop_words = stop_words
+
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.doc_lengths: List[int] = []
+        for row, text in enumerate(texts):
+            tokens = tokenize(text, stop_words)
+            self.doc_lengths.append(len(tokens))
+            for term, frequency in Counter(tokens).items():
+                self.postings.setdefault(term, []).append((row, frequency))
+
+        documents = len(self.doc_lengths)
+        self.avg_length = sum(self.doc_lengths) / documents if documents else 0.0
+        self.idf = {
+            term: math.log(1 + (documents - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def search(self, query: str, k: int = 3, allowed: Optional[Set[int]] = None) -> List[Tuple[int, float]]:
+        """
+        Rank documents for a query
+
+        Args:
+            query: Search query
+            k: Number of results
+            allowed: Optional set of rows the results are restricted to
+
+        Returns:
+            List of (row, BM25 score), best first; documents sharing no term are omitted
+        """
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query, self.stop_words)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for row, frequency in self.postings[term]:
+                if allowed is not None and row not in allowed:
+                    continue
+                length_norm = 1 - self.b + self.b * self.doc_lengths[row] / (self.avg_length or 1)
+                scores[row] = scores.get(row, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
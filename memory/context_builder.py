@@ -0,0 +1,71 @@
+# memory/context_builder.py
+import os
+from typing import Dict, List, Optional
+
+from memory.tokens import count_tokens
+
+# Token budget for conversation history in the crews' prompts
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", 800))
+
+
+def format_message(message: Dict) -> str:
+    """Format a message as it appears in the prompt"""
+    speaker = "User" if message["role"] == "user" else "Assistant"
+    return f"{speaker}: {message['content']}\n\n"
+
+def message_tokens(message: Dict) -> int:
+    """
+    Tokens of a formatted message
+
+    The count is stored on the message under "tokens" when it is added to a
+    conversation; messages loaded without one are counted once and cached
+    on the dict.
+    """
+    tokens = message.get("tokens")
+    if tokens is None:
+        tokens = count_tokens(format_message(message))
+        message["tokens"] = tokens
+    return tokens
+
+def select_history(messages: List[Dict], max_tokens: int = HISTORY_TOKEN_BUDGET) -> List[Dict]:
+    """
+    The most recent messages that fit in a token budget
+
+    Args:
+        messages: Conversation messages, oldest first
+        max_tokens: Token budget for the formatted messages
+
+    Returns:
+        Messages in conversation order; empty if not even the last one fits
+    """
+    start, total = len(messages), 0
+    while start > 0:
+        tokens = message_tokens(messages[start - 1])
+        if total + tokens > max_tokens:
+            break
+        total += tokens
+        start -= 1
+    return messages[start:]
+
+def build_history_context(messages: List[Dict], max_tokens: int = HISTORY_TOKEN_BUDGET,
+                          header: str = "Previous conversation:\n", summary: Optional[Dict] = None) -> str:
+    """
+    Pack the most recent messages into a token budget, header included
+
+    Args:
+        messages: Conversation messages, oldest first
+        max_tokens: Token budget for the whole block
+        header: Text placed before the messages
+        summary: Rolling summary of the conversation (see
+            ConversationMemory.get_summary); it replaces the messages it covers
+
+    Returns:
+        Formatted history, or "" when there is no summary and no message fits
+    """
+    if summary:
+        messages = messages[summary["covered"]:]
+        header = f"{header}Summary of earlier turns:\n{summary['text']}\n\nRecent turns:\n"
+    selected = select_history(messages, max_tokens - count_tokens(header))
+    if not selected and not summary:
+        return ""
+    return header + "".join(format_message(message) for message in selected)
@@ -0,0 +1,616 @@
+# memory/conversation_backends.py
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+
+def encode_cursor(updated_at: str, conversation_id: str) -> str:
+    """Encode a listing position as an opaque cursor"""
+    return base64.urlsafe_b64encode(f"{updated_at}|{conversation_id}".encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        updated_at, conversation_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|", 1)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    return updated_at, conversation_id
+
+
+class JsonlConversationBackend:
+    """
+    Stores each conversation as an append-only JSONL log (one message per line).
+
+    Legacy ``<id>.json`` files are still read and are folded into the log the
+    first time the conversation is loaded; torn lines left by a crash are
+    dropped the same way.
+
+    Logs of recently active conversations stay open for appending, at most
+    ``max_open_files`` of them; the least recently used one is fsynced and
+    closed to make room for another.
+    """
+    def __init__(self, storage_path: str = "./data/conversations", fsync_batch: int = 16,
+                 fsync_interval: float = 1.0, max_open_files: int = 64):
+        self.storage_path = storage_path
+
+        # Appends are fsynced every `fsync_batch` messages or `fsync_interval` seconds
+        self.fsync_batch = fsync_batch
+        self.fsync_interval = fsync_interval
+        self.max_open_files = max(1, max_open_files)
+        self._log_files = OrderedDict()
+
+        # Create storage directory if it doesn't exist
+        os.makedirs(storage_path, exist_ok=True)
+
+    def _log_path(self, conversation_id: str) -> str:
+        return os.path.join(self.storage_path, f"{conversation_id}.jsonl")
+
+    def _legacy_path(self, conversation_id: str) -> str:
+        return os.path.join(self.storage_path, f"{conversation_id}.json")
+
+    def _summary_path(self, conversation_id: str) -> str:
+        return os.path.join(self.storage_path, "summaries", f"{conversation_id}.json")
+
+    def load(self, conversation_id: str, compact: bool = True) -> Optional[List[Dict]]:
+        """
+        Load a conversation from its legacy JSON file and/or JSONL log
+
+        Args:
+            conversation_id: Unique identifier for the conversation
+            compact: Rewrite legacy or damaged files as a clean log
+
+        Returns:
+            List of message dictionaries, or None if nothing is stored
+        """
+        legacy_path = self._legacy_path(conversation_id)
+        log_path = self._log_path(conversation_id)
+
+        if not os.path.exists(legacy_path) and not os.path.exists(log_path):
+            return None
+
+        conversation = []
+        needs_compaction = False
+
+        if os.path.exists(legacy_path):
+            try:
+                with open(legacy_path, 'r') as f:
+                    conversation.extend(json.load(f))
+                needs_compaction = True
+            except Exception as e:
+                print(f"Error loading conversation {conversation_id}: {str(e)}")
+                return None
+
+        if os.path.exists(log_path):
+            try:
+                with open(log_path, 'r') as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        try:
+                            conversation.append(json.loads(line))
+                        except json.JSONDecodeError:
+                            # Torn write from a crash; drop it and rewrite the log
+                            needs_compaction = True
+            except Exception as e:
+                print(f"Error loading conversation {conversation_id}: {str(e)}")
+                return None
+
+        if needs_compaction and compact:
+            self.save(conversation_id, conversation)
+
+        return conversation
+
+    def append(self, conversation_id: str, message: Dict) -> bool:
+        """
+        Append a single message to the conversation log
+
+        Args:
+            conversation_id: Unique identifier for the conversation
+            message: Message dictionary to append
+
+        Returns:
+            bool: True if successful
+
+        Raises:
+            OSError: If the message could not be written
+        """
+        try:
+            log = self._log_files.get(conversation_id)
+            if log is not None:
+                self._log_files.move_to_end(conversation_id)
+            else:
+                # Stay within the open file budget
+                while len(self._log_files) >= self.max_open_files:
+                    self.release(next(iter(self._log_files)))
+
+                log_file = open(self._log_path(conversation_id), 'a+b')
+
+                # Never continue a torn last line
+                if log_file.tell() > 0:
+                    log_file.seek(-1, os.SEEK_END)
+                    if log_file.read(1) != b"\n":
+                        log_file.write(b"\n")
+
+                log = {"file": log_file, "pending": 0, "last_sync": time.monotonic()}
+                self._log_files[conversation_id] = log
+
+            log["file"].write((json.dumps(message) + "\n").encode("utf-8"))
+            log["file"].flush()
+            log["pending"] += 1
+
+            # Batch fsyncs instead of paying for one per message
+            if (log["pending"] >= self.fsync_batch
+                    or time.monotonic() - log["last_sync"] >= self.fsync_interval):
+                os.fsync(log["file"].fileno())
+                log["pending"] = 0
+                log["last_sync"] = time.monotonic()
+            return True
+        except Exception as e:
+            print(f"Error saving conversation {conversation_id}: {str(e)}")
+            # Reopen the log on the next append instead of reusing a broken handle
+            try:
+                self.release(conversation_id)
+            except Exception:
+                pass
+            raise
+
+    def save(self, conversation_id: str, conversation: List[Dict]) -> bool:
+        """
+        Save a full conversation, replacing its log atomically and removing
+        any legacy JSON file
+
+        Args:
+            conversation_id: Unique identifier for the conversation
+            conversation: All messages of the conversation
+
+        Returns:
+            bool: True if successful
+        """
+        self.release(conversation_id)
+
+        log_path = self._log_path(conversation_id)
+        tmp_path = f"{log_path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                for message in conversation:
+                    f.write(json.dumps(message) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, log_path)
+
+            legacy_path = self._legacy_path(conversation_id)
+            if os.path.exists(legacy_path):
+                os.remove(legacy_path)
+            return True
+        except Exception as e:
+            print(f"Error saving conversation {conversation_id}: {str(e)}")
+            return False
+
+    def delete(self, conversation_id: str) -> bool:
+        """
+        Delete a conversation
+
+        Args:
+            conversation_id: Unique identifier for the conversation
+
+        Returns:
+            bool: True if something was deleted
+        """
+        self.release(conversation_id)
+
+        summary_path = self._summary_path(conversation_id)
+        if os.path.exists(summary_path):
+            os.remove(summary_path)
+
+        deleted = False
+        for conversation_path in [self._log_path(conversation_id), self._legacy_path(conversation_id)]:
+            if os.path.exists(conversation_path):
+                try:
+                    os.remove(conversation_path)
+                    deleted = True
+                except Exception as e:
+                    print(f"Error deleting conversation {conversation_id}: {str(e)}")
+                    return False
+        return deleted
+
+    def get_messages(self, conversation_id: str, start: int = 0, end: Optional[int] = None) -> List[Dict]:
+        """Get the messages ``start:end`` of a conversation"""
+        return (self.load(conversation_id) or [])[start:end]
+
+    def load_summary(self, conversation_id: str) -> Optional[Dict]:
+        """Load the rolling summary of a conversation, or None"""
+        try:
+            with open(self._summary_path(conversation_id), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error loading summary of conversation {conversation_id}: {str(e)}")
+            return None
+
+    def save_summary(self, conversation_id: str, summary: Dict) -> bool:
+        """Replace the rolling summary of a conversation atomically"""
+        summary_path = self._summary_path(conversation_id)
+        tmp_path = f"{summary_path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(summary_path), exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                json.dump(summary, f)
+            os.replace(tmp_path, summary_path)
+            return True
+        except Exception as e:
+            print(f"Error saving summary of conversation {conversation_id}: {str(e)}")
+            return False
+
+    def list_conversations(self, limit: int = 50, cursor: Optional[str] = None) -> Dict:
+        """
+        List conversations, most recently updated first
+
+        This backend has no index, so it scans the storage directory.
+
+        Args:
+            limit: Maximum number of conversations to return
+            cursor: Cursor from a previous page
+
+        Returns:
+            Dictionary with the conversations and the cursor of the next page
+        """
+        entries = {}
+        for filename in os.listdir(self.storage_path):
+            conversation_id, extension = os.path.splitext(filename)
+            if extension not in [".json", ".jsonl"]:
+                continue
+            updated_at = datetime.fromtimestamp(
+                os.path.getmtime(os.path.join(self.storage_path, filename))
+            ).isoformat()
+            entries[conversation_id] = max(updated_at, entries.get(conversation_id, ""))
+
+        ordered = sorted(((updated_at, cid) for cid, updated_at in entries.items()), reverse=True)
+        if cursor:
+            position = decode_cursor(cursor)
+            ordered = [entry for entry in ordered if entry < position]
+
+        page = ordered[:limit]
+        conversations = []
+        for updated_at, conversation_id in page:
+            conversations.append({
+                "conversation_id": conversation_id,
+                "updated_at": updated_at,
+                "message_count": len(self.load(conversation_id, compact=False) or [])
+            })
+
+        next_cursor = encode_cursor(*page[-1]) if len(ordered) > limit else None
+        return {"conversations": conversations, "next_cursor": next_cursor}
+
+    def compact_all(self) -> int:
+        """
+        Fold every remaining legacy JSON conversation into its log
+
+        Returns:
+            Number of conversations compacted
+        """
+        compacted = 0
+        for filename in os.listdir(self.storage_path):
+            if filename.endswith(".json"):
+                # Loading a legacy conversation compacts it
+                if self.load(filename[:-len(".json")]) is not None:
+                    compacted += 1
+        return compacted
+
+    def release(self, conversation_id: str) -> None:
+        """Fsync and close the open log file of a conversation"""
+        log = self._log_files.pop(conversation_id, None)
+        if log is None:
+            return
+        try:
+            if log["pending"]:
+                log["file"].flush()
+                os.fsync(log["file"].fileno())
+        finally:
+            log["file"].close()
+
+    def close(self) -> None:
+        """Fsync and close all open conversation logs"""
+        for conversation_id in list(self._log_files):
+            self.release(conversation_id)
+
+
+class SQLiteConversationBackend:
+    """
+    Stores conversations in a SQLite database in WAL mode.
+
+    Conversations are indexed by ID and last update time, so listing is a
+    cursor-paginated index scan and message ranges are primary-key lookups.
+    """
+    def __init__(self, db_path: str = "./data/conversations.db"):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # In WAL mode NORMAL only fsyncs at checkpoints, batching disk syncs
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    def _create_schema(self) -> None:
+        with self._lock:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS conversations (
+                    conversation_id TEXT PRIMARY KEY,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    message_count INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS idx_conversations_updated
+                    ON conversations (updated_at, conversation_id);
+                CREATE TABLE IF NOT EXISTS messages (
+                    conversation_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    role TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    timestamp TEXT NOT NULL,
+                    tokens INTEGER,
+                    PRIMARY KEY (conversation_id, seq)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS idx_messages_timestamp
+                    ON messages (timestamp);
+                CREATE TABLE IF NOT EXISTS summaries (
+                    conversation_id TEXT PRIMARY KEY,
+                    text TEXT NOT NULL,
+                    covered INTEGER NOT NULL,
+                    updated_at TEXT NOT NULL
+                );
+            """)
+            # Databases created before token counts were stored
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(messages)")}
+            if "tokens" not in columns:
+                self._conn.execute("ALTER TABLE messages ADD COLUMN tokens INTEGER")
+
+    @staticmethod
+    def _row_to_message(row) -> Dict:
+        message = {"role": row["role"], "content": row["content"], "timestamp": row["timestamp"]}
+        if row["tokens"] is not None:
+            message["tokens"] = row["tokens"]
+        return message
+
+    def _insert_messages(self, conversation_id: str, messages: List[Dict], first_seq: int) -> None:
+        """Insert messages and update the conversation row (caller holds the lock and a transaction)"""
+        self._conn.executemany(
+            "INSERT INTO messages (conversation_id, seq, role, content, timestamp, tokens) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (conversation_id, first_seq + i, m["role"], m["content"], m.get("timestamp") or datetime.now().isoformat(), m.get("tokens"))
+                for i, m in enumerate(messages)
+            ]
+        )
+        timestamps = [m.get("timestamp") or datetime.now().isoformat() for m in messages]
+        self._conn.execute(
+            """
+            INSERT INTO conversations (conversation_id, created_at, updated_at, message_count)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (conversation_id) DO UPDATE SET
+                updated_at = MAX(updated_at, excluded.updated_at),
+                message_count = message_count + excluded.message_count
+            """,
+            (conversation_id, min(timestamps), max(timestamps), len(messages))
+        )
+
+    def load(self, conversation_id: str) -> Optional[List[Dict]]:
+        """Load all messages of a conversation, or None if it does not exist"""
+        with self._lock:
+            exists = self._conn.execute(
+                "SELECT 1 FROM conversations WHERE conversation_id = ?", (conversation_id,)
+            ).fetchone()
+            if not exists:
+                return None
+            rows = self._conn.execute(
+                "SELECT role, content, timestamp, tokens FROM messages WHERE conversation_id = ? ORDER BY seq",
+                (conversation_id,)
+            ).fetchall()
+        return [self._row_to_message(row) for row in rows]
+
+    def append(self, conversation_id: str, message: Dict) -> bool:
+        """Append a message to a conversation; raises if it could not be stored"""
+        try:
+            with self._lock:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    row = self._conn.execute(
+                        "SELECT message_count FROM conversations WHERE conversation_id = ?",
+                        (conversation_id,)
+                    ).fetchone()
+                    self._insert_messages(conversation_id, [message], row["message_count"] if row else 0)
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+            return True
+        except Exception as e:
+            print(f"Error saving conversation {conversation_id}: {str(e)}")
+            raise
+
+    def save(self, conversation_id: str, conversation: List[Dict]) -> bool:
+        """Replace all messages of a conversation"""
+        try:
+            with self._lock:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    self._conn.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
+                    self._conn.execute("DELETE FROM conversations WHERE conversation_id = ?", (conversation_id,))
+                    if conversation:
+                        self._insert_messages(conversation_id, conversation, 0)
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+            return True
+        except Exception as e:
+            print(f"Error saving conversation {conversation_id}: {str(e)}")
+            return False
+
+    def delete(self, conversation_id: str) -> bool:
+        """Delete a conversation, returning True if it existed"""
+        try:
+            with self._lock:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    self._conn.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
+                    self._conn.execute("DELETE FROM summaries WHERE conversation_id = ?", (conversation_id,))
+                    deleted = self._conn.execute(
+                        "DELETE FROM conversations WHERE conversation_id = ?", (conversation_id,)
+                    ).rowcount
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+            return deleted > 0
+        except Exception as e:
+            print(f"Error deleting conversation {conversation_id}: {str(e)}")
+            return False
+
+    def get_messages(self, conversation_id: str, start: int = 0, end: Optional[int] = None) -> List[Dict]:
+        """Get the messages ``start:end`` of a conversation (non-negative indices)"""
+        end = end if end is not None else 2 ** 62
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT role, content, timestamp, tokens FROM messages
+                WHERE conversation_id = ? AND seq >= ? AND seq < ?
+                ORDER BY seq
+                """,
+                (conversation_id, start, end)
+            ).fetchall()
+        return [self._row_to_message(row) for row in rows]
+
+    def load_summary(self, conversation_id: str) -> Optional[Dict]:
+        """Load the rolling summary of a conversation, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text, covered, updated_at FROM summaries WHERE conversation_id = ?",
+                (conversation_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def save_summary(self, conversation_id: str, summary: Dict) -> bool:
+        """Replace the rolling summary of a conversation"""
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO summaries (conversation_id, text, covered, updated_at) VALUES (?, ?, ?, ?)",
+                    (conversation_id, summary["text"], summary["covered"], summary["updated_at"])
+                )
+            return True
+        except Exception as e:
+            print(f"Error saving summary of conversation {conversation_id}: {str(e)}")
+            return False
+
+    def list_conversations(self, limit: int = 50, cursor: Optional[str] = None) -> Dict:
+        """
+        List conversations, most recently updated first
+
+        Args:
+            limit: Maximum number of conversations to return
+            cursor: Cursor from a previous page
+
+        Returns:
+            Dictionary with the conversations and the cursor of the next page
+        """
+        query = "SELECT conversation_id, created_at, updated_at, message_count FROM conversations"
+        params = []
+        if cursor:
+            query += " WHERE (updated_at, conversation_id) < (?, ?)"
+            params.extend(decode_cursor(cursor))
+        query += " ORDER BY updated_at DESC, conversation_id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        conversations = [dict(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = conversations[-1]
+            next_cursor = encode_cursor(last["updated_at"], last["conversation_id"])
+        return {"conversations": conversations, "next_cursor": next_cursor}
+
+    def import_json_files(self, storage_path: str = "./data/conversations") -> int:
+        """
+        Bulk import conversations stored as JSON or JSONL files
+
+        Conversations that already exist in the database are skipped.
+
+        Args:
+            storage_path: Directory with ``<id>.json`` / ``<id>.jsonl`` files
+
+        Returns:
+            Number of conversations imported
+        """
+        source = JsonlConversationBackend(storage_path)
+        conversation_ids = sorted({
+            os.path.splitext(filename)[0]
+            for filename in os.listdir(storage_path)
+            if filename.endswith((".json", ".jsonl"))
+        })
+
+        imported = 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for conversation_id in conversation_ids:
+                    exists = self._conn.execute(
+                        "SELECT 1 FROM conversations WHERE conversation_id = ?", (conversation_id,)
+                    ).fetchone()
+                    if exists:
+                        continue
+                    conversation = source.load(conversation_id, compact=False)
+                    if conversation:
+                        self._insert_messages(conversation_id, conversation, 0)
+                        imported += 1
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return imported
+
+    def compact_all(self) -> int:
+        """Nothing to compact; SQLite manages its own storage"""
+        return 0
+
+    def release(self, conversation_id: str) -> None:
+        """Nothing to release per conversation"""
+
+    def close(self) -> None:
+        """Checkpoint the WAL and close the database"""
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.close()
+
+
+def create_conversation_backend(backend: str = "jsonl", storage_path: str = "./data/conversations",
+                                db_path: Optional[str] = None, max_open_files: int = 64):
+    """
+    Create a conversation storage backend
+
+    Args:
+        backend: 'jsonl' (files) or 'sqlite'
+        storage_path: Directory for JSONL files
+        db_path: SQLite database file (defaults to ``<storage_path>.db``)
+        max_open_files: JSONL logs kept open for appending
+
+    Returns:
+        Backend instance
+    """
+    if backend == "jsonl":
+        return JsonlConversationBackend(storage_path, max_open_files=max_open_files)
+    elif backend == "sqlite":
+        return SQLiteConversationBackend(db_path or f"{storage_path.rstrip('/')}.db")
+    else:
+        raise ValueError(f"Unsupported conversation backend: {backend}")
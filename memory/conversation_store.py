@@ -1,21 +1,127 @@
 # memory/conversation_store.py
-import json
-import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+from memory.context_builder import build_history_context, message_tokens
+from memory.conversation_backends import JsonlConversationBackend
+from memory.summarizer import summarize_messages
+
+# Rough per-message bookkeeping overhead (dict, role, timestamp) in bytes
+MESSAGE_OVERHEAD_BYTES = 200
 
 
 class ConversationMemory:
     """
     A class to store and manage conversation history with the portfolio AI
+    
+    Persistence is delegated to a storage backend: append-only JSONL files
+    (the default, see JsonlConversationBackend) or SQLite
+    (SQLiteConversationBackend).
+    
+    Hot conversations are kept in an LRU cache bounded by total message count
+    and approximate size in bytes. All public methods are thread-safe, so one
+    instance can be shared by the whole process.
+    
+    Older turns are folded into a rolling summary every `summary_every`
+    messages by a background thread, keeping the last `recent_messages`
+    verbatim. The summary is stored next to the conversation by the backend.
     """
-    def __init__(self, storage_path: str = "./data/conversations"):
+    def __init__(
+        self,
+        storage_path: str = "./data/conversations",
+        backend=None,
+        max_cached_messages: int = 10000,
+        max_cached_bytes: int = 64 * 1024 * 1024,
+        summarizer=None,
+        summary_every: int = 10,
+        recent_messages: int = 6
+    ):
         self.storage_path = storage_path
-        self.in_memory_conversations = {}
+        self.backend = backend or JsonlConversationBackend(storage_path)
+        self.in_memory_conversations = OrderedDict()
+        
+        # LRU bounds and bookkeeping for the hot cache
+        self.max_cached_messages = max_cached_messages
+        self.max_cached_bytes = max_cached_bytes
+        self._cached_sizes = {}
+        self._cached_messages = 0
+        self._cached_bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._lock = threading.RLock()
         
-        # Create storage directory if it doesn't exist
-        os.makedirs(storage_path, exist_ok=True)
+        # Rolling summaries (0 disables them); cached for hot conversations only
+        self.summarizer = summarizer or summarize_messages
+        self.summary_every = summary_every
+        self.recent_messages = recent_messages
+        self._summaries = {}
+        self._summaries_pending = set()
+        self._summary_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="conversation-summary")
+        self._closed = False
+    
+    @staticmethod
+    def _message_bytes(message: Dict) -> int:
+        return len(message.get("content", "").encode("utf-8")) + MESSAGE_OVERHEAD_BYTES
+    
+    def _cache_conversation(self, conversation_id: str, conversation: List[Dict]) -> None:
+        """Insert a conversation into the hot cache as most recently used"""
+        self._uncache_conversation(conversation_id)
+        size = sum(self._message_bytes(message) for message in conversation)
+        self.in_memory_conversations[conversation_id] = conversation
+        self._cached_sizes[conversation_id] = [len(conversation), size]
+        self._cached_messages += len(conversation)
+        self._cached_bytes += size
+        self._evict()
+    
+    def _uncache_conversation(self, conversation_id: str) -> None:
+        """Drop a conversation from the hot cache and release its backend resources"""
+        if conversation_id in self.in_memory_conversations:
+            del self.in_memory_conversations[conversation_id]
+            messages, size = self._cached_sizes.pop(conversation_id)
+            self._cached_messages -= messages
+            self._cached_bytes -= size
+        self._summaries.pop(conversation_id, None)
+        self.backend.release(conversation_id)
     
+    def _evict(self) -> None:
+        """Evict least recently used conversations until the cache is within bounds"""
+        # Always keep the most recently used conversation, even if it alone is too big
+        while len(self.in_memory_conversations) > 1 and (
+            self._cached_messages > self.max_cached_messages
+            or self._cached_bytes > self.max_cached_bytes
+        ):
+            conversation_id = next(iter(self.in_memory_conversations))
+            self._uncache_conversation(conversation_id)
+            self._stats["evictions"] += 1
+    
+    def _get_cached_conversation(self, conversation_id: str, create: bool = False) -> Optional[List[Dict]]:
+        """
+        Get the cached message list of a conversation, loading it from storage if needed
+        
+        Args:
+            conversation_id: Unique identifier for the conversation
+            create: Start an empty conversation if none is stored
+            
+        Returns:
+            The cached list (not a copy), or None if not found and not created
+        """
+        conversation = self.in_memory_conversations.get(conversation_id)
+        if conversation is not None:
+            self.in_memory_conversations.move_to_end(conversation_id)
+            self._stats["hits"] += 1
+            return conversation
+        
+        self._stats["misses"] += 1
+        conversation = self.backend.load(conversation_id)
+        if conversation is None:
+            if not create:
+                return None
+            conversation = []
+        
+        self._cache_conversation(conversation_id, conversation)
+        return conversation
     
     def add_message(self, conversation_id: str, role: str, content: str) -> bool:
         """
@@ -28,6 +134,11 @@ class ConversationMemory:
             
         Returns:
             bool: True if successful
+
+        Raises:
+            ValueError: If the role is invalid
+            Exception: Whatever the storage backend raised when the message
+                could not be stored; the message is then not added
         """
         # Validate inputs
         if role not in ["user", "assistant"]:
@@ -52,16 +163,30 @@ class ConversationMemory:
             "timestamp": timestamp
         }
         
-        # Add to in-memory store
-        if conversation_id not in self.in_memory_conversations:
-            self.in_memory_conversations[conversation_id] = []
+        # Count tokens once, when stored, for the prompt context builder
+        message_tokens(message)
         
-        self.in_memory_conversations[conversation_id].append(message)
-        
-        # Persist to disk
-        self._save_conversation(conversation_id)
-        
-        return True
+        with self._lock:
+            # Load existing history so the in-memory copy is complete
+            conversation = self._get_cached_conversation(conversation_id, create=True)
+            
+            # Persist first, so a failed write leaves no unsaved message in the cache
+            saved = self.backend.append(conversation_id, message)
+            
+            conversation.append(message)
+            sizes = self._cached_sizes[conversation_id]
+            sizes[0] += 1
+            sizes[1] += self._message_bytes(message)
+            self._cached_messages += 1
+            self._cached_bytes += self._message_bytes(message)
+            
+            # Fold older turns into the summary without blocking the request
+            if not self._closed and self._summary_due(conversation_id, len(conversation)):
+                self._summaries_pending.add(conversation_id)
+                self._summary_executor.submit(self._refresh_summary, conversation_id)
+            
+            self._evict()
+            return saved
     
     def get_conversation(self, conversation_id: str) -> List[Dict]:
         """
@@ -71,27 +196,14 @@ class ConversationMemory:
             conversation_id: Unique identifier for the conversation
             
         Returns:
-            List of message dictionaries
+            List of message dictionaries (a copy, safe to keep across calls)
         """
-        # Check in-memory cache first
-        if conversation_id in self.in_memory_conversations:
-            return self.in_memory_conversations[conversation_id]
-        
-        # Try to load from disk
-        conversation_path = os.path.join(self.storage_path, f"{conversation_id}.json")
-        if os.path.exists(conversation_path):
-            try:
-                with open(conversation_path, 'r') as f:
-                    conversation = json.load(f)
-                
-                # Cache in memory
-                self.in_memory_conversations[conversation_id] = conversation
-                return conversation
-            except Exception as e:
-                print(f"Error loading conversation {conversation_id}: {str(e)}")
-        
-        # Return empty list if not found
-        return []
+        with self._lock:
+            # Check in-memory cache first, then disk
+            conversation = self._get_cached_conversation(conversation_id)
+            
+            # Return empty list if not found
+            return list(conversation) if conversation is not None else []
     
     def get_conversation_summary(self, conversation_id: str, max_length: int = 3) -> str:
         """
@@ -120,6 +232,66 @@ class ConversationMemory:
         
         return summary
     
+    def _get_summary(self, conversation_id: str) -> Dict:
+        """Stored summary of a conversation, or an empty one (caller holds the lock)"""
+        summary = self._summaries.get(conversation_id)
+        if summary is None:
+            summary = self.backend.load_summary(conversation_id) or {"text": "", "covered": 0, "updated_at": None}
+            if conversation_id in self.in_memory_conversations:
+                self._summaries[conversation_id] = summary
+        return summary
+    
+    def _summary_due(self, conversation_id: str, length: int) -> bool:
+        """Whether enough messages have aged out of the recent turns to refresh the summary"""
+        if self.summary_every <= 0 or conversation_id in self._summaries_pending:
+            return False
+        covered = self._get_summary(conversation_id)["covered"]
+        return length - self.recent_messages - covered >= self.summary_every
+    
+    def _refresh_summary(self, conversation_id: str) -> None:
+        """Fold the messages that left the recent turns into the summary (background thread)"""
+        try:
+            with self._lock:
+                conversation = self._get_cached_conversation(conversation_id)
+                if conversation is None:
+                    return
+                summary = self._get_summary(conversation_id)
+                covered = len(conversation) - self.recent_messages
+                messages = conversation[summary["covered"]:covered]
+            if not messages:
+                return
+            
+            # Summarize outside the lock; requests keep using the previous summary
+            text = self.summarizer(summary["text"], messages)
+            
+            with self._lock:
+                # Skip conversations deleted in the meantime
+                if self._get_cached_conversation(conversation_id) is None:
+                    return
+                updated = {"text": text, "covered": covered, "updated_at": datetime.now().isoformat()}
+                if self.backend.save_summary(conversation_id, updated) and conversation_id in self.in_memory_conversations:
+                    self._summaries[conversation_id] = updated
+        except Exception as e:
+            print(f"Error summarizing conversation {conversation_id}: {str(e)}")
+        finally:
+            with self._lock:
+                self._summaries_pending.discard(conversation_id)
+    
+    def get_summary(self, conversation_id: str) -> Optional[Dict]:
+        """
+        Get the rolling summary of a conversation's older turns
+        
+        Args:
+            conversation_id: Unique identifier for the conversation
+            
+        Returns:
+            Dictionary with "text", "covered" (number of leading messages it
+            summarizes) and "updated_at", or None if there is no summary yet
+        """
+        with self._lock:
+            summary = self._get_summary(conversation_id)
+            return dict(summary) if summary["covered"] else None
+    
     def delete_conversation(self, conversation_id: str) -> bool:
         """
         Delete a conversation
@@ -130,44 +302,100 @@ class ConversationMemory:
         Returns:
             bool: True if successful
         """
-        # Remove from memory if present
-        if conversation_id in self.in_memory_conversations:
-            del self.in_memory_conversations[conversation_id]
+        with self._lock:
+            # Remove from memory if present
+            self._uncache_conversation(conversation_id)
+            
+            # Remove from storage; False if not found
+            return self.backend.delete(conversation_id)
+    
+    def compact(self, conversation_id: str) -> bool:
+        """
+        Rewrite a conversation in storage from its full message list
         
-        # Remove from disk if present
-        conversation_path = os.path.join(self.storage_path, f"{conversation_id}.json")
-        if os.path.exists(conversation_path):
-            try:
-                os.remove(conversation_path)
-                return True
-            except Exception as e:
-                print(f"Error deleting conversation {conversation_id}: {str(e)}")
+        For the JSONL backend this folds a legacy JSON file into the log and
+        drops torn lines.
+        
+        Args:
+            conversation_id: Unique identifier for the conversation
+            
+        Returns:
+            bool: True if successful
+        """
+        with self._lock:
+            conversation = self._get_cached_conversation(conversation_id)
+            if conversation is None:
                 return False
+            return self.backend.save(conversation_id, conversation)
+    
+    def compact_all(self) -> int:
+        """
+        Compact every stored conversation that still needs it
         
-        # Return False if not found
-        return False
+        Returns:
+            Number of conversations compacted
+        """
+        with self._lock:
+            return self.backend.compact_all()
     
-    def _save_conversation(self, conversation_id: str) -> bool:
+    def get_messages(self, conversation_id: str, start: int = 0, end: Optional[int] = None) -> List[Dict]:
         """
-        Save a conversation to disk
+        Get a range of messages from a conversation
         
         Args:
             conversation_id: Unique identifier for the conversation
+            start: Index of the first message
+            end: Index after the last message (None for the end)
             
         Returns:
-            bool: True if successful
+            List of message dictionaries
         """
-        if conversation_id not in self.in_memory_conversations:
-            return False
+        with self._lock:
+            conversation = self.in_memory_conversations.get(conversation_id)
+            if conversation is not None:
+                return conversation[start:end]
+            return self.backend.get_messages(conversation_id, start, end)
+    
+    def list_conversations(self, limit: int = 50, cursor: Optional[str] = None) -> Dict:
+        """
+        List stored conversations, most recently updated first
         
-        conversation_path = os.path.join(self.storage_path, f"{conversation_id}.json")
-        try:
-            with open(conversation_path, 'w') as f:
-                json.dump(self.in_memory_conversations[conversation_id], f, indent=2)
-            return True
-        except Exception as e:
-            print(f"Error saving conversation {conversation_id}: {str(e)}")
-            return False
+        Args:
+            limit: Maximum number of conversations to return
+            cursor: Cursor returned by the previous page
+            
+        Returns:
+            Dictionary with "conversations" and "next_cursor"
+        """
+        with self._lock:
+            return self.backend.list_conversations(limit=limit, cursor=cursor)
+    
+    def close(self) -> None:
+        """Finish pending summaries, then flush and close the storage backend"""
+        # No new summaries from here on; pending ones need the lock, so wait
+        # for them before taking it again
+        with self._lock:
+            self._closed = True
+        self._summary_executor.shutdown(wait=True)
+        with self._lock:
+            self.backend.close()
+    
+    def get_cache_stats(self) -> Dict:
+        """
+        Get hot cache statistics
+        
+        Returns:
+            Dictionary with cache size, limits and hit/miss/eviction counters
+        """
+        with self._lock:
+            return {
+                "cached_conversations": len(self.in_memory_conversations),
+                "cached_messages": self._cached_messages,
+                "cached_bytes": self._cached_bytes,
+                "max_cached_messages": self.max_cached_messages,
+                "max_cached_bytes": self.max_cached_bytes,
+                **self._stats
+            }
 
     def format_for_context(self, conversation_id: str, max_tokens: int = 1000) -> str:
         """
@@ -175,34 +403,12 @@ class ConversationMemory:
         
         Args:
             conversation_id: Unique identifier for the conversation
-            max_tokens: Approximate maximum tokens to include
+            max_tokens: Maximum tokens to include, header included
             
         Returns:
             Formatted string suitable for LLM context
         """
         conversation = self.get_conversation(conversation_id)
         
-        if not conversation:
-            return ""
-        
-        # Format for LLM context
-        formatted = "# Previous Conversation:\n\n"
-        
-        # Start from the most recent and work backwards until we hit the token limit
-        # This is a very rough approximation of tokens
-        total_chars = 0
-        messages_to_include = []
-        
-        for msg in reversed(conversation):
-            msg_text = f"{msg['role'].title()}: {msg['content']}\n\n"
-            msg_chars = len(msg_text)
-            
-            # Very rough approximation: 4 chars ≈ 1 token
-            if total_chars + msg_chars > max_tokens * 4:
-                break
-                
-            messages_to_include.insert(0, msg_text)
-            total_chars += msg_chars
-        
-        formatted += "".join(messages_to_include)
-        return formatted
\ No newline at end of file
+        # The most recent messages that fit in the token budget
+        return build_history_context(conversation, max_tokens, header="# Previous Conversation:\n\n")
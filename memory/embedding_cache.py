@@ -0,0 +1,195 @@
+# memory/embedding_cache.py
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+
+import numpy as np
+
+# SQLite limits the number of bound parameters per statement
+LOOKUP_BATCH = 500
+
+
+def text_hash(text: str) -> str:
+    """SHA-256 of a text, used as its cache key"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings:
+    """
+    Embeddings wrapper that never computes the same embedding twice.
+
+    Vectors are stored in SQLite keyed by (model, text hash), so they survive
+    restarts and are shared between processes. Cache misses of a call are
+    de-duplicated and sent to the wrapped model in batches, and recent query
+    embeddings are also kept in an in-memory LRU.
+    """
+    def __init__(
+        self,
+        embeddings,
+        model_name: str,
+        db_path: str = "./data/embeddings/cache.sqlite",
+        batch_size: int = 64,
+        query_cache_size: int = 256
+    ):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.query_cache_size = query_cache_size
+
+        self._queries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "batches": 0}
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            ) WITHOUT ROWID
+        """)
+
+    def _load(self, hashes: List[str]) -> Dict[str, List[float]]:
+        """Fetch stored vectors for a list of text hashes"""
+        found = {}
+        for i in range(0, len(hashes), LOOKUP_BATCH):
+            batch = hashes[i:i + LOOKUP_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [self.model_name, *batch]
+                ).fetchall()
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return found
+
+    def _store(self, vectors: Dict[str, List[float]]) -> None:
+        rows = [
+            (self.model_name, key, np.asarray(vector, dtype=np.float32).tobytes())
+            for key, vector in vectors.items()
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)", rows
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed a list of texts, computing only the ones not cached yet
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            One vector per text, in order
+        """
+        hashes = [text_hash(text) for text in texts]
+        vectors = self._load(list(set(hashes)))
+
+        # Each distinct missing text is embedded once, in batches
+        missing = {}
+        for key, text in zip(hashes, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+
+        with self._lock:
+            self._stats["disk_hits"] += len(texts) - sum(1 for key in hashes if key in missing)
+            self._stats["misses"] += len(missing)
+
+        missing_items = list(missing.items())
+        for i in range(0, len(missing_items), self.batch_size):
+            batch = missing_items[i:i + self.batch_size]
+            computed = self.embeddings.embed_documents([text for _, text in batch])
+            new_vectors = {key: list(vector) for (key, _), vector in zip(batch, computed)}
+            self._store(new_vectors)
+            vectors.update(new_vectors)
+            with self._lock:
+                self._stats["batches"] += 1
+
+        return [vectors[key] for key in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a single query, checking the in-memory LRU and the disk cache first
+
+        Args:
+            text: Query text
+
+        Returns:
+            The embedding vector
+        """
+        return self.embed_queries([text])[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed several queries, checking the in-memory LRU first
+
+        Queries missing from the LRU are looked up on disk in one query, and
+        only the ones not stored there are embedded (with ``embed_query``).
+
+        Args:
+            texts: Query texts
+
+        Returns:
+            One vector per query, in order
+        """
+        hashes = [text_hash(text) for text in texts]
+        vectors = {}
+        with self._lock:
+            for key in hashes:
+                vector = self._queries.get(key)
+                if vector is not None:
+                    self._queries.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    vectors[key] = vector
+
+        missing = {key: text for key, text in zip(hashes, texts) if key not in vectors}
+        if missing:
+            found = self._load(list(missing))
+            computed = {
+                key: list(self.embeddings.embed_query(text))
+                for key, text in missing.items() if key not in found
+            }
+            if computed:
+                self._store(computed)
+            with self._lock:
+                self._stats["disk_hits"] += len(found)
+                self._stats["misses"] += len(computed)
+                for key in missing:
+                    vectors[key] = self._queries[key] = found.get(key) or computed[key]
+                while len(self._queries) > self.query_cache_size:
+                    self._queries.popitem(last=False)
+
+        return [vectors[key] for key in hashes]
+
+    def get_stats(self) -> Dict:
+        """
+        Get cache statistics
+
+        Returns:
+            Dictionary with hit/miss counters and stored vector count
+        """
+        with self._lock:
+            stored = self._conn.execute(
+                "SELECT COUNT(*) FROM embeddings WHERE model = ?", (self.model_name,)
+            ).fetchone()[0]
+            return {"model": self.model_name, "stored": stored, **self._stats}
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
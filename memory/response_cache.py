@@ -0,0 +1,113 @@
+# memory/response_cache.py
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query for cache lookups (case, punctuation and spacing)
+
+    Args:
+        query: The user's question
+
+    Returns:
+        Normalized query string
+    """
+    query = re.sub(r"[^\w\s]", " ", query.lower())
+    return " ".join(query.split())
+
+
+class ResponseCache:
+    """
+    Exact-match cache of crew answers with LRU and TTL eviction
+    """
+    def __init__(self, max_entries: int = 512, ttl: float = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    @staticmethod
+    def make_key(query: str, project_name: Optional[str], version: str) -> str:
+        """
+        Build the cache key for a query
+
+        Args:
+            query: The user's question
+            project_name: Project the question is about, if any
+            version: Version hash of the portfolio data
+
+        Returns:
+            Cache key
+        """
+        raw = "\x1f".join([normalize_query(query), (project_name or "").lower(), version])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Look up a cached response
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            The cached entry or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+
+            if time.monotonic() - entry["stored_at"] > self.ttl:
+                del self._entries[key]
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry["value"]
+
+    def set(self, key: str, value: Dict) -> None:
+        """
+        Store a response
+
+        Args:
+            key: Cache key from make_key
+            value: Response data (e.g. response text and agent used)
+        """
+        with self._lock:
+            self._entries[key] = {"value": value, "stored_at": time.monotonic()}
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self) -> None:
+        """Remove all cached responses"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        """
+        Get cache statistics
+
+        Returns:
+            Dictionary with size, hit/miss counters and hit rate
+        """
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                **self._stats,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0,
+            }
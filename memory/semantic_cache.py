@@ -0,0 +1,153 @@
+# memory/semantic_cache.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+
+from memory.response_cache import normalize_query
+
+
+class SemanticCache:
+    """
+    Answer cache that matches near-duplicate questions by embedding similarity.
+
+    Query embeddings are kept as rows of a preallocated, L2-normalized float32
+    matrix, so a lookup is a single matrix-vector product. Entries are scoped
+    (e.g. by project and portfolio version) and only match within their scope.
+    """
+    def __init__(self, embeddings, threshold: float = 0.9, max_entries: int = 512, ttl: float = 3600):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self._matrix: Optional[np.ndarray] = None  # allocated on first insert
+        self._scope_ids: Dict[str, int] = {}
+        self._scopes = np.full(max_entries, -1, dtype=np.int32)
+        self._values = [None] * max_entries
+        self._stored_at = np.zeros(max_entries, dtype=np.float64)
+        self._last_used = np.zeros(max_entries, dtype=np.float64)
+        self._valid = np.zeros(max_entries, dtype=bool)
+
+        # Recently embedded queries, so a miss followed by add embeds only once
+        self._recent_embeddings = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def _embed(self, query: str) -> np.ndarray:
+        normalized = normalize_query(query)
+        with self._lock:
+            vector = self._recent_embeddings.get(normalized)
+            if vector is not None:
+                self._recent_embeddings.move_to_end(normalized)
+                return vector
+
+        vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+
+        with self._lock:
+            self._recent_embeddings[normalized] = vector
+            while len(self._recent_embeddings) > 64:
+                self._recent_embeddings.popitem(last=False)
+        return vector
+
+    def lookup(self, query: str, scope: str) -> Optional[Dict]:
+        """
+        Find a cached answer for a similar question
+
+        Args:
+            query: The user's question
+            scope: Entries only match within the same scope
+
+        Returns:
+            Dictionary with the cached value and similarity, or None
+        """
+        vector = self._embed(query)
+        now = time.monotonic()
+
+        with self._lock:
+            if self._matrix is None or not self._valid.any():
+                self._stats["misses"] += 1
+                return None
+
+            # Drop expired entries
+            expired = self._valid & (now - self._stored_at > self.ttl)
+            self._valid[expired] = False
+
+            scope_id = self._scope_ids.get(scope)
+            candidates = self._valid & (self._scopes == (-1 if scope_id is None else scope_id))
+            if not candidates.any():
+                self._stats["misses"] += 1
+                return None
+
+            similarities = self._matrix @ vector
+            similarities[~candidates] = -np.inf
+            best = int(np.argmax(similarities))
+
+            if similarities[best] < self.threshold:
+                self._stats["misses"] += 1
+                return None
+
+            self._last_used[best] = now
+            self._stats["hits"] += 1
+            return {"value": self._values[best], "similarity": float(similarities[best])}
+
+    def add(self, query: str, scope: str, value: Dict) -> None:
+        """
+        Store an answer
+
+        Args:
+            query: The user's question
+            scope: Scope the entry belongs to
+            value: Response data to return on a match
+        """
+        vector = self._embed(query)
+        now = time.monotonic()
+
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+
+            if not self._valid.all():
+                slot = int(np.argmin(self._valid))
+            else:
+                # Replace the least recently used entry
+                slot = int(np.argmin(self._last_used))
+                self._stats["evictions"] += 1
+
+            self._matrix[slot] = vector
+            self._scopes[slot] = self._scope_ids.setdefault(scope, len(self._scope_ids))
+            self._values[slot] = value
+            self._stored_at[slot] = now
+            self._last_used[slot] = now
+            self._valid[slot] = True
+
+    def clear(self) -> None:
+        """Remove all cached answers"""
+        with self._lock:
+            self._valid[:] = False
+            self._scope_ids.clear()
+            self._scopes[:] = -1
+            self._values = [None] * self.max_entries
+
+    def get_stats(self) -> Dict:
+        """
+        Get cache statistics
+
+        Returns:
+            Dictionary with size, threshold and hit/miss counters
+        """
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                "size": int(self._valid.sum()),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "ttl": self.ttl,
+                **self._stats,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0,
+            }
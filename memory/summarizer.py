@@ -0,0 +1,53 @@
+# memory/summarizer.py
+import re
+from typing import Dict, List
+
+from memory.tokens import count_tokens
+
+# Token budget of a conversation summary
+SUMMARY_TOKEN_BUDGET = 300
+
+# Words kept from each message
+SUMMARY_WORDS_PER_MESSAGE = 30
+
+
+def _gist(text: str, max_words: int = SUMMARY_WORDS_PER_MESSAGE) -> str:
+    """First sentence of a text, cut to a number of words"""
+    text = " ".join(text.split())
+    sentence = re.split(r"(?<=[.!?])\s", text, maxsplit=1)[0]
+    words = sentence.split()
+    if len(words) > max_words:
+        return " ".join(words[:max_words]) + "..."
+    return sentence
+
+def summarize_messages(previous_summary: str, messages: List[Dict],
+                       max_tokens: int = SUMMARY_TOKEN_BUDGET) -> str:
+    """
+    Extend a conversation summary with more messages
+
+    Extractive and local: each message contributes the gist of its first
+    sentence, and the oldest lines are dropped once the summary exceeds its
+    token budget. Any callable with this signature can replace it (see
+    ConversationMemory's ``summarizer``), e.g. one backed by an LLM.
+
+    Args:
+        previous_summary: Summary of the messages before these ("" if none)
+        messages: Messages to fold into the summary, oldest first
+        max_tokens: Token budget of the result
+
+    Returns:
+        The updated summary
+    """
+    lines = previous_summary.splitlines() if previous_summary else []
+    for message in messages:
+        gist = _gist(message["content"])
+        if gist:
+            lines.append(f"- {'User asked' if message['role'] == 'user' else 'Assistant answered'}: {gist}")
+
+    # Lines are counted separately; drop the oldest until the whole fits
+    tokens = [count_tokens(line + "\n") for line in lines]
+    total, start = sum(tokens), 0
+    while total > max_tokens and start < len(lines):
+        total -= tokens[start]
+        start += 1
+    return "\n".join(lines[start:])
@@ -0,0 +1,42 @@
+# memory/tokens.py
+import math
+from functools import lru_cache
+
+# Optional import - exact counts when tiktoken is installed
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # The encoding is downloaded on first use and may be unavailable offline
+        print(f"Error loading tiktoken encoding: {str(e)}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count the tokens of a text
+
+    Uses tiktoken's cl100k_base encoding when available and otherwise
+    estimates about 4 characters per token.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Number of tokens
+    """
+    if not text:
+        return 0
+    if TIKTOKEN_AVAILABLE:
+        encoding = _get_encoding()
+        if encoding is not None:
+            return len(encoding.encode(text))
+    return math.ceil(len(text) / 4)
@@ -0,0 +1,231 @@
+# memory/vector_index.py
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class NumpyVectorIndex:
+    """
+    Dependency-free vector index: one L2-normalized float32 matrix.
+
+    Vectors live in ``vectors.npy`` and are opened memory-mapped, so loading
+    is instant and only touched pages are read. Chunk ids, texts and metadata
+    live next to it in ``chunks.json``, which doubles as the manifest used to
+    re-embed only changed chunks. Search is a matrix product followed by a
+    partial sort, for one or many queries at once.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.vectors_file = os.path.join(path, "vectors.npy")
+        self.chunks_file = os.path.join(path, "chunks.json")
+
+        self._vectors: Optional[np.ndarray] = None
+        self._manifest: Optional[Dict] = None
+        self._lock = threading.Lock()
+
+        os.makedirs(path, exist_ok=True)
+        self.load()
+
+    def load(self) -> bool:
+        """
+        Open the persisted index, if there is one
+
+        Returns:
+            bool: True if an index was loaded
+        """
+        if not (os.path.exists(self.vectors_file) and os.path.exists(self.chunks_file)):
+            return False
+        try:
+            with open(self.chunks_file, 'r') as f:
+                manifest = json.load(f)
+            vectors = np.load(self.vectors_file, mmap_mode="r")
+            if vectors.shape[0] != len(manifest["chunk_ids"]):
+                raise ValueError("vectors.npy and chunks.json disagree")
+        except Exception as e:
+            print(f"Error loading vector index: {str(e)}")
+            return False
+
+        with self._lock:
+            self._vectors = vectors
+            self._manifest = manifest
+        return True
+
+    def clear(self):
+        """Remove the persisted index and forget the loaded one"""
+        with self._lock:
+            self._vectors = None
+            self._manifest = None
+        for path in (self.vectors_file, self.chunks_file):
+            if os.path.exists(path):
+                os.remove(path)
+
+    @property
+    def manifest(self) -> Optional[Dict]:
+        """Embeddings model and chunk ids of the persisted index"""
+        return self._manifest
+
+    def __len__(self) -> int:
+        return 0 if self._manifest is None else len(self._manifest["chunk_ids"])
+
+    def update(
+        self,
+        chunk_ids: List[str],
+        texts: List[str],
+        metadatas: List[Dict],
+        embeddings,
+        embeddings_model: str,
+        rebuild: bool = False
+    ) -> int:
+        """
+        Replace the index contents, embedding only chunks not already stored
+
+        Args:
+            chunk_ids: Content-hash ids of the chunks
+            texts: Chunk texts
+            metadatas: Chunk metadata
+            embeddings: Object with an embed_documents method
+            embeddings_model: Name recorded in the manifest
+            rebuild: Ignore stored vectors and embed everything
+
+        Returns:
+            Number of chunks that were embedded
+        """
+        if not chunk_ids:
+            # Nothing to index, and no vectors to take the dimensions from
+            self.clear()
+            return 0
+
+        with self._lock:
+            old_vectors, old_manifest = self._vectors, self._manifest
+
+        existing = {}
+        if old_manifest is not None and not rebuild:
+            existing = {chunk_id: row for row, chunk_id in enumerate(old_manifest["chunk_ids"])}
+
+        missing = [i for i, chunk_id in enumerate(chunk_ids) if chunk_id not in existing]
+        new_vectors = None
+        if missing:
+            new_vectors = np.asarray(embeddings.embed_documents([texts[i] for i in missing]), dtype=np.float32)
+
+        dimensions = new_vectors.shape[1] if new_vectors is not None else old_vectors.shape[1]
+        matrix = np.zeros((len(chunk_ids), dimensions), dtype=np.float32)
+        missing_rows = {i: j for j, i in enumerate(missing)}
+        for i, chunk_id in enumerate(chunk_ids):
+            if i in missing_rows:
+                matrix[i] = new_vectors[missing_rows[i]]
+            else:
+                matrix[i] = old_vectors[existing[chunk_id]]
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms > 0, norms, 1.0)
+
+        manifest = {
+            "embeddings_model": embeddings_model,
+            "chunk_ids": list(chunk_ids),
+            "texts": list(texts),
+            "metadatas": list(metadatas)
+        }
+
+        # Write both files atomically, vectors first
+        tmp_vectors = os.path.join(self.path, "vectors.tmp.npy")
+        np.save(tmp_vectors, matrix)
+        os.replace(tmp_vectors, self.vectors_file)
+        tmp_chunks = f"{self.chunks_file}.tmp"
+        with open(tmp_chunks, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_chunks, self.chunks_file)
+
+        self.load()
+        return len(missing)
+
+    def filter_rows(self, filter: Optional[Dict] = None) -> Optional[np.ndarray]:
+        """
+        Rows whose metadata matches every key/value of a filter
+
+        Args:
+            filter: Metadata values to match (None matches everything)
+
+        Returns:
+            Boolean mask over the rows, or None when there is no filter
+        """
+        if not filter:
+            return None
+        manifest = self._manifest
+        if manifest is None:
+            return np.zeros(0, dtype=bool)
+        return np.fromiter(
+            (all(metadata.get(key) == value for key, value in filter.items()) for metadata in manifest["metadatas"]),
+            dtype=bool,
+            count=len(manifest["metadatas"])
+        )
+
+    def search(self, query_vectors: np.ndarray, k: int = 3, mask: Optional[np.ndarray] = None) -> List[List[Tuple[int, float]]]:
+        """
+        Top-k search for a batch of queries
+
+        Args:
+            query_vectors: Array of shape (queries, dimensions) or (dimensions,)
+            k: Number of results per query
+            mask: Optional boolean mask of the rows allowed in the results
+
+        Returns:
+            For each query, a list of (row, cosine similarity), best first
+        """
+        with self._lock:
+            vectors = self._vectors
+        candidates = vectors.shape[0] if vectors is not None else 0
+        if mask is not None:
+            candidates = int(mask.sum())
+        if candidates == 0:
+            return [[] for _ in range(np.atleast_2d(query_vectors).shape[0])]
+
+        queries = np.atleast_2d(np.asarray(query_vectors, dtype=np.float32))
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms > 0, norms, 1.0)
+
+        scores = queries @ vectors.T
+        if mask is not None:
+            # Filtered-out rows can never reach the top k
+            scores[:, ~mask] = -np.inf
+        k = min(k, candidates)
+        # Partial sort: only the top k of each row are ordered
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        return [
+            [(int(row), float(score)) for row, score in zip(rows, row_scores)]
+            for rows, row_scores in zip(top, top_scores)
+        ]
+
+    def get_chunk(self, row: int) -> Dict:
+        """Text and metadata of an indexed chunk"""
+        manifest = self._manifest
+        return {
+            "id": manifest["chunk_ids"][row],
+            "content": manifest["texts"][row],
+            "metadata": manifest["metadatas"][row]
+        }
+
+    def similarity_search_batch(self, query_vectors: Sequence, k: int = 3, filter: Optional[Dict] = None) -> List[List[Dict]]:
+        """
+        Top-k chunks for a batch of query embeddings
+
+        Args:
+            query_vectors: Query embeddings
+            k: Number of results per query
+            filter: Optional metadata values the chunks must match
+
+        Returns:
+            For each query, a list of chunk dictionaries with content, metadata and score
+        """
+        mask = self.filter_rows(filter)
+        return [
+            [{**self.get_chunk(row), "score": score} for row, score in hits]
+            for hits in self.search(np.asarray(query_vectors, dtype=np.float32), k, mask)
+        ]
@@ -1,10 +1,20 @@
 # memory/vector_store.py
+import hashlib
 import json
+import math
 import os
+import re
+import threading
+import zlib
+from functools import lru_cache
 from typing import Dict, List, Optional
 
 from dotenv import load_dotenv
 
+from memory.bm25 import BM25Index
+from memory.embedding_cache import CachedEmbeddings
+from memory.vector_index import NumpyVectorIndex
+
 # Optional imports - only needed if using the specific embeddings models
 try:
     from langchain.document_loaders import TextLoader
@@ -20,34 +30,264 @@ load_dotenv()
 
 # Constants
 VECTOR_DB_PATH = "./data/vectorstore"
-EMBEDDINGS_MODEL = os.getenv("EMBEDDINGS_MODEL", "openai")  # openai, huggingface, etc.
+EMBEDDINGS_MODEL = os.getenv("EMBEDDINGS_MODEL", "openai")  # openai, huggingface, hashing
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND")  # chroma, numpy (default: chroma if installed)
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./data/embeddings/cache.sqlite")
+
+# Words too common to help tell questions apart
+STOP_WORDS = {
+    "a", "about", "an", "and", "are", "as", "at", "be", "can", "could", "do", "does",
+    "for", "from", "has", "have", "he", "his", "how", "i", "in", "is", "it", "me",
+    "of", "on", "or", "please", "s", "santiago", "tell", "that", "the", "their",
+    "there", "this", "to", "was", "what", "whats", "when", "where", "which", "who",
+    "why", "with", "would", "you", "your",
+}
+
+class HashingEmbeddings:
+    """
+    Deterministic, offline embeddings based on feature hashing.
+
+    Words (minus stop words) and their character trigrams are hashed into a
+    fixed number of dimensions and L2-normalized. Implements the same
+    embed_documents / embed_query interface as the LangChain embeddings.
+    """
+    def __init__(self, dimensions: int = 512):
+        self.dimensions = dimensions
+    
+    def _features(self, text: str) -> Dict[str, float]:
+        features = {}
+        for word in re.findall(r"\w+", text.lower()):
+            if word in STOP_WORDS:
+                continue
+            features[f"w:{word}"] = features.get(f"w:{word}", 0.0) + 1.0
+            padded = f"#{word}#"
+            for i in range(len(padded) - 2):
+                gram = f"c:{padded[i:i + 3]}"
+                features[gram] = features.get(gram, 0.0) + 0.5
+        return features
+    
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single text"""
+        vector = [0.0] * self.dimensions
+        for feature, weight in self._features(text).items():
+            digest = zlib.crc32(feature.encode("utf-8"))
+            sign = 1.0 if digest & 1 else -1.0
+            vector[(digest >> 1) % self.dimensions] += sign * weight
+        
+        norm = math.sqrt(sum(value * value for value in vector))
+        if norm > 0:
+            vector = [value / norm for value in vector]
+        return vector
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a list of texts"""
+        return [self.embed_query(text) for text in texts]
+
+def get_embeddings(model: str = EMBEDDINGS_MODEL):
+    """
+    Create an embeddings backend
+    
+    Args:
+        model: One of 'openai', 'huggingface' or 'hashing' (offline)
+        
+    Returns:
+        An object with embed_documents and embed_query methods
+    """
+    if model == "hashing":
+        return HashingEmbeddings()
+    
+    if model in ["openai", "huggingface"] and not LANGCHAIN_AVAILABLE:
+        raise RuntimeError(f"LangChain is required for '{model}' embeddings")
+    
+    if model == "openai":
+        return OpenAIEmbeddings(
+            openai_api_key=os.getenv("OPENAI_API_KEY")
+        )
+    elif model == "huggingface":
+        return HuggingFaceEmbeddings(
+            model_name="sentence-transformers/all-mpnet-base-v2"
+        )
+    else:
+        raise ValueError(f"Unsupported embeddings model: {model}")
+
+@lru_cache(maxsize=None)
+def get_cached_embeddings(model: str = EMBEDDINGS_MODEL):
+    """
+    Process-wide embeddings backend with a persistent cache
+    
+    Args:
+        model: One of 'openai', 'huggingface' or 'hashing'
+        
+    Returns:
+        A CachedEmbeddings wrapper, or the plain backend for 'hashing'
+        (recomputing those is cheaper than a lookup)
+    """
+    embeddings = get_embeddings(model)
+    if model == "hashing":
+        return embeddings
+    
+    # Include the concrete model so switching it never returns stale vectors
+    model_name = getattr(embeddings, "model", None) or getattr(embeddings, "model_name", None)
+    return CachedEmbeddings(
+        embeddings,
+        model_name=f"{model}:{model_name}" if model_name else model,
+        db_path=EMBEDDING_CACHE_PATH
+    )
+
+def compute_chunk_id(text: str, metadata: Optional[Dict] = None) -> str:
+    """
+    Content hash identifying a chunk
+    
+    Args:
+        text: Chunk text
+        metadata: Chunk metadata (part of the identity)
+        
+    Returns:
+        First 16 hex characters of the SHA-256 of text and metadata
+    """
+    payload = json.dumps({"text": text, "metadata": metadata or {}}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+def load_manifest(persist_directory: str) -> Optional[Dict]:
+    """Load the manifest describing the chunks in a persisted index, if any"""
+    manifest_file = os.path.join(persist_directory, "manifest.json")
+    if not os.path.exists(manifest_file):
+        return None
+    try:
+        with open(manifest_file, 'r') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Error loading vector store manifest: {str(e)}")
+        return None
+
+def save_manifest(persist_directory: str, embeddings_model: str, chunk_ids: List[str]) -> None:
+    """Record the embeddings model and chunk ids of a persisted index, atomically"""
+    os.makedirs(persist_directory, exist_ok=True)
+    manifest_file = os.path.join(persist_directory, "manifest.json")
+    manifest = {
+        "embeddings_model": embeddings_model,
+        "content_hash": hashlib.sha256("\n".join(sorted(chunk_ids)).encode("utf-8")).hexdigest(),
+        "chunk_ids": chunk_ids
+    }
+    tmp_file = f"{manifest_file}.tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_file, manifest_file)
+
+def plan_index_update(manifest: Optional[Dict], embeddings_model: str, chunk_ids: List[str]) -> Dict:
+    """
+    Work out which chunks must be embedded and which removed
+    
+    Args:
+        manifest: Manifest of the persisted index (None if there is none)
+        embeddings_model: Embeddings model in use now
+        chunk_ids: Content-hash ids of the current chunks
+        
+    Returns:
+        Dictionary with "rebuild" (drop everything first), "add" and "delete" id lists
+    """
+    if not manifest or manifest.get("embeddings_model") != embeddings_model:
+        # Unknown contents or vectors from another model: start over
+        return {"rebuild": True, "add": list(chunk_ids), "delete": []}
+    
+    existing = set(manifest.get("chunk_ids", []))
+    current = set(chunk_ids)
+    return {
+        "rebuild": False,
+        "add": [chunk_id for chunk_id in chunk_ids if chunk_id not in existing],
+        "delete": sorted(existing - current)
+    }
+
+def split_text(text: str, chunk_size: int = 1000, chunk_overlap: int = 200) -> List[str]:
+    """
+    Split text into overlapping chunks on line boundaries (used when LangChain
+    is not installed)
+    
+    Args:
+        text: Text to split
+        chunk_size: Maximum characters per chunk
+        chunk_overlap: Characters repeated at the start of the next chunk
+        
+    Returns:
+        List of chunks
+    """
+    chunks, current = [], ""
+    for line in text.splitlines(keepends=True):
+        while len(line) > chunk_size:
+            # Hard-wrap lines longer than a whole chunk
+            line, rest = line[:chunk_size], line[chunk_size:]
+            if current:
+                chunks.append(current)
+            chunks.append(line)
+            current, line = "", rest
+        if current and len(current) + len(line) > chunk_size:
+            chunks.append(current)
+            current = current[-chunk_overlap:] if chunk_overlap else ""
+            # Start the overlap on a line boundary
+            if "\n" in current:
+                current = current[current.index("\n") + 1:]
+        current += line
+    if current.strip():
+        chunks.append(current)
+    return [chunk.strip() for chunk in chunks if chunk.strip()]
 
 class VectorStore:
     """
     A class to handle vector embeddings and similarity search for portfolio data
+    
+    Two backends are available: "chroma" (LangChain + Chroma) and "numpy", a
+    built-in memory-mapped index that works without any optional dependency.
     """
-    def __init__(self, persist_directory: str = VECTOR_DB_PATH):
+    def __init__(self, persist_directory: str = VECTOR_DB_PATH, backend: Optional[str] = None):
         self.persist_directory = persist_directory
+        self.backend = backend or VECTOR_STORE_BACKEND or ("chroma" if LANGCHAIN_AVAILABLE else "numpy")
         self.embeddings = None
+        self.embeddings_model = None
         self.vector_db = None
         
-        # Initialize if LangChain is available
-        if LANGCHAIN_AVAILABLE:
-            self._initialize_embeddings()
-            os.makedirs(persist_directory, exist_ok=True)
+        # Keyword index over the same documents, built on first use
+        self._keyword_documents: Optional[List[Dict]] = None
+        self._keyword_index: Optional[BM25Index] = None
+        self._keyword_lock = threading.Lock()
+        
+        if self.backend == "chroma" and not LANGCHAIN_AVAILABLE:
+            print("LangChain not available. Falling back to the built-in vector index.")
+            self.backend = "numpy"
+        
+        self._initialize_embeddings()
+        os.makedirs(persist_directory, exist_ok=True)
+        
+        if self.backend == "numpy":
+            self.vector_db = NumpyVectorIndex(os.path.join(persist_directory, "numpy"))
+        elif load_manifest(persist_directory):
+            # Re-open an index persisted by an earlier run (or another process)
+            self.vector_db = Chroma(
+                persist_directory=persist_directory,
+                embedding_function=self.embeddings
+            )
+    
+    def is_initialized(self) -> bool:
+        """Whether the store holds any documents to search"""
+        if self.backend == "numpy":
+            return len(self.vector_db) > 0
+        return self.vector_db is not None
     
     def _initialize_embeddings(self):
         """Initialize the embeddings model based on configuration"""
-        if EMBEDDINGS_MODEL == "openai":
-            self.embeddings = OpenAIEmbeddings(
-                openai_api_key=os.getenv("OPENAI_API_KEY")
-            )
-        elif EMBEDDINGS_MODEL == "huggingface":
-            self.embeddings = HuggingFaceEmbeddings(
-                model_name="sentence-transformers/all-mpnet-base-v2"
+        self.embeddings_model = EMBEDDINGS_MODEL
+        if EMBEDDINGS_MODEL != "hashing" and not LANGCHAIN_AVAILABLE:
+            # Offline fallback
+            self.embeddings_model = "hashing"
+        self.embeddings = get_cached_embeddings(self.embeddings_model)
+    
+    def _split_text(self, text_content: str) -> List[str]:
+        if LANGCHAIN_AVAILABLE:
+            text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=1000,
+                chunk_overlap=200
             )
-        else:
-            raise ValueError(f"Unsupported embeddings model: {EMBEDDINGS_MODEL}")
+            return text_splitter.split_text(text_content)
+        return split_text(text_content, chunk_size=1000, chunk_overlap=200)
     
     def initialize_from_text(self, text_content: str, metadata: Optional[Dict] = None):
         """
@@ -57,85 +297,254 @@ class VectorStore:
             text_content: Text to embed
             metadata: Optional metadata to associate with the text
         """
-        if not LANGCHAIN_AVAILABLE:
-            print("LangChain not available. Skipping vector store initialization.")
-            return False
-        
         # Split text into chunks
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200
-        )
-        
-        # Create documents with text chunks
-        chunks = text_splitter.split_text(text_content)
-        
-        # Create documents with metadata
         documents = []
-        for i, chunk in enumerate(chunks):
+        for i, chunk in enumerate(self._split_text(text_content)):
             doc_metadata = metadata.copy() if metadata else {}
             doc_metadata.update({"chunk": i})
-            documents.append({"page_content": chunk, "metadata": doc_metadata})
+            documents.append({"text": chunk, "metadata": doc_metadata})
         
-        # Create or update vector store
-        self.vector_db = Chroma.from_documents(
-            documents=documents,
-            embedding=self.embeddings,
-            persist_directory=self.persist_directory
+        return self.initialize_from_documents(documents)
+    
+    def initialize_from_documents(self, documents: List[Dict]):
+        """
+        Initialize the vector store from pre-chunked documents
+        
+        Args:
+            documents: Dictionaries with "text" and "metadata" (scalar values)
+        """
+        # Identify each chunk by its content hash
+        texts, metadatas, chunk_ids = [], [], []
+        for document in documents:
+            texts.append(document["text"])
+            metadatas.append(document["metadata"])
+            chunk_ids.append(compute_chunk_id(document["text"], document["metadata"]))
+        
+        with self._keyword_lock:
+            self._keyword_documents = [
+                {"content": text, "metadata": metadata} for text, metadata in zip(texts, metadatas)
+            ]
+            self._keyword_index = None
+        
+        if self.backend == "numpy":
+            return self._update_numpy_index(chunk_ids, texts, metadatas)
+        return self._update_chroma(chunk_ids, texts, metadatas)
+    
+    def _update_numpy_index(self, chunk_ids: List[str], texts: List[str], metadatas: List[Dict]) -> bool:
+        plan = plan_index_update(self.vector_db.manifest, self.embeddings_model, chunk_ids)
+        if not (plan["rebuild"] or plan["add"] or plan["delete"]):
+            print("Vector store is up to date. Re-using persisted embeddings.")
+            return True
+        
+        embedded = self.vector_db.update(
+            chunk_ids, texts, metadatas,
+            self.embeddings, self.embeddings_model,
+            rebuild=plan["rebuild"]
+        )
+        print(f"Vector store updated: {embedded} chunks embedded, {len(plan['delete'])} removed.")
+        return True
+    
+    def _update_chroma(self, chunk_ids: List[str], texts: List[str], metadatas: List[Dict]) -> bool:
+        # Re-open the persisted index instead of re-embedding everything
+        self.vector_db = Chroma(
+            persist_directory=self.persist_directory,
+            embedding_function=self.embeddings
         )
         
-        # Persist to disk
-        self.vector_db.persist()
+        plan = plan_index_update(load_manifest(self.persist_directory), self.embeddings_model, chunk_ids)
+        if plan["rebuild"]:
+            self.vector_db.delete_collection()
+            self.vector_db = Chroma(
+                persist_directory=self.persist_directory,
+                embedding_function=self.embeddings
+            )
+        if plan["delete"]:
+            self.vector_db.delete(ids=plan["delete"])
+        if plan["add"]:
+            # Only new or changed chunks reach the embeddings model
+            to_add = set(plan["add"])
+            positions = [i for i, chunk_id in enumerate(chunk_ids) if chunk_id in to_add]
+            self.vector_db.add_texts(
+                texts=[texts[i] for i in positions],
+                metadatas=[metadatas[i] for i in positions],
+                ids=[chunk_ids[i] for i in positions]
+            )
+        
+        if plan["rebuild"] or plan["add"] or plan["delete"]:
+            # Older Chroma versions only write to disk on persist()
+            if hasattr(self.vector_db, "persist"):
+                self.vector_db.persist()
+            save_manifest(self.persist_directory, self.embeddings_model, chunk_ids)
+            print(f"Vector store updated: {len(plan['add'])} chunks embedded, {len(plan['delete'])} removed.")
+        else:
+            print("Vector store is up to date. Re-using persisted embeddings.")
         
         return True
     
-    def similarity_search(self, query: str, k: int = 3) -> List[Dict]:
+    def similarity_search(self, query: str, k: int = 3, filter: Optional[Dict] = None) -> List[Dict]:
         """
         Search for documents similar to the query
         
         Args:
             query: The search query
             k: Number of results to return
+            filter: Optional metadata values documents must match, e.g. {"section": "projects"}
             
         Returns:
             List of document dictionaries with content and metadata
         """
-        if not LANGCHAIN_AVAILABLE or not self.vector_db:
-            print("Vector store not initialized or LangChain not available.")
-            return []
+        return self.similarity_search_batch([query], k=k, filter=filter)[0]
+    
+    def similarity_search_batch(self, queries: List[str], k: int = 3, filter: Optional[Dict] = None) -> List[List[Dict]]:
+        """
+        Search for documents similar to several queries at once
         
-        # Perform similarity search
-        results = self.vector_db.similarity_search(query, k=k)
+        Args:
+            queries: The search queries
+            k: Number of results per query
+            filter: Optional metadata values documents must match
+            
+        Returns:
+            For each query, a list of document dictionaries with content and metadata
+        """
+        if self.vector_db is None:
+            print("Vector store not initialized.")
+            return [[] for _ in queries]
         
-        # Format results
+        if self.backend == "numpy":
+            # Query embeddings come from the in-memory LRU when they can
+            if hasattr(self.embeddings, "embed_queries"):
+                query_vectors = self.embeddings.embed_queries(queries)
+            else:
+                query_vectors = [self.embeddings.embed_query(query) for query in queries]
+            return self.vector_db.similarity_search_batch(query_vectors, k=k, filter=filter)
+        
+        # Perform similarity search
         formatted_results = []
-        for doc in results:
-            formatted_results.append({
-                "content": doc.page_content,
-                "metadata": doc.metadata
-            })
+        for query in queries:
+            if filter:
+                # Chroma expects an explicit $and for several conditions
+                where = filter if len(filter) == 1 else {"$and": [{key: value} for key, value in filter.items()]}
+                results = self.vector_db.similarity_search(query, k=k, filter=where)
+            else:
+                results = self.vector_db.similarity_search(query, k=k)
+            formatted_results.append([
+                {"content": doc.page_content, "metadata": doc.metadata}
+                for doc in results
+            ])
         
         return formatted_results
+
+    def _get_keyword_index(self):
+        """Documents and BM25 index for keyword search, built once per process"""
+        with self._keyword_lock:
+            if self._keyword_index is None:
+                if self._keyword_documents is None:
+                    self._keyword_documents = self._load_indexed_documents()
+                self._keyword_index = BM25Index(
+                    [document["content"] for document in self._keyword_documents],
+                    stop_words=STOP_WORDS
+                )
+            return self._keyword_documents, self._keyword_index
     
-# Simple interface function for the API to use
-def initialize_vector_store():
-    """Initialize the vector store with portfolio data"""
-    if not LANGCHAIN_AVAILABLE:
-        print("LangChain not available. Skipping vector store initialization.")
-        return False
+    def _load_indexed_documents(self) -> List[Dict]:
+        """Documents persisted by an earlier run"""
+        if self.vector_db is None:
+            return []
+        if self.backend == "numpy":
+            return [self.vector_db.get_chunk(row) for row in range(len(self.vector_db))]
+        stored = self.vector_db.get()
+        return [
+            {"content": text, "metadata": metadata or {}}
+            for text, metadata in zip(stored["documents"], stored["metadatas"])
+        ]
     
-    # Import portfolio data
-    from knowledge.portfolio_data import PORTFOLIO_INFO
+    def keyword_search(self, query: str, k: int = 3, filter: Optional[Dict] = None) -> List[Dict]:
+        """
+        Search documents by exact terms with BM25
+        
+        Args:
+            query: The search query
+            k: Number of results to return
+            filter: Optional metadata values documents must match
+            
+        Returns:
+            List of document dictionaries with content, metadata and score
+        """
+        documents, index = self._get_keyword_index()
+        allowed = None
+        if filter:
+            allowed = {
+                row for row, document in enumerate(documents)
+                if all(document["metadata"].get(key) == value for key, value in filter.items())
+            }
+        return [{**documents[row], "score": score} for row, score in index.search(query, k=k, allowed=allowed)]
     
-    # Format portfolio data as text
-    portfolio_text = json.dumps(PORTFOLIO_INFO, indent=2)
+    def hybrid_search(self, query: str, k: int = 3, filter: Optional[Dict] = None, candidates: int = 10) -> List[Dict]:
+        """
+        Combine vector and BM25 keyword search with reciprocal rank fusion
+        
+        Args:
+            query: The search query
+            k: Number of results to return
+            filter: Optional metadata values documents must match
+            candidates: Number of results taken from each ranking before fusion
+            
+        Returns:
+            List of document dictionaries with content, metadata and fused score
+        """
+        candidates = max(candidates, k)
+        return reciprocal_rank_fusion([
+            self.similarity_search(query, k=candidates, filter=filter),
+            self.keyword_search(query, k=candidates, filter=filter)
+        ])[:k]
+
+def reciprocal_rank_fusion(rankings: List[List[Dict]], k: int = 60) -> List[Dict]:
+    """
+    Fuse several rankings of the same documents
+    
+    Each document scores the sum of 1 / (k + rank) over the rankings it
+    appears in, so agreement between rankings beats a single high rank.
+    
+    Args:
+        rankings: Lists of document dictionaries, best first
+        k: Damping constant (60 is the usual choice)
+        
+    Returns:
+        Documents ordered by fused score, with "score" replaced by it
+    """
+    fused: Dict[str, Dict] = {}
+    for ranking in rankings:
+        for rank, document in enumerate(ranking, start=1):
+            entry = fused.setdefault(document["content"], {**document, "score": 0.0})
+            entry["score"] += 1.0 / (k + rank)
+    return sorted(fused.values(), key=lambda document: document["score"], reverse=True)
+
+# Process-wide vector store (created on first use)
+_vector_store: Optional[VectorStore] = None
+_vector_store_lock = threading.Lock()
+
+def get_vector_store() -> VectorStore:
+    """Provides the process-wide VectorStore"""
+    global _vector_store
+    if _vector_store is None:
+        with _vector_store_lock:
+            if _vector_store is None:
+                _vector_store = VectorStore()
+    return _vector_store
+
+# Simple interface function for the API to use
+def initialize_vector_store():
+    """Initialize the process-wide vector store with portfolio data"""
+    # One document per project, job, education entry, skill category...
+    from agents.portfolio_integration import get_portfolio_chunks
+    documents = get_portfolio_chunks()
+    for document in documents:
+        document["metadata"]["source"] = "portfolio_info"
     
     # Initialize vector store
-    vector_store = VectorStore()
-    vector_store.initialize_from_text(
-        portfolio_text, 
-        metadata={"source": "portfolio_info"}
-    )
+    vector_store = get_vector_store()
+    vector_store.initialize_from_documents(documents)
     
     print("Vector store initialized successfully.")
-    return True
\ No newline at end of file
+    return True
@@ -0,0 +1,185 @@
+# tests/test_agents.py
+from crewai import Agent
+
+from agents import portfolio_integration, retrieval
+from agents.crew import CrewTemplate, build_project_crew, get_response_text, select_template
+from agents.direct_answers import DirectAnswerEngine
+from agents.portfolio_integration import get_portfolio_context
+from agents.project_resolver import ProjectResolver
+from agents.router import QueryRouter
+from knowledge.chunking import chunk_portfolio
+from knowledge.portfolio_data import PORTFOLIO_INFO
+from memory import vector_store
+from memory.vector_store import VectorStore
+
+
+def test_retrieval_injects_only_relevant_sections(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_store, "EMBEDDINGS_MODEL", "hashing")
+    store = VectorStore(persist_directory=str(tmp_path), backend="numpy")
+    monkeypatch.setattr(retrieval, "get_vector_store", lambda: store)
+    monkeypatch.setattr(retrieval, "initialize_vector_store", lambda: store.initialize_from_documents(chunk_portfolio()))
+
+    # The index is built on first use
+    context = retrieval.retrieve_portfolio_context("Which databases has he used?", k=2)
+    assert store.is_initialized()
+    assert len(context) < len(get_portfolio_context())
+    assert "PostgreSQL" in context
+
+    # Project questions only see project documents
+    sections = retrieval.retrieve_sections("What stack?", k=3, project_name="Portfolio Assistant AI")
+    assert sections == [next(d["text"] for d in chunk_portfolio() if d["metadata"]["section"] == "projects")]
+
+
+def test_retrieval_falls_back_to_full_portfolio(monkeypatch):
+    def failing_store():
+        raise RuntimeError("no vector store")
+
+    monkeypatch.setattr(retrieval, "get_vector_store", failing_store)
+    assert retrieval.retrieve_portfolio_context("Anything") == get_portfolio_context()
+
+
+def test_compiled_portfolio_is_memoized_on_disk(tmp_path, monkeypatch):
+    monkeypatch.setattr(portfolio_integration, "PROMPT_CACHE_PATH", str(tmp_path))
+    monkeypatch.setattr(portfolio_integration, "_compiled", {})
+
+    compiled = portfolio_integration.get_compiled_portfolio("test-version")
+    assert compiled["text"].startswith("# PERSONAL INFORMATION\nName: Santiago Ospina\n")
+    assert (tmp_path / "portfolio_test-version.json").exists()
+
+    # Retrieval chunks are the prompt's own records
+    for record in compiled["records"]["projects"]:
+        assert record in compiled["text"]
+    chunks = chunk_portfolio(records=compiled["records"])
+    assert chunks == chunk_portfolio()
+    assert chunks[-1]["text"] == ("# PROJECTS\n" + compiled["records"]["projects"][-1]).strip()
+
+    # A new process loads the artifact instead of rendering again
+    monkeypatch.setattr(portfolio_integration, "_compiled", {})
+    monkeypatch.setattr(portfolio_integration, "compile_portfolio", lambda info, version: None)
+    assert portfolio_integration.get_compiled_portfolio("test-version") == compiled
+
+    # Artifacts written in an older layout are rebuilt
+    (tmp_path / "portfolio_old.json").write_text('{"version": "old", "text": "stale"}')
+    monkeypatch.setattr(portfolio_integration, "compile_portfolio", lambda info, version: {"text": "fresh"})
+    assert portfolio_integration.get_compiled_portfolio("old")["text"] == "fresh"
+
+
+class FakeTask:
+    def __init__(self, description):
+        self.description = description
+        self.expected_output = "An answer"
+        self._original_description = None
+        self._original_expected_output = None
+
+
+class FakeCrew:
+    def __init__(self):
+        self.step_callback = None
+        self.task_callback = None
+        self.tasks = [FakeTask("answer to {question}")]
+
+    def kickoff(self, inputs=None):
+        return self.tasks[0].description
+
+
+def test_crew_template_reuses_pooled_crews():
+    template = CrewTemplate("fake", FakeCrew, pool_size=2)
+    template.warm()
+    assert template.get_stats()["built"] == 2
+
+    assert template.kickoff({"question": "one"}, step_callback=print) == "answer to one"
+    assert template.kickoff({"question": "two"}) == "answer to two"
+    assert template.get_stats()["built"] == 2
+
+    # Concurrent checkouts get distinct crews; overflow crews are built on demand
+    with template.checkout() as first, template.checkout() as second, template.checkout() as third:
+        assert len({id(first), id(second), id(third)}) == 3
+        assert first.step_callback is None
+    assert template.get_stats() == {"name": "fake", "pooled": 2, "built": 3, "checkouts": 5}
+
+
+def test_crew_template_keeps_braces_in_user_text_verbatim(monkeypatch):
+    # A real crew runs; only the agent's LLM call is replaced by echoing the task
+    monkeypatch.setattr(Agent, "execute_task", lambda self, task, context=None, tools=None: task.description)
+    template = CrewTemplate("project", build_project_crew, pool_size=1)
+
+    inputs = {"question": "What is {context} in {project_name}?", "context": "SECRET", "project_name": "Demo"}
+    prompt = get_response_text(template.kickoff(inputs))
+    assert "Question: What is {context} in {project_name}?" in prompt
+    assert prompt.count("SECRET") == 1
+
+    # The pooled crew is rebound from its templates on the next request
+    prompt = get_response_text(template.kickoff({**inputs, "question": "And {question}?"}))
+    assert "Question: And {question}?" in prompt and "{context}" not in prompt
+
+
+def test_router_routes_clear_questions_locally():
+    router = QueryRouter()
+
+    skills = router.route("What programming skills and languages does Santiago know?")
+    assert skills["route"] == "knowledge"
+    assert skills["confident"]
+    assert select_template(route=skills) == "portfolio"
+
+    build = router.route("How did he implement the architecture of his projects?")
+    assert build["route"] == "project"
+    assert select_template(route=build) == "portfolio_projects"
+
+    # Too little evidence falls back to the LLM routing task
+    vague = router.route("hello")
+    assert not vague["confident"]
+    assert select_template(route=vague) == "routed"
+    assert select_template(project_name="Demo", route=skills) == "project"
+
+
+def test_direct_answers_cover_factual_questions_only():
+    engine = DirectAnswerEngine()
+
+    email = engine.answer("What's your email?")
+    assert email["intent"] == "contact"
+    assert "santiagospidrobo15@gmail.com" in email["answer"]
+
+    databases = engine.answer("Which databases do you know?")
+    assert "PostgreSQL" in databases["answer"] and "Unity" not in databases["answer"]
+
+    jobs = engine.answer("Where did you work in 2022?")
+    assert "Makata Studio" in jobs["answer"] and "ID Technology" not in jobs["answer"]
+
+    ai_tools = engine.answer("What AI and AR/VR tools do you use?")
+    assert "AI/ML: OpenAI API" in ai_tools["answer"] and "AR/VR: Unity" in ai_tools["answer"]
+
+    # Open-ended questions still go to the crew
+    assert engine.answer("How did you implement the database layer of the project?") is None
+    assert engine.answer("Tell me about your AI journey") is None
+    assert engine.answer("How do you use AI in your work?") is None
+
+    # Spoken languages are not programming languages
+    assert engine.answer("What languages do you speak?") is None
+
+
+def test_project_resolver_matches_names_aliases_and_technologies():
+    resolver = ProjectResolver({
+        "skills": {"languages": ["Python"], "ai": ["CrewAI"]},
+        "experience": [],
+        "projects": [
+            {"name": "Portfolio Assistant AI", "technologies": ["Python", "CrewAI", "LangChain"],
+             "github": "https://github.com/sospinai/portfolio-assistant"},
+            {"name": "Budget Tracker", "technologies": ["Python", "Supabase"]},
+        ],
+    })
+
+    assert resolver.resolve("How does the portfolio-assistant repo work?")["match"] == "alias"
+    fuzzy = resolver.resolve("Tell me about the budget trakcer")
+    assert fuzzy["project"] == "Budget Tracker" and fuzzy["match"] == "fuzzy"
+    assert resolver.resolve("Which project uses Supabase?")["project"] == "Budget Tracker"
+
+    # Shared technologies, general skills and non-project questions resolve to nothing
+    assert resolver.resolve("Which project uses Python?") is None
+    assert resolver.resolve("What projects use CrewAI?") is None
+    assert resolver.resolve("What Supabase experience do you have?") is None
+
+    # With a single project, portfolio-wide questions are left to the router
+    single = ProjectResolver(PORTFOLIO_INFO)
+    assert single.resolve("What projects use Python?") is None
+    assert single.resolve("Which projects are built with LangChain?") is None
+    assert single.resolve("How does the Portfolio Assistant AI work?")["match"] == "alias"
@@ -0,0 +1,196 @@
+# tests/test_analytics.py
+import json
+import os
+import subprocess
+import sys
+
+from agents.analytics.event_store import EventStore
+from agents.analytics.latency import LatencyHistograms
+from agents.analytics.sketches import HyperLogLog, SpaceSaving
+from agents.analytics.usage_tracker import AnalyticsTracker
+
+
+def test_summary_uses_running_aggregates(tmp_path):
+    tracker = AnalyticsTracker(storage_path=str(tmp_path))
+    tracker.track_query("What are your skills?", user_id="alice", response_time=2.0)
+    tracker.track_query("what are your skills?", user_id="bob", response_time=4.0)
+    tracker.track_query("Where do you work?", user_id="alice")
+
+    summary = tracker.get_analytics_summary()
+    assert summary["total_queries"] == 3
+    assert summary["unique_queries"] == 2
+    assert summary["unique_users"] == 2
+    assert summary["avg_response_time"] == 3.0
+    assert tracker.get_daily_summary()[0]["total_queries"] == 3
+
+    tracker.close()
+
+    # Aggregates are restored from the snapshot
+    reloaded = AnalyticsTracker(storage_path=str(tmp_path))
+    assert reloaded.get_analytics_summary()["total_queries"] == 3
+    assert reloaded.get_analytics_summary()["unique_users"] == 2
+    reloaded.close()
+
+
+def test_queries_are_buffered_and_appended(tmp_path):
+    tracker = AnalyticsTracker(storage_path=str(tmp_path), flush_batch=2, flush_interval=60)
+    tracker.track_query("First", user_id="alice")
+    assert not list(tmp_path.glob("queries_*.jsonl"))
+
+    tracker.track_query("Second", user_id="alice")
+    tracker.track_query("Third", user_id="alice")
+    tracker.close()
+
+    segments = list(tmp_path.glob("queries_*.jsonl"))
+    assert len(segments) == 1
+    assert len(segments[0].read_text().splitlines()) == 3
+    assert tracker.writer.get_stats()["events_written"] == 3
+
+
+def test_legacy_file_is_migrated_and_windows_are_read_from_segments(tmp_path):
+    legacy = [
+        {"query": "Old", "user_id": "alice", "conversation_id": None,
+         "timestamp": "2025-03-30T10:00:00", "date": "2025-03-30", "time": "10:00:00", "response_time": 1.0},
+        {"query": "Older", "user_id": "bob", "conversation_id": None,
+         "timestamp": "2025-03-31T09:00:00", "date": "2025-03-31", "time": "09:00:00", "response_time": 3.0},
+    ]
+    (tmp_path / "queries.json").write_text(json.dumps(legacy))
+
+    tracker = AnalyticsTracker(storage_path=str(tmp_path))
+    assert not (tmp_path / "queries.json").exists()
+    assert tracker.event_store.list_dates() == ["2025-03-30", "2025-03-31"]
+    assert tracker.get_analytics_summary()["total_queries"] == 2
+
+    tracker.track_query("New", user_id="carol")
+    window = tracker.get_queries(start="2025-03-31", end="2025-04-01")
+    assert [q["query"] for q in window] == ["Older"]
+    assert [q["query"] for q in tracker.get_recent_queries(2)] == ["Older", "New"]
+    assert tracker.get_popular_queries(1)[0]["count"] == 1
+    tracker.close()
+
+    # A segment written behind the snapshot's back triggers a rebuild
+    with open(tmp_path / "queries_2025-03-29.jsonl", "a") as f:
+        f.write(json.dumps({**legacy[0], "date": "2025-03-29", "timestamp": "2025-03-29T10:00:00"}) + "\n")
+    reloaded = AnalyticsTracker(storage_path=str(tmp_path))
+    assert reloaded.get_analytics_summary()["total_queries"] == 4
+    reloaded.close()
+
+
+def test_latency_percentiles_by_day_and_crew(tmp_path):
+    tracker = AnalyticsTracker(storage_path=str(tmp_path))
+    for i in range(1, 101):
+        tracker.track_query(f"q{i}", response_time=i / 10, agent_used="Portfolio Knowledge Expert", crew="portfolio")
+    tracker.track_query("cached", response_time=0.002, agent_used="Portfolio Knowledge Expert", crew="cache")
+
+    by_crew = {row["group"]: row for row in tracker.get_latency_percentiles("day", group_by="crew")}
+    portfolio = by_crew["portfolio"]
+    assert portfolio["count"] == 100
+    # Log buckets are accurate to a few percent
+    assert abs(portfolio["p50"] - 5.0) / 5.0 < 0.06
+    assert abs(portfolio["p90"] - 9.0) / 9.0 < 0.06
+    assert abs(portfolio["p99"] - 9.9) / 9.9 < 0.06
+    assert by_crew["cache"]["count"] == 1
+
+    hourly = tracker.get_latency_percentiles("hour")
+    assert sum(row["count"] for row in hourly) == 101
+    tracker.close()
+
+    # Histograms are saved apart from the small per-flush summary and restored from there
+    assert "histograms" not in json.loads(open(tracker.summary_file).read())
+    reloaded = AnalyticsTracker(storage_path=str(tmp_path))
+    assert reloaded.get_latency_percentiles("day", group_by="agent")[0]["count"] == 101
+    reloaded.close()
+
+
+def test_worker_snapshots_are_merged_and_taken_over(tmp_path, monkeypatch):
+    finished = subprocess.Popen([sys.executable, "-c", "pass"])
+    finished.wait()
+
+    # Two workers: one still running (our parent process) and one that exits
+    running = AnalyticsTracker(storage_path=str(tmp_path), worker_id=os.getppid())
+    exiting = AnalyticsTracker(storage_path=str(tmp_path), worker_id=finished.pid)
+    running.track_query("What are your skills?", user_id="alice", response_time=1.0)
+    exiting.track_query("What are your skills?", user_id="bob", response_time=2.0)
+    exiting.track_query("Which projects?", user_id="bob", response_time=3.0)
+    running.flush()
+    exiting.close()
+
+    # Reads merge the snapshots of the other workers
+    summary = running.get_analytics_summary()
+    assert summary["total_queries"] == 3 and summary["unique_users"] == 2
+    assert running.get_popular_queries(1) == [{"query": "what are your skills?", "count": 2}]
+    assert sum(row["count"] for row in running.get_latency_percentiles("day")) == 3
+
+    # A new worker takes over the finished worker's snapshot without replaying the history
+    def replay(self, *args):
+        raise AssertionError("the history was replayed")
+
+    monkeypatch.setattr(EventStore, "iter_events", replay)
+    restarted = AnalyticsTracker(storage_path=str(tmp_path))
+    assert not os.path.exists(exiting.summary_file)
+    assert restarted.aggregates["total_queries"] == 2
+    assert restarted.get_analytics_summary()["total_queries"] == 3
+    assert restarted.get_daily_summary()[0]["unique_users"] == 2
+    running.close()
+    restarted.close()
+
+
+def test_latency_histograms_roll_up_old_hours():
+    histograms = LatencyHistograms(initial_rows=4, hourly_days=2, daily_days=5, max_rows=100)
+    for day in range(1, 11):
+        for hour in range(24):
+            histograms.record(f"2025-03-{day:02d}T{hour:02d}:30:00", 1.0, crew="portfolio")
+
+    # Days 1-4 are dropped, days 5-7 rolled up, the last 2+ days stay hourly
+    periods = [row["period"] for row in histograms.get_percentiles("hour")]
+    assert periods[:3] == ["2025-03-05", "2025-03-06", "2025-03-07"]
+    assert periods[3] == "2025-03-08T00" and periods[-1] == "2025-03-10T23"
+    daily = histograms.get_percentiles("day")
+    assert [row["count"] for row in daily] == [24] * 6
+    assert len(histograms) == 3 + 3 * 24
+
+    restored = LatencyHistograms.from_dict(histograms.to_dict(), hourly_days=2, daily_days=5)
+    assert restored.get_percentiles("day") == daily
+
+
+def test_sketches_track_heavy_hitters_and_cardinality():
+    popular = SpaceSaving(capacity=10)
+    for i in range(1000):
+        popular.add("skills" if i % 3 == 0 else f"rare {i}")
+    assert popular.top(1)[0][0] == "skills"
+    assert len(popular.counters) == 10
+
+    users = HyperLogLog()
+    other = HyperLogLog()
+    for i in range(20000):
+        (users if i % 2 else other).add(f"user-{i}")
+    users.merge(other)
+    assert abs(users.count() - 20000) / 20000 < 0.05
+
+    restored = HyperLogLog.from_dict(users.to_dict())
+    assert restored.count() == users.count()
+    assert SpaceSaving.from_dict(popular.to_dict()).top(1) == popular.top(1)
+
+
+def test_space_saving_evicts_the_smallest_counter():
+    popular = SpaceSaving(capacity=3)
+    for item, count in (("a", 5), ("b", 2), ("c", 4)):
+        popular.add(item, count)
+    popular.add("b", 2)  # b's heap entry still says 2 and is refreshed on eviction
+    popular.add("a")
+    popular.add("d")
+    assert popular.to_dict()["items"] == [["a", 6, 0], ["c", 4, 0], ["d", 5, 4]]
+
+    # Estimates never undercount, and count - error never overcounts
+    popular, truth = SpaceSaving(capacity=3), {}
+    for i in range(5000):
+        item = f"q{(i * i) % 97}"
+        truth[item] = truth.get(item, 0) + 1
+        popular.add(item)
+    popular = SpaceSaving.from_dict(popular.to_dict())
+    popular.add("q1")
+    truth["q1"] += 1
+    for item, (count, error) in popular.counters.items():
+        assert count - error <= truth.get(item, 0) <= count
+    assert len(popular.counters) == 3
+
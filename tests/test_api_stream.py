@@ -0,0 +1,173 @@
+# tests/test_api_stream.py
+import asyncio
+import json
+
+import pytest
+from fastapi import BackgroundTasks
+from fastapi.testclient import TestClient
+
+from api import dependencies
+from api.executor import ExecutorBusyError
+from api.main import app
+from api.models import QueryRequest
+from api.routes import query
+from memory.conversation_store import ConversationMemory
+from memory.response_cache import ResponseCache
+
+QUESTION = "Tell me about your AI journey"
+
+
+class FakeExecutor:
+    """Runs the crew function inline, in thread mode so callbacks are passed"""
+    mode = "thread"
+
+    def __init__(self, error=None):
+        self.error = error
+
+    async def run(self, request_id, fn, *args, **kwargs):
+        if self.error:
+            raise self.error
+        return fn(*args, **kwargs)
+
+    def cancel(self, request_id):
+        return False
+
+
+class SlowExecutor(FakeExecutor):
+    """Never finishes on its own; records cancellations"""
+    def __init__(self):
+        super().__init__()
+        self.cancelled = []
+
+    async def run(self, request_id, fn, *args, **kwargs):
+        await asyncio.sleep(60)
+
+    def cancel(self, request_id):
+        self.cancelled.append(request_id)
+        return True
+
+
+class FakeAnalytics:
+    def __init__(self):
+        self.tracked = []
+
+    def track_query(self, **kwargs):
+        self.tracked.append(kwargs)
+
+
+def parse_events(body):
+    """Decode a text/event-stream body into (event, data) pairs"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+@pytest.fixture
+def stream_client(tmp_path):
+    memory = ConversationMemory(str(tmp_path))
+    analytics = FakeAnalytics()
+    overrides = {
+        dependencies.get_memory_store: lambda: memory,
+        dependencies.get_analytics_tracker: lambda: analytics,
+        dependencies.get_response_cache: lambda: ResponseCache(),
+        dependencies.get_semantic_cache: lambda: None,
+        dependencies.get_crew_executor: lambda: FakeExecutor(),
+    }
+    app.dependency_overrides.update(overrides)
+    yield TestClient(app), memory, analytics
+    app.dependency_overrides.clear()
+    memory.close()
+
+
+def test_stream_emits_events_in_order(stream_client, monkeypatch):
+    client, memory, analytics = stream_client
+    seen_history = []
+
+    def fake_crew(question, history, project_name, step_callback=None, task_callback=None, **kwargs):
+        # The answer is not persisted until the stream has completed
+        seen_history.append([m["role"] for m in memory.get_conversation("conv")])
+        step_callback(type("AgentAction", (), {"thought": "Looking up the journey"})())
+        task_callback(type("TaskOutput", (), {"agent": "Portfolio Knowledge Expert", "summary": "done"})())
+        return "Santiago is focused on AI agents for business automation and more"
+
+    monkeypatch.setattr(query, "run_crew_query", fake_crew)
+    response = client.post("/api/query/stream", json={"query": QUESTION, "conversation_id": "conv"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_events(response.text)
+    names = [event for event, _ in events]
+    assert names[:3] == ["start", "step", "task"]
+    assert names[-1] == "done" and set(names[3:-1]) == {"token"}
+    assert events[1][1] == {"type": "AgentAction", "thought": "Looking up the journey"}
+    assert "".join(data["text"] for event, data in events if event == "token").startswith("Santiago is focused")
+
+    assert seen_history == [["user"]]
+    assert [m["role"] for m in memory.get_conversation("conv")] == ["user", "assistant"]
+    assert analytics.tracked[0]["crew"] == "portfolio"
+
+
+def test_stream_reports_busy_executor(stream_client, monkeypatch):
+    client, memory, analytics = stream_client
+    app.dependency_overrides[dependencies.get_crew_executor] = lambda: FakeExecutor(ExecutorBusyError("full"))
+
+    response = client.post("/api/query/stream", json={"query": QUESTION, "conversation_id": "busy"})
+
+    events = parse_events(response.text)
+    assert [event for event, _ in events] == ["start", "error"]
+    assert events[1][1]["status_code"] == 503
+    assert [m["role"] for m in memory.get_conversation("busy")] == ["user"]
+    assert analytics.tracked == []
+
+
+def test_stream_reports_storage_errors_as_events(stream_client, monkeypatch):
+    client, memory, analytics = stream_client
+
+    def broken_store(conversation_id):
+        raise OSError("disk unavailable")
+
+    monkeypatch.setattr(memory, "get_conversation", broken_store)
+    response = client.post("/api/query/stream", json={"query": QUESTION, "conversation_id": "broken"})
+
+    assert response.status_code == 200
+    assert parse_events(response.text) == [("error", {"status_code": 500, "detail": "Error processing your request"})]
+
+
+def test_stream_cancels_crew_when_client_disconnects(tmp_path):
+    memory = ConversationMemory(str(tmp_path))
+    executor = SlowExecutor()
+
+    async def disconnect_after_start():
+        response = await query.stream_query(
+            QueryRequest(query=QUESTION, conversation_id="gone", request_id="req-gone"),
+            BackgroundTasks(), memory, FakeAnalytics(), executor, ResponseCache(), None, None
+        )
+        body = response.body_iterator
+        first = await body.__anext__()
+        # The client goes away while the stream waits for the crew
+        waiting = asyncio.ensure_future(body.__anext__())
+        await asyncio.sleep(0.05)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        return first
+
+    assert asyncio.run(disconnect_after_start()).startswith("event: start")
+    assert executor.cancelled == ["req-gone"]
+    assert [m["role"] for m in memory.get_conversation("gone")] == ["user"]
+    memory.close()
+
+
+def test_shutdown_resets_the_memory_store(tmp_path, monkeypatch):
+    monkeypatch.setenv("CONVERSATIONS_PATH", str(tmp_path))
+    monkeypatch.setattr(dependencies, "_memory_store", None)
+    store = dependencies.get_memory_store()
+
+    dependencies.shutdown_memory_store()
+    assert dependencies._memory_store is None
+    replacement = dependencies.get_memory_store()
+    assert replacement is not store
+    dependencies.shutdown_memory_store()
+
@@ -0,0 +1,125 @@
+# tests/test_executor.py
+import asyncio
+import time
+
+import pytest
+
+from api.executor import (
+    CrewExecutor,
+    DuplicateRequestError,
+    ExecutorBusyError,
+    RequestCancelledError,
+)
+
+
+def slow_task(value, delay=0.2):
+    time.sleep(delay)
+    return value
+
+
+def test_runs_work_concurrently():
+    """Blocking work runs in the pool without stalling the event loop"""
+    executor = CrewExecutor(max_workers=4, max_queue=8)
+
+    async def run_all():
+        return await asyncio.gather(*[
+            executor.run(f"req-{i}", slow_task, i) for i in range(4)
+        ])
+
+    start = time.monotonic()
+    results = asyncio.run(run_all())
+    elapsed = time.monotonic() - start
+    executor.shutdown()
+
+    assert results == [0, 1, 2, 3]
+    assert elapsed < 0.6
+    assert executor.get_stats()["completed"] == 4
+
+
+def test_rejects_when_queue_is_full():
+    """Requests beyond the wait queue are rejected"""
+    executor = CrewExecutor(max_workers=1, max_queue=1)
+
+    async def run_all():
+        first = asyncio.ensure_future(executor.run("a", slow_task, "a"))
+        second = asyncio.ensure_future(executor.run("b", slow_task, "b"))
+        await asyncio.sleep(0.05)
+        with pytest.raises(ExecutorBusyError):
+            await executor.run("c", slow_task, "c")
+        return await asyncio.gather(first, second)
+
+    assert asyncio.run(run_all()) == ["a", "b"]
+    assert executor.get_stats()["rejected"] == 1
+    executor.shutdown()
+
+
+def test_cancel_queued_request():
+    """A queued request can be cancelled by its request ID"""
+    executor = CrewExecutor(max_workers=1, max_queue=4)
+
+    async def run_all():
+        first = asyncio.ensure_future(executor.run("a", slow_task, "a"))
+        second = asyncio.ensure_future(executor.run("b", slow_task, "b"))
+        await asyncio.sleep(0.05)
+        assert executor.get_stats()["queue_depth"] == 1
+        assert executor.cancel("b")
+        with pytest.raises(RequestCancelledError):
+            await second
+        return await first
+
+    assert asyncio.run(run_all()) == "a"
+    assert executor.get_stats()["cancelled"] == 1
+    executor.shutdown()
+
+
+def test_queue_bound_holds_for_same_tick_burst():
+    """Requests submitted before any of them has started still respect max_queue"""
+    executor = CrewExecutor(max_workers=1, max_queue=2)
+
+    async def run_all():
+        # No await between submissions, so no task gets to start first
+        jobs = [asyncio.ensure_future(executor.run(f"req-{i}", slow_task, i, 0.05)) for i in range(6)]
+        return await asyncio.gather(*jobs, return_exceptions=True)
+
+    results = asyncio.run(run_all())
+    # One request takes the worker, two wait, the rest are rejected
+    accepted = [result for result in results if not isinstance(result, Exception)]
+    rejected = [result for result in results if isinstance(result, ExecutorBusyError)]
+    assert len(accepted) == 3 and len(rejected) == 3
+    stats = executor.get_stats()
+    assert stats["max_queue_depth"] == 2 and stats["queue_depth"] == 0
+    executor.shutdown()
+
+
+def test_rejects_duplicate_request_id():
+    """A request ID in progress cannot be reused, so cancel() hits the right job"""
+    executor = CrewExecutor(max_workers=2, max_queue=4)
+
+    async def run_all():
+        first = asyncio.ensure_future(executor.run("same", slow_task, "first"))
+        await asyncio.sleep(0.05)
+        with pytest.raises(DuplicateRequestError):
+            await executor.run("same", slow_task, "second")
+        assert await first == "first"
+        # Free again once the first request has finished
+        return await executor.run("same", slow_task, "third", 0.01)
+
+    assert asyncio.run(run_all()) == "third"
+    executor.shutdown()
+
+
+def test_cancel_before_start_releases_queue_place():
+    """Cancelling a request before its task ran gives its queue place back"""
+    executor = CrewExecutor(max_workers=1, max_queue=1)
+
+    async def run_all():
+        job = asyncio.ensure_future(executor.run("a", slow_task, "a"))
+        await asyncio.sleep(0)
+        assert executor.cancel("a")
+        with pytest.raises(RequestCancelledError):
+            await job
+        assert executor.get_stats()["queue_depth"] == 0
+        return await executor.run("b", slow_task, "b", 0.01)
+
+    assert asyncio.run(run_all()) == "b"
+    executor.shutdown()
@@ -0,0 +1,454 @@
+# tests/test_memory.py
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from knowledge.chunking import chunk_portfolio
+from memory.context_builder import build_history_context
+from memory.conversation_backends import JsonlConversationBackend, SQLiteConversationBackend
+from memory.conversation_store import ConversationMemory
+from memory.embedding_cache import CachedEmbeddings
+from memory.response_cache import ResponseCache, normalize_query
+from memory.semantic_cache import SemanticCache
+from memory.tokens import count_tokens
+from memory.vector_index import NumpyVectorIndex
+from memory import vector_store
+from memory.vector_store import (
+    HashingEmbeddings,
+    VectorStore,
+    compute_chunk_id,
+    load_manifest,
+    plan_index_update,
+    reciprocal_rank_fusion,
+    save_manifest,
+)
+
+
+def test_normalize_query():
+    assert normalize_query("  What skills do you HAVE?? ") == "what skills do you have"
+
+
+def test_response_cache_hits_and_lru_eviction():
+    cache = ResponseCache(max_entries=2, ttl=60)
+    key_a = cache.make_key("What skills do you have?", None, "v1")
+    key_b = cache.make_key("Tell me about your education", None, "v1")
+    key_c = cache.make_key("Where do you work?", None, "v1")
+
+    # Normalization makes trivially different phrasings share a key
+    assert key_a == cache.make_key("what skills do you have", None, "v1")
+    # Project and portfolio version are part of the key
+    assert key_a != cache.make_key("What skills do you have?", "Portfolio Assistant AI", "v1")
+    assert key_a != cache.make_key("What skills do you have?", None, "v2")
+
+    cache.set(key_a, {"response": "a"})
+    cache.set(key_b, {"response": "b"})
+    assert cache.get(key_a) == {"response": "a"}
+
+    # key_b is now least recently used and gets evicted
+    cache.set(key_c, {"response": "c"})
+    assert cache.get(key_b) is None
+
+    stats = cache.get_stats()
+    assert stats["size"] == 2
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+
+
+def test_response_cache_ttl():
+    cache = ResponseCache(max_entries=10, ttl=0.05)
+    key = cache.make_key("What skills do you have?", None, "v1")
+    cache.set(key, {"response": "a"})
+    time.sleep(0.1)
+    assert cache.get(key) is None
+    assert cache.get_stats()["expirations"] == 1
+
+
+def test_hashing_embeddings_are_deterministic():
+    embeddings = HashingEmbeddings()
+    assert embeddings.embed_query("Which databases?") == embeddings.embed_query("Which databases?")
+
+
+def test_semantic_cache_matches_near_duplicates():
+    cache = SemanticCache(HashingEmbeddings(), threshold=0.9, max_entries=4)
+    cache.add("What are your AI skills?", "|v1", {"response": "AI answer"})
+
+    match = cache.lookup("Which AI skills do you have?", "|v1")
+    assert match["value"] == {"response": "AI answer"}
+    assert match["similarity"] >= 0.9
+
+    # Unrelated questions and other scopes do not match
+    assert cache.lookup("Where did you study?", "|v1") is None
+    assert cache.lookup("Which AI skills do you have?", "Portfolio Assistant AI|v1") is None
+    assert cache.get_stats()["hits"] == 1
+
+
+def test_semantic_cache_evicts_least_recently_used():
+    cache = SemanticCache(HashingEmbeddings(), threshold=0.9, max_entries=2)
+    cache.add("What databases do you know?", "s", {"response": "databases"})
+    cache.add("Where do you live?", "s", {"response": "location"})
+    assert cache.lookup("Which databases do you know?", "s") is not None
+
+    cache.add("What are your hobbies?", "s", {"response": "hobbies"})
+    assert cache.lookup("Where do you live?", "s") is None
+    assert cache.lookup("What databases do you know?", "s") is not None
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_conversation_log_is_append_only(tmp_path):
+    memory = ConversationMemory(storage_path=str(tmp_path))
+    memory.add_message("conv", "user", "Hi")
+    memory.add_message("conv", "assistant", "Hello!")
+    memory.close()
+
+    with open(tmp_path / "conv.jsonl") as f:
+        lines = [json.loads(line) for line in f]
+    assert [m["content"] for m in lines] == ["Hi", "Hello!"]
+
+    # A fresh store reads the log back
+    assert [m["role"] for m in ConversationMemory(str(tmp_path)).get_conversation("conv")] == ["user", "assistant"]
+
+
+def test_legacy_json_conversation_is_migrated(tmp_path):
+    legacy = [{"role": "user", "content": "Old question", "timestamp": "2025-03-31T23:01:03"}]
+    with open(tmp_path / "old.json", "w") as f:
+        json.dump(legacy, f)
+
+    memory = ConversationMemory(storage_path=str(tmp_path))
+    memory.add_message("old", "assistant", "Old answer")
+    memory.close()
+
+    assert not os.path.exists(tmp_path / "old.json")
+    contents = [m["content"] for m in ConversationMemory(str(tmp_path)).get_conversation("old")]
+    assert contents == ["Old question", "Old answer"]
+
+
+def test_torn_log_line_is_dropped(tmp_path):
+    with open(tmp_path / "torn.jsonl", "w") as f:
+        f.write(json.dumps({"role": "user", "content": "Complete", "timestamp": "t"}) + "\n")
+        f.write('{"role": "assistant", "cont')
+
+    memory = ConversationMemory(storage_path=str(tmp_path))
+    memory.add_message("torn", "assistant", "Retry")
+    memory.close()
+
+    contents = [m["content"] for m in ConversationMemory(str(tmp_path)).get_conversation("torn")]
+    assert contents == ["Complete", "Retry"]
+
+
+def test_conversation_cache_is_bounded(tmp_path):
+    memory = ConversationMemory(storage_path=str(tmp_path), max_cached_messages=3)
+    memory.add_message("first", "user", "One")
+    memory.add_message("first", "assistant", "Two")
+    memory.add_message("second", "user", "Three")
+    memory.add_message("second", "assistant", "Four")
+
+    stats = memory.get_cache_stats()
+    assert stats["cached_conversations"] == 1
+    assert stats["cached_messages"] == 2
+    assert stats["evictions"] == 1
+
+    # Evicted conversations are reloaded from disk
+    assert [m["content"] for m in memory.get_conversation("first")] == ["One", "Two"]
+    assert memory.get_cache_stats()["misses"] >= 1
+    memory.close()
+
+
+def test_jsonl_backend_caps_open_log_files(tmp_path):
+    backend = JsonlConversationBackend(str(tmp_path), max_open_files=4)
+    memory = ConversationMemory(storage_path=str(tmp_path), backend=backend)
+    for i in range(50):
+        memory.add_message(f"conv-{i}", "user", f"Question {i}")
+        assert len(backend._log_files) <= 4
+    memory.add_message("conv-0", "assistant", "Answer 0")
+    memory.close()
+
+    reopened = ConversationMemory(str(tmp_path))
+    assert [m["content"] for m in reopened.get_conversation("conv-0")] == ["Question 0", "Answer 0"]
+    assert len(reopened.list_conversations(limit=100)["conversations"]) == 50
+
+
+def test_failed_append_raises_and_is_not_cached(tmp_path):
+    memory = ConversationMemory(storage_path=str(tmp_path))
+    memory.add_message("conv", "user", "Saved")
+
+    # The log can no longer be opened for appending
+    memory.backend.release("conv")
+    os.remove(tmp_path / "conv.jsonl")
+    os.mkdir(tmp_path / "conv.jsonl")
+    with pytest.raises(OSError):
+        memory.add_message("conv", "assistant", "Lost")
+    assert [m["content"] for m in memory.get_conversation("conv")] == ["Saved"]
+    memory.close()
+
+
+def test_conversation_store_is_thread_safe(tmp_path):
+    memory = ConversationMemory(storage_path=str(tmp_path))
+
+    def write(worker):
+        for i in range(50):
+            memory.add_message("shared", "user", f"{worker}-{i}")
+
+    threads = [threading.Thread(target=write, args=(w,)) for w in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    memory.close()
+
+    assert len(memory.get_conversation("shared")) == 200
+    assert len(ConversationMemory(str(tmp_path)).get_conversation("shared")) == 200
+
+
+def test_sqlite_backend_pagination_and_ranges(tmp_path):
+    backend = SQLiteConversationBackend(str(tmp_path / "conversations.db"))
+    memory = ConversationMemory(storage_path=str(tmp_path), backend=backend)
+    for i in range(5):
+        memory.add_message(f"conv-{i}", "user", f"Question {i}")
+        memory.add_message(f"conv-{i}", "assistant", f"Answer {i}")
+
+    first_page = memory.list_conversations(limit=2)
+    assert [c["conversation_id"] for c in first_page["conversations"]] == ["conv-4", "conv-3"]
+    assert first_page["conversations"][0]["message_count"] == 2
+
+    second_page = memory.list_conversations(limit=2, cursor=first_page["next_cursor"])
+    last_page = memory.list_conversations(limit=2, cursor=second_page["next_cursor"])
+    assert [c["conversation_id"] for c in second_page["conversations"]] == ["conv-2", "conv-1"]
+    assert [c["conversation_id"] for c in last_page["conversations"]] == ["conv-0"]
+    assert last_page["next_cursor"] is None
+
+    assert [m["content"] for m in backend.get_messages("conv-1", 1, 2)] == ["Answer 1"]
+    memory.close()
+
+    # Data survives reopening the database
+    reopened = SQLiteConversationBackend(str(tmp_path / "conversations.db"))
+    assert [m["role"] for m in reopened.load("conv-3")] == ["user", "assistant"]
+    reopened.close()
+
+
+def test_sqlite_backend_imports_json_files(tmp_path):
+    conversations_dir = tmp_path / "conversations"
+    conversations_dir.mkdir()
+    with open(conversations_dir / "legacy.json", "w") as f:
+        json.dump([{"role": "user", "content": "Old", "timestamp": "2025-03-31T23:01:03"}], f)
+    with open(conversations_dir / "log.jsonl", "w") as f:
+        f.write(json.dumps({"role": "user", "content": "New", "timestamp": "2025-04-01T10:00:00"}) + "\n")
+
+    backend = SQLiteConversationBackend(str(tmp_path / "conversations.db"))
+    assert backend.import_json_files(str(conversations_dir)) == 2
+    # Importing again skips existing conversations
+    assert backend.import_json_files(str(conversations_dir)) == 0
+    assert [m["content"] for m in backend.load("legacy")] == ["Old"]
+    assert backend.list_conversations()["conversations"][0]["conversation_id"] == "log"
+    backend.close()
+
+
+def test_index_update_plan_only_embeds_changed_chunks(tmp_path):
+    ids = [compute_chunk_id(text, {"chunk": i}) for i, text in enumerate(["intro", "skills", "projects"])]
+    assert plan_index_update(None, "openai", ids) == {"rebuild": True, "add": ids, "delete": []}
+
+    save_manifest(str(tmp_path), "openai", ids)
+    manifest = load_manifest(str(tmp_path))
+    assert plan_index_update(manifest, "openai", ids) == {"rebuild": False, "add": [], "delete": []}
+
+    changed = ids[:2] + [compute_chunk_id("projects v2", {"chunk": 2})]
+    plan = plan_index_update(manifest, "openai", changed)
+    assert plan["add"] == changed[2:]
+    assert plan["delete"] == [ids[2]]
+
+    # A different embeddings model invalidates every stored vector
+    assert plan_index_update(manifest, "huggingface", ids)["rebuild"] is True
+
+
+def test_numpy_vector_store_reuses_unchanged_embeddings(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_store, "EMBEDDINGS_MODEL", "hashing")
+    text = "\n".join([
+        "Skills: Python, FastAPI, PostgreSQL",
+        "Experience: backend engineer building data pipelines",
+        "Projects: portfolio assistant with CrewAI agents",
+    ])
+
+    store = VectorStore(persist_directory=str(tmp_path), backend="numpy")
+    store._split_text = lambda content: content.splitlines()
+    store.initialize_from_text(text, metadata={"source": "test"})
+    results = store.similarity_search("Which databases like PostgreSQL?", k=2)
+    assert results[0]["content"].startswith("Skills")
+    assert results[0]["score"] >= results[1]["score"]
+
+    # A restarted store re-opens the memory-mapped index without embedding anything
+    reopened = VectorStore(persist_directory=str(tmp_path), backend="numpy")
+    reopened._split_text = lambda content: content.splitlines()
+    embedded = []
+    original = reopened.embeddings.embed_documents
+    monkeypatch.setattr(reopened.embeddings, "embed_documents", lambda texts: embedded.extend(texts) or original(texts))
+    reopened.initialize_from_text(text, metadata={"source": "test"})
+    assert embedded == []
+
+    reopened.initialize_from_text(text.replace("CrewAI", "LangGraph"), metadata={"source": "test"})
+    assert embedded == ["Projects: portfolio assistant with LangGraph agents"]
+    assert len(reopened.similarity_search_batch(["python", "pipelines"], k=1)) == 2
+
+
+def test_numpy_index_update_with_no_chunks_clears_it(tmp_path):
+    index = NumpyVectorIndex(str(tmp_path))
+    embeddings = HashingEmbeddings()
+
+    # No chunks and no existing index: nothing to take the dimensions from
+    assert index.update([], [], [], embeddings, "hashing") == 0
+    assert len(index) == 0 and index.search(np.ones(8), k=3) == [[]]
+
+    index.update(["a"], ["Python and FastAPI"], [{}], embeddings, "hashing")
+    assert len(index) == 1
+    assert index.update([], [], [], embeddings, "hashing") == 0
+    assert len(index) == 0 and not index.load()
+
+
+def test_portfolio_chunks_support_metadata_filters(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_store, "EMBEDDINGS_MODEL", "hashing")
+    documents = chunk_portfolio()
+    sections = {document["metadata"]["section"] for document in documents}
+    assert sections == {"personal", "skills", "experience", "education", "ai_journey", "philosophy", "projects"}
+    assert all("{" not in document["text"] for document in documents)
+
+    store = VectorStore(persist_directory=str(tmp_path), backend="numpy")
+    store.initialize_from_documents(documents)
+
+    jobs = store.similarity_search("React developer", k=10, filter={"section": "experience"})
+    assert jobs and all(job["metadata"]["section"] == "experience" for job in jobs)
+    projects = store.similarity_search("agents", k=3, filter={"project": "Portfolio Assistant AI"})
+    assert [p["metadata"]["project"] for p in projects] == ["Portfolio Assistant AI"]
+    assert store.similarity_search("agents", filter={"section": "unknown"}) == []
+
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        self.calls.append([text])
+        return [float(len(text)), 1.0]
+
+
+def test_embedding_cache_never_embeds_twice(tmp_path):
+    db_path = str(tmp_path / "cache.sqlite")
+    model = CountingEmbeddings()
+    cache = CachedEmbeddings(model, "fake", db_path=db_path, batch_size=2)
+
+    vectors = cache.embed_documents(["a", "bb", "a", "ccc"])
+    assert vectors == [[1.0, 1.0], [2.0, 1.0], [1.0, 1.0], [3.0, 1.0]]
+    # Three distinct texts, sent in batches of two
+    assert model.calls == [["a", "bb"], ["ccc"]]
+
+    cache.embed_documents(["bb", "ccc"])
+    cache.embed_query("a")
+    cache.embed_query("a")
+    assert len(model.calls) == 2
+    assert cache.get_stats()["memory_hits"] == 1
+    cache.close()
+
+    # Vectors survive a restart and are scoped by model name
+    reopened = CachedEmbeddings(model, "fake", db_path=db_path)
+    assert reopened.embed_query("ccc") == [3.0, 1.0]
+    assert len(model.calls) == 2
+    CachedEmbeddings(model, "other", db_path=db_path).embed_query("ccc")
+    assert model.calls[-1] == ["ccc"]
+
+
+def test_query_batches_use_the_in_memory_lru(tmp_path, monkeypatch):
+    model = CountingEmbeddings()
+    cache = CachedEmbeddings(model, "fake", db_path=str(tmp_path / "cache.sqlite"))
+    monkeypatch.setattr(vector_store, "EMBEDDINGS_MODEL", "hashing")
+    store = VectorStore(persist_directory=str(tmp_path / "index"), backend="numpy")
+    store.embeddings = cache
+    store.vector_db.update(["c"], ["Python"], [{}], cache, "fake")
+
+    assert cache.embed_queries(["a", "bb", "a"]) == [[1.0, 1.0], [2.0, 1.0], [1.0, 1.0]]
+    assert model.calls[-2:] == [["a"], ["bb"]]
+
+    # Warm queries never reach SQLite, searches included
+    monkeypatch.setattr(cache, "_load", lambda hashes: pytest.fail("disk lookup"))
+    assert cache.embed_queries(["bb", "a"]) == [[2.0, 1.0], [1.0, 1.0]]
+    assert len(store.similarity_search_batch(["a", "bb"], k=1)) == 2
+    assert cache.get_stats()["memory_hits"] == 4
+    cache.close()
+
+
+def test_hybrid_search_finds_exact_technology_names(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_store, "EMBEDDINGS_MODEL", "hashing")
+    store = VectorStore(persist_directory=str(tmp_path), backend="numpy")
+    store.initialize_from_documents(chunk_portfolio())
+
+    keyword = store.keyword_search("Lens Studio", k=5)
+    assert keyword and all("Lens Studio" in result["content"] for result in keyword)
+
+    hybrid = store.hybrid_search("Has he worked with n8n?", k=2)
+    assert "n8n" in hybrid[0]["content"]
+
+    # Keyword search also works on an index re-opened from disk
+    reopened = VectorStore(persist_directory=str(tmp_path), backend="numpy")
+    assert reopened.keyword_search("Supabase", k=1, filter={"section": "experience"})[0]["metadata"]["company"] == "Inherently"
+    assert reciprocal_rank_fusion([[{"content": "a"}, {"content": "b"}], [{"content": "b"}]])[0]["content"] == "b"
+
+
+def test_history_context_fits_token_budget(tmp_path):
+    memory = ConversationMemory(str(tmp_path))
+    for i in range(50):
+        memory.add_message("long", "user", f"Question {i} " + "word " * 20)
+        memory.add_message("long", "assistant", f"Answer {i}")
+
+    conversation = memory.get_conversation("long")
+    # Token counts are cached on the messages when stored
+    assert all("tokens" in message for message in conversation)
+
+    context = build_history_context(conversation, max_tokens=100)
+    assert count_tokens(context) <= 100
+    assert context.rstrip().endswith("Answer 49")
+    assert "Question 40 " not in context
+
+    assert build_history_context(conversation, max_tokens=3) == ""
+    assert memory.format_for_context("long", max_tokens=100).startswith("# Previous Conversation:")
+
+
+def test_rolling_summary_covers_older_turns(tmp_path):
+    memory = ConversationMemory(str(tmp_path), summary_every=4, recent_messages=2)
+    for i in range(6):
+        memory.add_message("chat", "user", f"Question {i}? More detail.")
+        memory.add_message("chat", "assistant", f"Answer {i}.")
+    memory.close()
+
+    # Refreshed in the background; the last 2 messages always stay verbatim
+    reopened = ConversationMemory(str(tmp_path), summary_every=4, recent_messages=2)
+    summary = reopened.get_summary("chat")
+    assert 4 <= summary["covered"] <= 10
+    assert "Question 0?" in summary["text"] and "More detail" not in summary["text"]
+    assert "Question 5?" not in summary["text"]
+
+    context = build_history_context(reopened.get_conversation("chat"), summary=summary)
+    assert "Summary of earlier turns" in context
+    assert "User: Question 5? More detail." in context
+    assert "User: Question 0? More detail." not in context
+
+    assert reopened.delete_conversation("chat")
+    assert reopened.get_summary("chat") is None
+    reopened.close()
+
+
+def test_closed_store_stops_scheduling_summaries(tmp_path):
+    memory = ConversationMemory(str(tmp_path), summary_every=2, recent_messages=0)
+    memory.add_message("chat", "user", "Before close")
+    memory.close()
+
+    # A late message is still stored, without a summary refresh
+    memory.add_message("chat", "assistant", "After close")
+    memory.add_message("chat", "user", "And again")
+    assert len(memory.get_conversation("chat")) == 3
+    memory.backend.close()
+
@@ -19,5 +19,5 @@ def test_query_endpoint():
     data = response.json()
     assert "conversation_id" in data
     assert "response" in data
-    assert data["agent_used"] in ["Portfolio Knowledge Expert", "Project Specialist"]
+    assert data["agent_used"] in ["Portfolio Knowledge Expert", "Project Specialist", "Direct Answer Engine"]
     assert "processing_time" in data
\ No newline at end of file